@@ -4,9 +4,10 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlmodel import Session, select
 from ..core.database import get_session
-from ..core.security import verify_password, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES, get_password_hash
+from ..core.security import verify_password, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES, STREAM_SCOPE, STREAM_TOKEN_EXPIRE_SECONDS, get_password_hash
 from ..models.property import User
-from ..schemas.auth import Token, InviteAcceptRequest
+from ..schemas.auth import Token, StreamToken, InviteAcceptRequest
+from .deps import get_current_user
 
 router = APIRouter()
 
@@ -84,3 +85,12 @@ def validate_invite(
         raise HTTPException(status_code=400, detail="Invite expired")
         
     return {"status": "valid", "email": user.email}
+
+@router.post("/stream-token", response_model=StreamToken)
+def create_stream_token(current_user: Annotated[User, Depends(get_current_user)]):
+    """Short-lived token for ?access_token= on the live update streams (/units/{id}/stream, /buildings/{id}/stream)."""
+    access_token = create_access_token(
+        data={"sub": str(current_user.id), "role": current_user.role, "scope": STREAM_SCOPE},
+        expires_delta=timedelta(seconds=STREAM_TOKEN_EXPIRE_SECONDS),
+    )
+    return StreamToken(access_token=access_token, expires_in=STREAM_TOKEN_EXPIRE_SECONDS)
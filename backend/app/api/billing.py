@@ -0,0 +1,56 @@
+import uuid
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException
+from sqlmodel import Session, select
+from ..core.database import get_session
+from ..models.property import Building, User
+from ..models.billing import Settlement, SettlementCreate, SettlementRead
+from ..services.billing import settle_building
+from .deps import get_current_user
+
+router = APIRouter()
+
+def get_managed_building(building_id: uuid.UUID, session: Session, current_user: User) -> Building:
+    building = session.get(Building, building_id)
+    if not building:
+        raise HTTPException(status_code=404, detail="Building not found")
+
+    if current_user.role == "admin":
+        pass
+    elif current_user.role == "home_lord":
+        if building.manager_id != current_user.id:
+             raise HTTPException(status_code=403, detail="Not authorized")
+    else:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return building
+
+@router.post("/buildings/{building_id}/settlements", response_model=SettlementRead)
+def create_settlement(
+    building_id: uuid.UUID,
+    settlement: SettlementCreate,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Allocates the building's costs for the period across its units and stores the result."""
+    get_managed_building(building_id, session, current_user)
+
+    if settlement.period_end <= settlement.period_start:
+        raise HTTPException(status_code=400, detail="period_end must be after period_start")
+    if any(share < 0 or share > 1 for share in (settlement.basic_shares or {}).values()):
+        raise HTTPException(status_code=400, detail="basic_shares must be between 0 and 1")
+
+    db_settlement = settle_building(
+        session, building_id, settlement.period_start, settlement.period_end, settlement.costs, settlement.basic_shares
+    )
+    session.commit()
+    session.refresh(db_settlement)
+    return db_settlement
+
+@router.get("/buildings/{building_id}/settlements", response_model=List[SettlementRead])
+def read_settlements(
+    building_id: uuid.UUID,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    get_managed_building(building_id, session, current_user)
+    return session.exec(select(Settlement).where(Settlement.building_id == building_id).order_by(Settlement.period_start.desc())).all()
@@ -1,12 +1,26 @@
 import uuid
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date, datetime, timedelta
+from typing import List, Literal, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session, select
 from ..core.database import get_session
 from ..models.property import Building, BuildingCreate, BuildingRead, BuildingUpdate, Unit, UnitRead, User, UnitCreate
-from ..models.telemetry import Meter, MeterCreate, MeterReading
+from ..models.telemetry import Meter, MeterCreate, MeterReading, MeterMonthlyRollup, MeterAlert, MeterAlertRead, MeterLatestRead
+from ..schemas.consumption import BuildingConsumptionRead, BuildingRankingRead, TypeConsumption, UnitTypeConsumption
 from ..core.influx_utils import get_unique_units, get_unit_meters
-from .deps import get_current_user
+from ..core.responses import ORJSONResponse, trusted_response
+from ..core.conditional import conditional_response
+from ..core.sse import sse_response
+from ..core.tracing import span
+from ..services.ingestion import delete_meter_readings, touch_building
+from ..services.consumption import building_rollup_statement, rollup_for_range, totals_between
+from ..services.analytics import building_ranking
+from ..services.quality import SORT_KEYS, building_gap_report, last_days
+from ..schemas.quality import BuildingGapReport
+from ..services import export
+from ..services.latest import latest_statement
+from .deps import get_current_user, get_stream_user
 
 router = APIRouter()
 
@@ -28,32 +42,35 @@ def create_building(
     session.refresh(db_building)
     return db_building
 
-@router.get("/", response_model=List[BuildingRead])
+@router.get("/", response_model=List[BuildingRead], response_class=ORJSONResponse)
 def read_buildings(
+    request: Request,
     offset: int = 0, 
     limit: int = 100, 
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
+    # Building columns map 1:1 to BuildingRead, rows are serialized without re-validation.
+    # Buildings carry no modification time, so the ETag is taken from the rendered body.
     if current_user.role == "admin":
-        return session.exec(select(Building).offset(offset).limit(limit)).all()
+        return conditional_response(request, trusted_response(session.execute(select(Building.__table__).offset(offset).limit(limit))))
     
     elif current_user.role == "home_lord":
         # See only managed buildings
-        return session.exec(select(Building).where(Building.manager_id == current_user.id).offset(offset).limit(limit)).all()
+        return conditional_response(request, trusted_response(session.execute(select(Building.__table__).where(Building.manager_id == current_user.id).offset(offset).limit(limit))))
     
     elif current_user.role == "owner":
         # See buildings where they own a unit
         # This is a bit more complex. Join Building with Unit
         statement = (
-            select(Building)
+            select(Building.__table__)
             .join(Unit)
             .where(Unit.owner_id == current_user.id)
             .distinct()
             .offset(offset)
             .limit(limit)
         )
-        return session.exec(statement).all()
+        return conditional_response(request, trusted_response(session.execute(statement)))
     
     return []
 
@@ -81,9 +98,44 @@ def read_building(
              
     return building
 
-@router.get("/{building_id}/units", response_model=List[UnitRead])
+@router.get("/{building_id}/latest", response_model=List[MeterLatestRead], response_class=ORJSONResponse)
+def read_building_latest(
+    building_id: uuid.UUID,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Current value of every meter in the building, from meter_latest (no history scan)."""
+    building = session.get(Building, building_id)
+    if not building:
+        raise HTTPException(status_code=404, detail="Building not found")
+
+    where = [Unit.building_id == building_id]
+    if current_user.role == "home_lord":
+        if building.manager_id != current_user.id:
+            raise HTTPException(status_code=403, detail="Not authorized")
+    elif current_user.role == "owner":
+        # Owners only see their own units
+        where.append(Unit.owner_id == current_user.id)
+
+    return trusted_response(session.exec(latest_statement(*where)))
+
+@router.get("/{building_id}/stream")
+def stream_building(
+    building_id: uuid.UUID,
+    request: Request,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_stream_user)
+):
+    """Server-Sent Events with new readings and alerts of all meters in the building (admins and its manager)."""
+    get_consumption_building(session, building_id, current_user)
+    # The stream may stay open for hours, don't hold a DB connection meanwhile
+    session.close()
+    return sse_response(request, [("building", building_id)])
+
+@router.get("/{building_id}/units", response_model=List[UnitRead], response_class=ORJSONResponse)
 def read_building_units(
     building_id: uuid.UUID, 
+    request: Request,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
@@ -101,7 +153,9 @@ def read_building_units(
         # Owner can only see their own units
         statement = statement.where(Unit.owner_id == current_user.id)
         
-    return session.exec(statement).all()
+    units = session.exec(statement).all()
+    # Render once (owner included) to hash the body for the ETag
+    return conditional_response(request, ORJSONResponse([UnitRead.model_validate(unit) for unit in units]))
 
 @router.patch("/{building_id}/assign_manager", response_model=BuildingRead)
 def assign_manager(
@@ -173,6 +227,8 @@ def fetch_units_from_influx(
     if not building.influx_db_name:
          raise HTTPException(status_code=400, detail="Building has no InfluxDB database configured")
 
+    touch_building(session, building_id)
+
     # 1. Fetch Unique Units
     influx_units = get_unique_units(building.influx_db_name, building.influx_unit_tag)
     
@@ -180,44 +236,45 @@ def fetch_units_from_influx(
     connected_meters = 0
 
     for unit_name in influx_units:
-        # Check if unit exists
-        db_unit = session.exec(select(Unit).where(Unit.building_id == building_id, Unit.unit_number == unit_name)).first()
-        if not db_unit:
-            # Create Unit
-            db_unit = Unit(
-                unit_number=unit_name,
-                floor=0, # Default
-                area_m2=0.0, # Default
-                building_id=building_id
-            )
-            session.add(db_unit)
-            session.commit()
-            session.refresh(db_unit)
-            created_units += 1
-        
-        # 2. Fetch Meters for Unit
-        meters = get_unit_meters(building.influx_db_name, unit_name, building.influx_unit_tag, building.influx_measurements, building.influx_device_tag)
-        for meter_data in meters:
-            # Check if meter exists
-            db_meter = session.exec(select(Meter).where(Meter.serial_number == meter_data['serial_number'])).first()
-            if not db_meter:
-                db_meter = Meter(
-                    serial_number=meter_data['serial_number'],
-                    type=meter_data['type'],
-                    unit_of_measure=meter_data['unit_of_measure'],
-                    unit_id=db_unit.id
+        with span("fetch_unit", unit=unit_name):
+            # Check if unit exists
+            db_unit = session.exec(select(Unit).where(Unit.building_id == building_id, Unit.unit_number == unit_name)).first()
+            if not db_unit:
+                # Create Unit
+                db_unit = Unit(
+                    unit_number=unit_name,
+                    floor=0, # Default
+                    area_m2=0.0, # Default
+                    building_id=building_id
                 )
-                session.add(db_meter)
-                session.commit() # Commit each meter to be safe
-                connected_meters += 1
-            else:
-                # Meter exists, ensure it is assigned to this unit
-                if db_meter.unit_id != db_unit.id:
-                    db_meter.unit_id = db_unit.id
+                session.add(db_unit)
+                session.commit()
+                session.refresh(db_unit)
+                created_units += 1
+        
+            # 2. Fetch Meters for Unit
+            meters = get_unit_meters(building.influx_db_name, unit_name, building.influx_unit_tag, building.influx_measurements, building.influx_device_tag)
+            for meter_data in meters:
+                # Check if meter exists
+                db_meter = session.exec(select(Meter).where(Meter.serial_number == meter_data['serial_number'])).first()
+                if not db_meter:
+                    db_meter = Meter(
+                        serial_number=meter_data['serial_number'],
+                        type=meter_data['type'],
+                        unit_of_measure=meter_data['unit_of_measure'],
+                        unit_id=db_unit.id
+                    )
                     session.add(db_meter)
-                    session.commit()
-                # Count as connected regardless of whether it was just moved or already there
-                connected_meters += 1
+                    session.commit() # Commit each meter to be safe
+                    connected_meters += 1
+                else:
+                    # Meter exists, ensure it is assigned to this unit
+                    if db_meter.unit_id != db_unit.id:
+                        db_meter.unit_id = db_unit.id
+                        session.add(db_meter)
+                        session.commit()
+                    # Count as connected regardless of whether it was just moved or already there
+                    connected_meters += 1
     
     # Update units_fetched flag if we successfully processed at least one unit from InfluxDB
     if len(influx_units) > 0:
@@ -250,6 +307,8 @@ def reload_building_units(
     if not building.influx_db_name:
          raise HTTPException(status_code=400, detail="Building has no InfluxDB database configured")
 
+    touch_building(session, building_id)
+
     # 1. Backup Owner Map
     existing_units = session.exec(select(Unit).where(Unit.building_id == building_id)).all()
     owner_map = {u.unit_number: u.owner_id for u in existing_units if u.owner_id}
@@ -259,10 +318,8 @@ def reload_building_units(
         # Delete meters
         meters = session.exec(select(Meter).where(Meter.unit_id == unit.id)).all()
         for meter in meters:
-            # Delete readings
-            readings = session.exec(select(MeterReading).where(MeterReading.meter_id == meter.id)).all()
-            for reading in readings:
-                session.delete(reading)
+            # Delete readings (and their rollups)
+            delete_meter_readings(session, meter.id)
             session.delete(meter)
         
         # Delete unit
@@ -364,10 +421,8 @@ def delete_all_building_units(
         # Get meters
         meters = session.exec(select(Meter).where(Meter.unit_id == unit.id)).all()
         for meter in meters:
-            # Delete readings first
-            readings = session.exec(select(MeterReading).where(MeterReading.meter_id == meter.id)).all()
-            for reading in readings:
-                session.delete(reading)
+            # Delete readings (and their rollups) first
+            delete_meter_readings(session, meter.id)
             
             session.delete(meter)
             deleted_meters += 1
@@ -376,6 +431,7 @@ def delete_all_building_units(
         deleted_units += 1
 
     # Reset flag
+    touch_building(session, building_id)
     building.units_fetched = False
     session.add(building)
     session.commit()
@@ -406,17 +462,190 @@ def delete_building(
         # 2. Delete meters for each unit
         meters = session.exec(select(Meter).where(Meter.unit_id == unit.id)).all()
         for meter in meters:
-            # Delete readings first
-            readings = session.exec(select(MeterReading).where(MeterReading.meter_id == meter.id)).all()
-            for reading in readings:
-                session.delete(reading)
+            # Delete readings (and their rollups) first
+            delete_meter_readings(session, meter.id)
             session.delete(meter)
         
         # 3. Delete unit
         session.delete(unit)
     
     # 4. Delete building
+    touch_building(session, building_id)
     session.delete(building)
     session.commit()
 
     return {"message": f"Building '{building.name}' deleted successfully"}
+
+
+def last_full_month() -> Tuple[date, date]:
+    first_of_month = date.today().replace(day=1)
+    previous = (first_of_month - timedelta(days=1)).replace(day=1)
+    return previous, first_of_month
+
+def resolve_period(date_from: Optional[date], date_to: Optional[date]) -> Tuple[date, date]:
+    default_from, default_to = last_full_month()
+    date_from = date_from or default_from
+    date_to = date_to or default_to
+    if date_to <= date_from:
+        raise HTTPException(status_code=400, detail="'to' must be after 'from'")
+    return date_from, date_to
+
+def get_consumption_building(session: Session, building_id: uuid.UUID, current_user: User) -> Building:
+    # Building-wide consumption figures are for admins and the managing home lord only
+    building = session.get(Building, building_id)
+    if not building:
+        raise HTTPException(status_code=404, detail="Building not found")
+
+    if current_user.role == "home_lord" and building.manager_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    elif current_user.role == "owner":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return building
+
+@router.get("/{building_id}/consumption", response_model=BuildingConsumptionRead)
+def read_building_consumption(
+    building_id: uuid.UUID,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Building consumption in [from, to) per meter type, with a per-unit breakdown. Defaults to the last full month.
+    All meters are aggregated from the rollups in one query (monthly rollups for whole months).
+    """
+    get_consumption_building(session, building_id, current_user)
+    date_from, date_to = resolve_period(date_from, date_to)
+
+    start = datetime.combine(date_from, datetime.min.time())
+    end = datetime.combine(date_to, datetime.min.time())
+    statement = building_rollup_statement(building_id, start, end, Meter.unit_id, Unit.unit_number, Meter.type, Meter.unit_of_measure)
+
+    meter_info = {}
+    def readings():
+        for meter_id, bucket, value, unit_id, unit_number, meter_type, uom in session.exec(statement):
+            meter_info[meter_id] = (unit_id, unit_number, meter_type, uom)
+            yield meter_id, bucket, value
+    totals = totals_between(readings(), start, end)
+
+    by_type = {}
+    by_unit = {}
+    for meter_id, total in totals.items():
+        unit_id, unit_number, meter_type, uom = meter_info[meter_id]
+        type_total = by_type.setdefault(meter_type, TypeConsumption(type=meter_type, unit_of_measure=uom, consumption=0.0, meters=0))
+        type_total.consumption += total
+        type_total.meters += 1
+        unit_total = by_unit.setdefault(unit_id, UnitTypeConsumption(unit_id=unit_id, unit_number=unit_number, consumption={}))
+        unit_total.consumption[meter_type] = unit_total.consumption.get(meter_type, 0.0) + total
+
+    return BuildingConsumptionRead(
+        building_id=building_id,
+        date_from=date_from,
+        date_to=date_to,
+        source="monthly" if rollup_for_range(start, end) is MeterMonthlyRollup else "daily",
+        totals=sorted(by_type.values(), key=lambda t: t.type),
+        units=sorted(by_unit.values(), key=lambda u: u.unit_number),
+    )
+
+@router.get("/{building_id}/consumption/ranking", response_model=BuildingRankingRead)
+def read_building_consumption_ranking(
+    building_id: uuid.UUID,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Units ranked by consumption per m² for each meter type in [from, to), with percentiles and z-scores.
+    Defaults to the last full month. Cached until the building's readings or units change.
+    """
+    get_consumption_building(session, building_id, current_user)
+    date_from, date_to = resolve_period(date_from, date_to)
+    return building_ranking(session, building_id, date_from, date_to)
+
+@router.get("/{building_id}/alerts", response_model=List[MeterAlertRead], response_class=ORJSONResponse)
+def read_building_alerts(
+    building_id: uuid.UUID,
+    kind: Optional[str] = None,
+    since: Optional[datetime] = None,
+    offset: int = 0,
+    limit: int = Query(default=100, le=1000),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Anomalies detected on the building's meters (continuous_flow, spike, negative_delta, stuck), newest first."""
+    building = session.get(Building, building_id)
+    if not building:
+        raise HTTPException(status_code=404, detail="Building not found")
+
+    statement = (
+        select(MeterAlert.__table__, Meter.serial_number, Meter.type.label("meter_type"), Meter.unit_id, Unit.unit_number)
+        .join(Meter, Meter.id == MeterAlert.meter_id)
+        .join(Unit, Unit.id == Meter.unit_id)
+        .where(Unit.building_id == building_id)
+    )
+    if current_user.role == "home_lord":
+        if building.manager_id != current_user.id:
+            raise HTTPException(status_code=403, detail="Not authorized")
+    elif current_user.role == "owner":
+        # Owners only see their own units
+        statement = statement.where(Unit.owner_id == current_user.id)
+
+    if kind:
+        statement = statement.where(MeterAlert.kind == kind)
+    if since:
+        statement = statement.where(MeterAlert.time >= since)
+    statement = statement.order_by(MeterAlert.time.desc(), MeterAlert.id.desc()).offset(offset).limit(limit)
+    return trusted_response(session.exec(statement))
+
+@router.get("/{building_id}/data_quality", response_model=BuildingGapReport)
+def read_building_data_quality(
+    building_id: uuid.UUID,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    sort: Literal["severity", "missing_days", "reporting_rate", "last_seen", "unit"] = "severity",
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Gap report of the building's meters: reporting days, missing days, longest gap and last reading.
+    Defaults to the last 30 full days; meters that stopped reporting come first.
+    """
+    get_consumption_building(session, building_id, current_user)
+    default_from, default_to = last_days()
+    date_from = date_from or default_from
+    date_to = date_to or default_to
+    if date_to <= date_from:
+        raise HTTPException(status_code=400, detail="'to' must be after 'from'")
+
+    report = building_gap_report(session, building_id, date_from, date_to)
+    if sort != "severity":
+        report = report.model_copy(update={"meters": sorted(report.meters, key=SORT_KEYS[sort])})
+    return report
+
+@router.get("/{building_id}/export")
+def export_building_readings(
+    building_id: uuid.UUID,
+    format: Literal["csv", "parquet"] = "csv",
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Full reading history of the building as CSV or Parquet, [from, to) when given.
+    Streamed from a database cursor in batches, so memory use doesn't grow with the export size.
+    """
+    building = get_consumption_building(session, building_id, current_user)
+    if format == "parquet" and export.pa is None:
+        raise HTTPException(status_code=501, detail="Parquet export is not available (pyarrow not installed)")
+
+    start = datetime.combine(date_from, datetime.min.time()) if date_from else None
+    end = datetime.combine(date_to, datetime.min.time()) if date_to else None
+    statement = export.export_statement(building_id, start, end)
+
+    filename = f"readings-{building.id}{'-' + str(date_from) if date_from else ''}{'-' + str(date_to) if date_to else ''}.{format}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if format == "parquet":
+        return StreamingResponse(export.iter_parquet(session.get_bind(), statement), media_type="application/vnd.apache.parquet", headers=headers)
+    return StreamingResponse(export.iter_csv(session.get_bind(), statement), media_type="text/csv; charset=utf-8", headers=headers)
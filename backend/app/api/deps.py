@@ -1,42 +1,48 @@
 import uuid
-from typing import Annotated
-from fastapi import Depends, HTTPException, status
+from typing import Annotated, Optional
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
 from sqlmodel import Session
 from ..core.database import get_session
-from ..core.security import SECRET_KEY, ALGORITHM
+from ..core.security import STREAM_SCOPE, decode_token
 from ..schemas.auth import TokenData
 from ..models.property import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-async def get_current_user_token(token: Annotated[str, Depends(oauth2_scheme)]) -> TokenData:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        role: str = payload.get("role")
-        if user_id is None:
-            raise credentials_exception
-        return TokenData(user_id=user_id, role=role)
-    except JWTError:
-        raise credentials_exception
-
-async def get_current_user(
-    token_data: Annotated[TokenData, Depends(get_current_user_token)],
-    session: Annotated[Session, Depends(get_session)]
-) -> User:
+def load_user(token_data: TokenData, session: Session) -> User:
     try:
         user_uuid = uuid.UUID(token_data.user_id)
     except ValueError:
         raise HTTPException(status_code=401, detail="Invalid user ID in token")
-        
+
     user = session.get(User, user_uuid)
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
     return user
+
+async def get_current_user_token(token: Annotated[str, Depends(oauth2_scheme)]) -> TokenData:
+    return decode_token(token)
+
+async def get_current_user(
+    token_data: Annotated[TokenData, Depends(get_current_user_token)],
+    session: Annotated[Session, Depends(get_session)]
+) -> User:
+    return load_user(token_data, session)
+
+def get_stream_user(
+    request: Request,
+    session: Annotated[Session, Depends(get_session)],
+    access_token: Optional[str] = None,
+) -> User:
+    """
+    Like get_current_user, but also accepts a stream token (POST /stream-token) as ?access_token=
+    since the browser EventSource can't send an Authorization header. Only for streaming endpoints;
+    regular tokens are never accepted in the URL.
+    """
+    authorization = request.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        return load_user(decode_token(authorization[7:]), session)
+    if not access_token:
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    return load_user(decode_token(access_token, scope=STREAM_SCOPE), session)
@@ -0,0 +1,28 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+from ..core.profiling import list_reports, load_collapsed, load_report
+from ..models.property import User
+from ..schemas.profiling import ProfileRead
+from .deps import get_current_user
+
+router = APIRouter()
+
+def require_admin(current_user: User = Depends(get_current_user)) -> User:
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return current_user
+
+@router.get("/", response_model=List[ProfileRead])
+def read_profiles(current_user: User = Depends(require_admin)):
+    """Stored request profiles, newest first. Profile a request by sending it with "X-Profile: 1" or ?profile=1."""
+    return list_reports()
+
+@router.get("/{profile_id}", response_model=ProfileRead)
+def read_profile(profile_id: str, current_user: User = Depends(require_admin)):
+    return load_report(profile_id)
+
+@router.get("/{profile_id}/collapsed", response_class=PlainTextResponse)
+def read_profile_stacks(profile_id: str, current_user: User = Depends(require_admin)):
+    """Samples as collapsed stacks ("frame;frame;frame count"), for flamegraph.pl or speedscope."""
+    return PlainTextResponse(load_collapsed(profile_id))
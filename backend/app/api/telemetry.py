@@ -1,10 +1,20 @@
+import io
 import uuid
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
+from typing import List, Literal, Optional, Union
+from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile
+from sqlalchemy import Boolean
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select, func, literal
 from ..core.database import get_session
 from ..models.property import User, Building, Unit # Import User model
-from ..models.telemetry import Meter, MeterCreate, MeterRead, MeterReading, MeterReadingCreate, MeterReadingRead
+from ..models.telemetry import Meter, MeterCreate, MeterRead, MeterReading, MeterReadingCreate, MeterReadingRead, CompactSeries
+from ..core.series import ReadingSeries
+from ..core.responses import ORJSONResponse, trusted_response
+from ..core.conditional import make_etag, is_not_modified, not_modified, validator_headers
+from ..services.ingestion import ingest_readings, touch_building
+from ..services.rollups import ROLLUP_BY_RESOLUTION
+from ..services.imports import ImportFormatError, import_readings
+from ..schemas.imports import ReadingImportReport
 from .deps import get_current_user
 
 router = APIRouter()
@@ -26,11 +36,12 @@ def create_meter(
 
     db_meter = Meter.model_validate(meter)
     session.add(db_meter)
+    touch_building(session, unit.building_id)
     session.commit()
     session.refresh(db_meter)
     return db_meter
 
-@router.get("/meters/", response_model=List[MeterRead])
+@router.get("/meters/", response_model=List[MeterRead], response_class=ORJSONResponse)
 def read_meters(
     offset: int = 0, 
     limit: int = 100, 
@@ -38,7 +49,7 @@ def read_meters(
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    statement = select(Meter)
+    statement = select(Meter.__table__)
     if unit_id:
         statement = statement.where(Meter.unit_id == unit_id)
 
@@ -50,7 +61,8 @@ def read_meters(
         # If unit_id is provided, check if owner owns it?
         statement = statement.join(Unit).where(Unit.owner_id == current_user.id)
         
-    return session.exec(statement.offset(offset).limit(limit)).all()
+    # Rows map 1:1 to MeterRead, no need to build and re-validate ORM objects
+    return trusted_response(session.execute(statement.offset(offset).limit(limit)))
 
 @router.get("/meters/{meter_id}", response_model=MeterRead)
 def read_meter(
@@ -94,13 +106,50 @@ def create_reading(
         
     db_reading = MeterReading.model_validate(reading)
     session.add(db_reading)
-    session.commit()
+    try:
+        # Flush first, the rollup lookups in ingest_readings would otherwise autoflush outside the except
+        session.flush()
+        ingest_readings(session, meter.id, [(db_reading.time, db_reading.value)], source="manual" if db_reading.is_manual else "push")
+        session.commit()
+    except IntegrityError:
+        # (meter_id, time) is unique
+        session.rollback()
+        raise HTTPException(status_code=409, detail="Reading for this meter and time already exists")
     session.refresh(db_reading)
     return db_reading
 
-@router.get("/meters/{meter_id}/readings", response_model=List[MeterReadingRead])
+@router.post("/readings/import", response_model=ReadingImportReport)
+def import_readings_csv(
+    file: UploadFile = File(...),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Bulk import of manual readings from a CSV file (serial_number, time, value).
+    Valid rows are stored in one go, the report lists the rejected ones with their line numbers.
+    """
+    if current_user.role not in ["admin", "home_lord"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    allowed = None
+    if current_user.role == "home_lord":
+        allowed = set(session.exec(select(Building.id).where(Building.manager_id == current_user.id)).all())
+
+    try:
+        report = import_readings(session, io.TextIOWrapper(file.file, encoding="utf-8-sig", newline=""), allowed)
+    except ImportFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="File is not UTF-8 encoded")
+    session.commit()
+    return report
+
+@router.get("/meters/{meter_id}/readings", response_model=Union[List[MeterReadingRead], CompactSeries], response_class=ORJSONResponse)
 def read_meter_readings(
     meter_id: uuid.UUID, 
+    request: Request,
+    format: Literal["points", "compact"] = "points",
+    resolution: Literal["raw", "day", "month"] = "raw",
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
@@ -118,6 +167,43 @@ def read_meter_readings(
     elif current_user.role == "owner" and unit.owner_id != current_user.id:
             raise HTTPException(status_code=403, detail="Not authorized")
     
+    # Conditional GET: row count, newest row id and newest reading time change whenever readings do
+    count, last_id, last_time = session.exec(
+        select(func.count(MeterReading.id), func.max(MeterReading.id), func.max(MeterReading.time))
+        .where(MeterReading.meter_id == meter_id)
+    ).one()
+    etag = make_etag(str(meter_id), count, last_id, last_time, format, resolution)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    headers = validator_headers(etag)
+
+    if resolution != "raw":
+        # Served from the rollup table: one row per day / month instead of every reading.
+        # Same shape as raw readings; value is the bucket maximum, like Influx MAX() GROUP BY time().
+        rollup = ROLLUP_BY_RESOLUTION[resolution]
+        if format == "compact":
+            rows = session.exec(select(rollup.bucket, rollup.max_value).where(rollup.meter_id == meter_id).order_by(rollup.bucket.desc()))
+            series = ReadingSeries.from_rows(rows)
+            return ORJSONResponse({"t": series.times, "v": series.values}, headers=headers)
+        rows = session.execute(
+            select(
+                rollup.max_value.label("value"),
+                literal(False, Boolean).label("is_manual"),
+                rollup.bucket.label("time"),
+                rollup.meter_id,
+                rollup.id,
+            )
+            .where(rollup.meter_id == meter_id)
+            .order_by(rollup.bucket.desc())
+        )
+        return trusted_response(rows, headers=headers)
+
+    if format == "compact":
+        # Only the two needed columns, no ORM objects per row
+        rows = session.exec(select(MeterReading.time, MeterReading.value).where(MeterReading.meter_id == meter_id).order_by(MeterReading.time.desc()))
+        series = ReadingSeries.from_rows(rows)
+        return ORJSONResponse({"t": series.times, "v": series.values}, headers=headers)
+
     # Return readings sorted by time desc
-    readings = session.exec(select(MeterReading).where(MeterReading.meter_id == meter_id).order_by(MeterReading.time.desc())).all()
-    return readings
+    readings = session.execute(select(MeterReading.__table__).where(MeterReading.meter_id == meter_id).order_by(MeterReading.time.desc()))
+    return trusted_response(readings, headers=headers)
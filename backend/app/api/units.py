@@ -1,9 +1,9 @@
 import uuid
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlmodel import Session, select, func
 from ..core.database import get_session
-from .deps import get_current_user
+from .deps import get_current_user, get_stream_user
 from ..models.property import Unit, UnitCreate, UnitRead, User, Building
 
 router = APIRouter()
@@ -25,6 +25,7 @@ def create_unit(
              
     db_unit = Unit.model_validate(unit)
     session.add(db_unit)
+    touch_building(session, db_unit.building_id)
     session.commit()
     session.refresh(db_unit)
     return db_unit
@@ -90,9 +91,27 @@ def assign_owner(
     return unit
 
 # Import needed models for sync
-from ..models.telemetry import Meter, MeterReading
-from ..core.influx_utils import get_meter_readings, parse_measurements_config
+from ..models.telemetry import Meter, MeterReading, MeterDailyRollup, MeterLatest, MeterLatestRead
+from ..schemas.dashboard import UnitDashboard
+from ..core.influx_utils import DEFAULT_MEASUREMENTS, get_meter_columns, get_meters_columns, iter_meter_readings, parse_measurements_config
+from ..core.series import ReadingSeries
+from ..core.responses import ORJSONResponse, trusted_response
+from ..core.sse import sse_response
+from ..core.conditional import make_etag, is_not_modified, not_modified, validator_headers
+from ..core.metrics import SYNC_DURATION, SYNC_READINGS
+from ..core.tracing import span
+from ..services.ingestion import ingest_readings, touch_building
+from ..services.rollups import to_naive_utc
+from ..core.database import upsert_insert
+from ..services.latest import latest_statement
 from datetime import datetime
+import os
+import time
+
+# Readings inserted per statement while syncing; a meter is committed once all of its batches are in
+SYNC_BATCH_SIZE = 5000
+# Seconds a readings_influx ETag stays valid without a sync, bounds how stale a 304 can be
+READINGS_INFLUX_MAX_AGE = int(os.getenv("READINGS_INFLUX_MAX_AGE", "300"))
 
 @router.post("/{unit_id}/sync_readings")
 def sync_unit_readings(
@@ -127,68 +146,76 @@ def sync_unit_readings(
     if building.influx_measurements:
         measurements_config = parse_measurements_config(building.influx_measurements)
     else:
-        # Default fallback
-        measurements_config = {
-            'sv_l': {'type': 'water_cold', 'uom': 'm3'},
-            'tv_l': {'type': 'water_hot', 'uom': 'm3'},
-            'teplo_kWh': {'type': 'heat', 'uom': 'kWh'},
-        }
+        measurements_config = DEFAULT_MEASUREMENTS
 
     # Get meters for unit
     meters = session.exec(select(Meter).where(Meter.unit_id == unit_id)).all()
     
+    started = time.perf_counter()
     total_synced = 0
+    insert_new_readings = (
+        upsert_insert(session, MeterReading)
+        .on_conflict_do_nothing(index_elements=["meter_id", "time"])
+        .returning(MeterReading.time, MeterReading.value)
+    )
     
     for meter in meters:
-        # We need to look up readings for this meter.
-        # We don't know exactly which measurement it came from unless we stored it?
-        # But we can try all measurements that match its type OR just all measurements?
-        # Simpler: Iterate all configured measurements. If a reading exists for this meter's SN in that measurement, take it.
-        # This is robust because SN should be unique globally or at least within the building/db context.
-        
-        found_readings = False
+        with span("sync_meter", **{"meter.serial_number": meter.serial_number}):
+            # We need to look up readings for this meter.
+            # We don't know exactly which measurement it came from unless we stored it?
+            # But we can try all measurements that match its type OR just all measurements?
+            # Simpler: Iterate all configured measurements. If a reading exists for this meter's SN in that measurement, take it.
+            # This is robust because SN should be unique globally or at least within the building/db context.
         
-        for meas_name, meta in measurements_config.items():
-            # Optimization: Only check measurements that match the meter type?
-            # if meta['type'] != meter.type: continue 
+            found_readings = False
+            batch = []
+
+            def insert_batch():
+                # Readings already stored are skipped by the unique (meter_id, time) index, one statement per batch
+                nonlocal total_synced
+                inserted = session.execute(insert_new_readings, batch).all()
+                ingest_readings(session, meter.id, inserted, source="sync")
+                total_synced += len(inserted)
+                batch.clear()
+
+            for meas_name, meta in measurements_config.items():
+                # Optimization: Only check measurements that match the meter type?
+                # if meta['type'] != meter.type: continue 
             
-            readings = get_meter_readings(building.influx_db_name, meter.serial_number, meas_name, building.influx_device_tag)
+                # Stream readings so long histories are never materialized in memory
+                readings = iter_meter_readings(building.influx_db_name, meter.serial_number, meas_name, building.influx_device_tag)
             
-            if readings:
-                found_readings = True
                 for (time_str, value) in readings:
+                    found_readings = True
                     try:
-                        dt = datetime.fromisoformat(time_str.replace('Z', '+00:00'))
+                        dt = to_naive_utc(datetime.fromisoformat(time_str.replace('Z', '+00:00')))
                     except ValueError:
                         continue
 
-                    # Check if reading exists
-                    existing = session.exec(select(MeterReading).where(
-                        MeterReading.meter_id == meter.id, 
-                        MeterReading.time == dt
-                    )).first()
-                    
-                    if not existing:
-                        new_reading = MeterReading(
-                            meter_id=meter.id,
-                            value=value,
-                            time=dt,
-                            is_manual=False
-                        )
-                        session.add(new_reading)
-                        total_synced += 1
-                
-                # If we found readings in one measurement, should we stop? 
-                # Probably yes, a meter typically reports to one measurement.
-                # break 
+                    batch.append({"meter_id": meter.id, "time": dt, "value": value, "is_manual": False})
+                    if len(batch) >= SYNC_BATCH_SIZE:
+                        insert_batch()
+            
+                    # If we found readings in one measurement, should we stop? 
+                    # Probably yes, a meter typically reports to one measurement.
+                    # break 
         
-        if found_readings:
-            session.commit() # Commit per meter
+            if found_readings:
+                if batch:
+                    insert_batch()
+                # Only at meter boundaries, a failed sync never leaves a meter with part of its history
+                session.commit()
 
+    SYNC_READINGS.inc(building.influx_db_name, amount=total_synced)
+    SYNC_DURATION.observe(time.perf_counter() - started, building.influx_db_name)
     return {"message": "Readings synced", "readings_synced": total_synced}
 
 import secrets
-from datetime import timedelta
+from datetime import date, timedelta
+from ..schemas.consumption import UnitConsumptionRead, MeterConsumptionRead, PeriodConsumption
+from sqlalchemy import or_
+from sqlalchemy.orm import aliased
+from ..services.consumption import MeterConsumption, consumption_by_meter, period_start, period_starts, since
 
 @router.post("/{unit_id}/assign_by_email", response_model=UnitRead)
 def assign_owner_by_email(
@@ -241,12 +268,141 @@ def assign_owner_by_email(
     
     return unit
 
-@router.get("/{unit_id}/readings_influx")
+@router.get("/{unit_id}/latest", response_model=List[MeterLatestRead], response_class=ORJSONResponse)
+def read_unit_latest(
+    unit_id: uuid.UUID,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Current value of every meter of the unit, from meter_latest (no history scan)."""
+    unit = session.get(Unit, unit_id)
+    if not unit:
+        raise HTTPException(status_code=404, detail="Unit not found")
+
+    if current_user.role == "home_lord":
+        building = session.get(Building, unit.building_id)
+        if not building or building.manager_id != current_user.id:
+            raise HTTPException(status_code=403, detail="Not authorized")
+    elif current_user.role == "owner" and unit.owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    return trusted_response(session.exec(latest_statement(Meter.unit_id == unit_id)))
+
+@router.get("/{unit_id}/dashboard", response_model=UnitDashboard, response_class=ORJSONResponse)
+def read_unit_dashboard(
+    unit_id: uuid.UUID,
+    interval: Literal["1h", "1d", "7d"] = "1d",
+    since: Optional[date] = None,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Everything the unit page needs: unit, building, owner, meters with their latest values and
+    downsampled series (max per interval). One SQL query plus one Influx query for all meters,
+    instead of GET /units/{id} + GET /telemetry/meters/ + GET /units/{id}/readings_influx.
+    """
+    rows = session.exec(
+        select(Unit, Building, User, Meter, MeterLatest)
+        .join(Building, Building.id == Unit.building_id)
+        .outerjoin(User, User.id == Unit.owner_id)
+        .outerjoin(Meter, Meter.unit_id == Unit.id)
+        .outerjoin(MeterLatest, MeterLatest.meter_id == Meter.id)
+        .where(Unit.id == unit_id)
+        .order_by(Meter.serial_number)
+    ).all()
+    if not rows:
+        raise HTTPException(status_code=404, detail="Unit not found")
+    unit, building, owner, _, _ = rows[0]
+
+    if current_user.role == "home_lord":
+        if building.manager_id != current_user.id:
+             raise HTTPException(status_code=403, detail="Not authorized")
+    elif current_user.role == "owner":
+        if unit.owner_id != current_user.id:
+             raise HTTPException(status_code=403, detail="Not authorized")
+
+    meters = [(meter, latest) for _, _, _, meter, latest in rows if meter is not None]
+
+    columns = {}
+    if building.influx_db_name and meters:
+        measurements = parse_measurements_config(building.influx_measurements) if building.influx_measurements else DEFAULT_MEASUREMENTS
+        columns = get_meters_columns(
+            building.influx_db_name,
+            [meter.serial_number for meter, _ in meters],
+            list(measurements),
+            building.influx_device_tag,
+            interval=interval,
+            since=f"{since.isoformat()}T00:00:00Z" if since else None,
+        )
+
+    empty = ReadingSeries.empty()
+    result_meters = []
+    for meter, latest in meters:
+        series = ReadingSeries.from_columns(*columns[meter.serial_number]) if meter.serial_number in columns else empty
+        result_meters.append({
+            "id": meter.id,
+            "serial_number": meter.serial_number,
+            "type": meter.type,
+            "unit_of_measure": meter.unit_of_measure,
+            "latest": {"time": latest.time, "value": latest.value, "source": latest.source} if latest else None,
+            # orjson writes the numpy columns directly
+            "series": {"t": series.times, "v": series.values},
+        })
+
+    return ORJSONResponse({
+        "unit": {
+            "id": unit.id, "unit_number": unit.unit_number, "floor": unit.floor, "area_m2": unit.area_m2,
+            "building_id": unit.building_id, "owner_id": unit.owner_id,
+        },
+        "building": {"id": building.id, "name": building.name, "address": building.address},
+        "owner": {"id": owner.id, "email": owner.email, "full_name": owner.full_name} if owner else None,
+        "interval": interval,
+        "meters": result_meters,
+    })
+
+@router.get("/{unit_id}/stream")
+def stream_unit(
+    unit_id: uuid.UUID,
+    request: Request,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_stream_user)
+):
+    """
+    Server-Sent Events with the unit's new readings ("reading": newest value per meter and commit)
+    and anomalies ("alert") as they are ingested by sync, push or import.
+    """
+    unit = session.get(Unit, unit_id)
+    if not unit:
+        raise HTTPException(status_code=404, detail="Unit not found")
+
+    if current_user.role == "home_lord":
+        building = session.get(Building, unit.building_id)
+        if not building or building.manager_id != current_user.id:
+            raise HTTPException(status_code=403, detail="Not authorized")
+    elif current_user.role == "owner" and unit.owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    # The stream may stay open for hours, don't hold a DB connection meanwhile
+    session.close()
+    return sse_response(request, [("unit", unit_id)])
+
+@router.get("/{unit_id}/readings_influx", response_class=ORJSONResponse)
 def read_unit_readings_influx(
     unit_id: uuid.UUID,
+    request: Request,
+    format: Literal["points", "compact"] = "points",
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
+    """
+    Daily readings of all unit meters, keyed by meter id.
+    format=compact returns {"t": [epoch seconds], "v": [values]} per meter instead of a list of points.
+
+    Supports conditional GET. The ETag is built from SQLite only (meters, synced readings,
+    building Influx config) plus a READINGS_INFLUX_MAX_AGE window, so a 304 never touches Influx;
+    new data shows up after a sync or when the window rolls over. It does not cover the Influx
+    series themselves, so it is weak and the response is fresh only until the window ends.
+    """
     unit = session.get(Unit, unit_id)
     if not unit:
         raise HTTPException(status_code=404, detail="Unit not found")
@@ -269,37 +425,120 @@ def read_unit_readings_influx(
     if building.influx_measurements:
         measurements_config = parse_measurements_config(building.influx_measurements)
     else:
-        # Default fallback
-        measurements_config = {
-            'sv_l': {'type': 'water_cold', 'uom': 'm3'},
-            'tv_l': {'type': 'water_hot', 'uom': 'm3'},
-            'teplo_kWh': {'type': 'heat', 'uom': 'kWh'},
-        }
+        measurements_config = DEFAULT_MEASUREMENTS
 
     # Get meters for unit
     meters = session.exec(select(Meter).where(Meter.unit_id == unit_id)).all()
+
+    # Per-meter row count, newest row and newest reading time of the synced copy
+    stats = session.exec(
+        select(MeterReading.meter_id, func.count(MeterReading.id), func.max(MeterReading.id), func.max(MeterReading.time))
+        .join(Meter)
+        .where(Meter.unit_id == unit_id)
+        .group_by(MeterReading.meter_id)
+        .order_by(MeterReading.meter_id)
+    ).all()
+    now = int(time.time())
+    window_start = now // READINGS_INFLUX_MAX_AGE * READINGS_INFLUX_MAX_AGE
+    max_age = window_start + READINGS_INFLUX_MAX_AGE - now
+    etag = make_etag(
+        sorted((str(m.id), m.serial_number) for m in meters),
+        [(str(meter_id), count, last_id, last_time) for meter_id, count, last_id, last_time in stats],
+        building.influx_db_name, building.influx_device_tag, building.influx_measurements,
+        window_start, format,
+        weak=True,
+    )
+    if is_not_modified(request, etag):
+        return not_modified(etag, max_age)
     
     results = {}
     
     for meter in meters:
-        readings = []
+        series = ReadingSeries.empty()
         # Find readings in any configured measurement
         for meas_name, meta in measurements_config.items():
             # Optimization: could check meta['type'] == meter.type
             
-            influx_data = get_meter_readings(building.influx_db_name, meter.serial_number, meas_name, building.influx_device_tag)
+            times, values = get_meter_columns(building.influx_db_name, meter.serial_number, meas_name, building.influx_device_tag)
             
-            if influx_data:
-                # influx_data is list of (time, value)
-                for idx, (time_str, value) in enumerate(influx_data):
-                    readings.append({
-                        "id": idx, # Mock ID
-                        "value": value,
-                        "time": time_str,
-                        "is_manual": False
-                    })
+            if times:
+                series = ReadingSeries.from_columns(times, values)
                 break # Assume meter is only in one measurement type
         
-        results[str(meter.id)] = readings
+        # orjson writes the numpy columns directly
+        results[str(meter.id)] = {"t": series.times, "v": series.values} if format == "compact" else series.to_points()
         
-    return results
+    return ORJSONResponse(results, headers=validator_headers(etag, max_age))
+
+
+@router.get("/{unit_id}/consumption", response_model=UnitConsumptionRead)
+def read_unit_consumption(
+    unit_id: uuid.UUID,
+    period: Literal["day", "month", "year"] = "month",
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Consumption per meter and period, computed from the daily rollups (end of day counter values).
+    Handles counter resets / meter replacements and ignores negative steps, see services/consumption.py.
+    """
+    unit = session.get(Unit, unit_id)
+    if not unit:
+        raise HTTPException(status_code=404, detail="Unit not found")
+
+    building = session.get(Building, unit.building_id)
+    if not building:
+        raise HTTPException(status_code=404, detail="Building not found")
+
+    if current_user.role == "home_lord":
+        if building.manager_id != current_user.id:
+             raise HTTPException(status_code=403, detail="Not authorized")
+    elif current_user.role == "owner":
+        if unit.owner_id != current_user.id:
+             raise HTTPException(status_code=403, detail="Not authorized")
+
+    meters = session.exec(select(Meter).where(Meter.unit_id == unit_id).order_by(Meter.serial_number)).all()
+
+    # All meters of the unit in one query
+    statement = (
+        select(MeterDailyRollup.meter_id, MeterDailyRollup.bucket, MeterDailyRollup.last_value)
+        .join(Meter)
+        .where(Meter.unit_id == unit_id)
+        .order_by(MeterDailyRollup.meter_id, MeterDailyRollup.bucket)
+    )
+    if date_from:
+        # From the period containing date_from, plus each meter's last earlier bucket as the baseline of the first step
+        start = period_start(date_from, period)
+        previous = aliased(MeterDailyRollup)
+        baseline = (
+            select(func.max(previous.bucket))
+            .where(previous.meter_id == MeterDailyRollup.meter_id, previous.bucket < start)
+            .scalar_subquery()
+        )
+        statement = statement.where(or_(MeterDailyRollup.bucket >= start, MeterDailyRollup.bucket == baseline))
+    if date_to:
+        statement = statement.where(MeterDailyRollup.bucket < datetime.combine(date_to, datetime.min.time()) + timedelta(days=1))
+    by_meter = consumption_by_meter(session.exec(statement), period)
+
+    results = []
+    for meter in meters:
+        consumption = by_meter.get(meter.id) or MeterConsumption.empty(period)
+        if date_from:
+            consumption = since(consumption, date_from)
+        results.append(MeterConsumptionRead(
+            meter_id=meter.id,
+            serial_number=meter.serial_number,
+            type=meter.type,
+            unit_of_measure=meter.unit_of_measure,
+            total=consumption.total,
+            resets=consumption.resets,
+            negative_steps=consumption.negative_steps,
+            periods=[
+                PeriodConsumption(start=start, consumption=value)
+                for start, value in zip(period_starts(consumption), consumption.consumption.tolist())
+            ],
+        ))
+
+    return UnitConsumptionRead(unit_id=unit_id, period=period, meters=results)
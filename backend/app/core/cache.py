@@ -0,0 +1,58 @@
+import threading
+import uuid
+from typing import Any, Dict, Hashable, Iterable, Optional
+
+
+class BuildingCache:
+    """
+    In-process cache of results derived from a building's readings (analytics, reports).
+    Entries live until readings of the building change; see ingestion for the invalidation hook.
+
+    Every invalidation bumps the building's generation. Read it with generation() before loading the data
+    and pass it to set(): a result computed while a write committed is then dropped instead of cached.
+    """
+
+    def __init__(self, max_buildings: int = 1024):
+        self.max_buildings = max_buildings
+        self._entries: Dict[uuid.UUID, Dict[Hashable, Any]] = {}
+        self._generations: Dict[uuid.UUID, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, building_id: uuid.UUID, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            value = self._entries.get(building_id, {}).get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def generation(self, building_id: uuid.UUID) -> int:
+        with self._lock:
+            return self._generations.get(building_id, 0)
+
+    def set(self, building_id: uuid.UUID, key: Hashable, value: Any, generation: int) -> bool:
+        """Stores value unless the building was invalidated since generation was read; returns whether it was stored."""
+        with self._lock:
+            if self._generations.get(building_id, 0) != generation:
+                return False
+            if building_id not in self._entries and len(self._entries) >= self.max_buildings:
+                # Drop the oldest building (dicts keep insertion order)
+                self._entries.pop(next(iter(self._entries)))
+            self._entries.setdefault(building_id, {})[key] = value
+            return True
+
+    def invalidate(self, building_ids: Iterable[uuid.UUID]) -> None:
+        with self._lock:
+            for building_id in building_ids:
+                self._entries.pop(building_id, None)
+                self._generations[building_id] = self._generations.get(building_id, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+building_cache = BuildingCache()
@@ -0,0 +1,138 @@
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+# Already compressed or streamed to the browser event by event
+EXCLUDED_CONTENT_TYPES = ("text/event-stream", "application/gzip", "application/zip", "application/vnd.apache.parquet", "image/")
+
+
+def parse_accept_encoding(header: str) -> dict:
+    """Parses "br;q=1.0, gzip;q=0.8, *;q=0" into {'br': 1.0, 'gzip': 0.8, '*': 0.0}."""
+    encodings = {}
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        encodings[name] = q
+    return encodings
+
+
+def choose_encoding(header: str) -> Optional[str]:
+    """Picks the best encoding the client accepts: brotli (if installed), then gzip."""
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get('*', 0.0)
+    candidates = (['br'] if brotli is not None else []) + ['gzip']
+    best, best_q = None, 0.0
+    for encoding in candidates:
+        q = accepted.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class _Compressor:
+    def __init__(self, encoding: str, level: int):
+        if encoding == 'br':
+            self._obj = brotli.Compressor(quality=level)
+            self._flush = self._obj.flush
+            self._finish = self._obj.finish
+            self._compress = self._obj.process
+        else:
+            self._obj = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self._flush = lambda: self._obj.flush(zlib.Z_SYNC_FLUSH)
+            self._finish = self._obj.flush
+            self._compress = self._obj.compress
+
+    def compress(self, body: bytes, more_body: bool) -> bytes:
+        data = self._compress(body)
+        return data + (self._flush() if more_body else self._finish())
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses with brotli or gzip, negotiated via Accept-Encoding.
+    Small bodies, excluded content types and already encoded responses pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = {'gzip': gzip_level, 'br': brotli_quality}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, compressor, passthrough
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                passthrough = (
+                    "content-encoding" in headers
+                    or message["status"] in (204, 206, 304)
+                    or content_type.startswith(EXCLUDED_CONTENT_TYPES)
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    start_message = message # Sent once we know the body size
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if start_message is not None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                headers.add_vary_header("Accept-Encoding")
+                if len(body) < self.minimum_size and not more_body:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                compressor = _Compressor(encoding, self.levels[encoding])
+                headers["Content-Encoding"] = encoding
+                if "content-length" in headers:
+                    del headers["Content-Length"]
+                body = compressor.compress(body, more_body)
+                if not more_body:
+                    headers["Content-Length"] = str(len(body))
+                await send(start_message)
+                start_message = None
+                await send({"type": "http.response.body", "body": body, "more_body": more_body})
+                return
+
+            await send({"type": "http.response.body", "body": compressor.compress(body, more_body), "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,53 @@
+import hashlib
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts, weak: bool = False) -> str:
+    """
+    ETag from cheap validators (ids, row counts, last timestamps...).
+    weak when the parts only approximate the content, e.g. data held outside the database.
+    """
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'W/"{digest}"' if weak else f'"{digest}"'
+
+
+def content_etag(body: bytes) -> str:
+    """Strong ETag from an already rendered response body."""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """
+    Evaluates If-None-Match; ETags are compared weakly, as RFC 9110 requires.
+    No Last-Modified / If-Modified-Since: the newest reading time says nothing about when rows were written
+    (imports and backfills add older readings), and the DB keeps no write timestamp to use instead.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def validator_headers(etag: str, max_age: Optional[int] = None) -> Dict[str, str]:
+    # no-cache: clients may store the response but must revalidate it on every use;
+    # with max_age they may use it without asking for that many seconds
+    return {"ETag": etag, "Cache-Control": f"private, max-age={max_age}" if max_age is not None else "private, no-cache"}
+
+
+def not_modified(etag: str, max_age: Optional[int] = None) -> Response:
+    return Response(status_code=304, headers=validator_headers(etag, max_age))
+
+
+def conditional_response(request: Request, response: Response) -> Response:
+    """
+    Adds a content based ETag to a rendered response and answers 304 when the client already has it.
+    For endpoints without a modification timestamp to derive validators from.
+    """
+    etag = content_etag(response.body)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    response.headers.update(validator_headers(etag))
+    return response
@@ -1,6 +1,11 @@
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlmodel import SQLModel, create_engine, Session
 from pathlib import Path
 
+from .metrics import instrument_engine
+from .tracing import trace_engine
+
 # Construct absolute path to backend/database.db
 # This file is in backend/app/core/database.py
 # Parent is backend/app/core
@@ -10,7 +15,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent.parent
 sqlite_file_name = BASE_DIR / "database.db"
 sqlite_url = f"sqlite:///{sqlite_file_name}"
 
-engine = create_engine(sqlite_url, echo=True)
+engine = trace_engine(instrument_engine(create_engine(sqlite_url, echo=True)))
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
@@ -18,3 +23,8 @@ def create_db_and_tables():
 def get_session():
     with Session(engine) as session:
         yield session
+
+def upsert_insert(session: Session, model):
+    """INSERT supporting ON CONFLICT (on_conflict_do_nothing / on_conflict_do_update) for the session's database."""
+    insert = pg_insert if session.get_bind().dialect.name == "postgresql" else sqlite_insert
+    return insert(model)
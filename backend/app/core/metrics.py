@@ -0,0 +1,341 @@
+import bisect
+import contextvars
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Seconds; covers a cached JSON response up to a full building sync
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Statements per request; anything in the upper buckets is an N+1 candidate
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+# Label used for requests no route matched, so scanners can't blow up the label set
+UNMATCHED_ROUTE = "<unmatched>"
+
+# Responses open for as long as the client listens (SSE); their duration is not a latency
+STREAMING_MEDIA_TYPES = (b"text/event-stream",)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        with self._lock:
+            return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return self.header() + [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(v)}" for labels, v in values]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per bucket counts (last one is +Inf), sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, *labels: str) -> int:
+        with self._lock:
+            series = self._values.get(labels)
+            return sum(series[0]) if series else 0
+
+    def sum(self, *labels: str) -> float:
+        with self._lock:
+            series = self._values.get(labels)
+            return series[1] if series else 0.0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = [(labels, list(counts), total) for labels, (counts, total) in self._values.items()]
+        lines = self.header()
+        for labels, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return lines
+
+
+class Callback(_Metric):
+    """Value(s) read at scrape time, for state another component already counts (cache hits, subscribers)."""
+
+    def __init__(self, name: str, documentation: str, kind: str, read: Callable[[], float]):
+        super().__init__(name, documentation)
+        self.kind = kind
+        self.read = read
+
+    def render(self) -> List[str]:
+        return self.header() + [f"{self.name} {_format_value(self.read())}"]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name: str, documentation: str, kind: str, read: Callable[[], float]) -> Callback:
+        return self.register(Callback(name, documentation, kind, read))
+
+    def render(self) -> str:
+        """Prometheus text exposition format 0.0.4."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.counter("http_requests_total", "HTTP requests by route template and status.", ("method", "route", "status"))
+HTTP_DURATION = registry.histogram("http_request_duration_seconds", "Time until the response body was sent, by route template (live streams excluded).", ("method", "route"))
+HTTP_SQL_QUERIES = registry.histogram("http_request_sql_queries", "SQL statements executed per request.", ("method", "route"), QUERY_COUNT_BUCKETS)
+HTTP_SQL_DURATION = registry.histogram("http_request_sql_duration_seconds", "Time spent in SQL per request.", ("method", "route"))
+
+SQL_QUERIES = registry.counter("sql_queries_total", "SQL statements by operation.", ("operation",))
+SQL_DURATION = registry.histogram("sql_query_duration_seconds", "SQL statement duration by operation.", ("operation",))
+SQL_ERRORS = registry.counter("sql_errors_total", "SQL statements that raised.", ("operation",))
+
+INFLUX_QUERIES = registry.counter("influx_queries_total", "InfluxDB queries by database (one per building).", ("db",))
+INFLUX_DURATION = registry.histogram("influx_query_duration_seconds", "InfluxDB query time until the response was fully read.", ("db",))
+INFLUX_BYTES = registry.counter("influx_response_bytes_total", "InfluxDB response bytes read.", ("db",))
+INFLUX_ERRORS = registry.counter("influx_errors_total", "InfluxDB queries that failed (HTTP, transport or query error).", ("db",))
+
+SYNC_READINGS = registry.counter("sync_readings_total", "New readings stored by unit syncs from InfluxDB.", ("db",))
+SYNC_DURATION = registry.histogram("sync_duration_seconds", "Duration of one unit sync.", ("db",))
+
+
+# Distinct statements remembered per request; the rest are folded into one entry
+MAX_REQUEST_STATEMENTS = 500
+OTHER_STATEMENTS = "<other statements>"
+
+
+class RequestStats:
+    """
+    Per request counters, reached through a context variable (copied into the thread pool sync endpoints run in).
+    Statements are aggregated by text: an N+1 loop is one entry with a high count, not thousands of entries.
+    """
+    __slots__ = ("sql_queries", "sql_seconds", "influx_queries", "influx_seconds", "statements")
+
+    def __init__(self):
+        self.sql_queries = 0
+        self.sql_seconds = 0.0
+        self.influx_queries = 0
+        self.influx_seconds = 0.0
+        self.statements: Dict[Tuple[str, str], list] = {} # (kind, statement) -> [count, seconds, slowest]
+
+    def record(self, kind: str, statement: str, seconds: float) -> None:
+        key = (kind, statement)
+        entry = self.statements.get(key)
+        if entry is None:
+            if len(self.statements) >= MAX_REQUEST_STATEMENTS:
+                key = (kind, OTHER_STATEMENTS)
+                entry = self.statements.get(key)
+            if entry is None:
+                entry = self.statements[key] = [0, 0.0, 0.0]
+        entry[0] += 1
+        entry[1] += seconds
+        if seconds > entry[2]:
+            entry[2] = seconds
+
+
+# Called with (method, route, status, seconds, stats) after every HTTP request, see query_log
+request_hooks: List[Callable[[str, str, int, float, RequestStats], None]] = []
+
+
+_request_stats: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+
+# --- SQL ---
+
+def _operation(statement: str) -> str:
+    head = statement.lstrip()[:6].upper()
+    return head if head in ("SELECT", "INSERT", "UPDATE", "DELETE") else "OTHER"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    operation = _operation(statement)
+    SQL_QUERIES.inc(operation)
+    SQL_DURATION.observe(elapsed, operation)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.sql_queries += 1
+        stats.sql_seconds += elapsed
+        stats.record("sql", statement, elapsed)
+
+
+def _handle_error(exception_context):
+    started = exception_context.connection.info.get("query_started") if exception_context.connection is not None else None
+    if started:
+        started.pop()
+    SQL_ERRORS.inc(_operation(exception_context.statement or ""))
+
+
+def instrument_engine(engine: Engine) -> Engine:
+    """Counts and times every statement of engine. Adds two perf_counter calls and a dict update per statement."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+    return engine
+
+
+# --- InfluxDB ---
+
+def observe_influx(db_name: str, query: str, seconds: float, size: int, failed: bool) -> None:
+    INFLUX_QUERIES.inc(db_name)
+    INFLUX_DURATION.observe(seconds, db_name)
+    INFLUX_BYTES.inc(db_name, amount=size)
+    if failed:
+        INFLUX_ERRORS.inc(db_name)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.influx_queries += 1
+        stats.influx_seconds += seconds
+        stats.record("influx", f"[{db_name}] {query}", seconds)
+
+
+# --- HTTP ---
+
+def route_template(scope: Scope) -> str:
+    """
+    /units/{unit_id} for a request to /units/3f2a..., rebuilt from the matched path parameters
+    (routes of included routers only know their path relative to the router prefix).
+    """
+    if scope.get("endpoint") is None:
+        return UNMATCHED_ROUTE
+    params = scope.get("path_params")
+    if not params:
+        return scope["path"]
+    names = {str(value): name for name, value in params.items()}
+    return "/".join(f"{{{names[segment]}}}" if segment in names else segment for segment in scope["path"].split("/"))
+
+
+_in_flight = 0 # Only touched on the event loop thread
+
+
+def requests_in_flight() -> int:
+    return _in_flight
+
+
+class MetricsMiddleware:
+    """Records latency, status and SQL usage of every HTTP request, labelled by route template (/units/{unit_id})."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        global _in_flight
+        started = time.perf_counter()
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status = 500
+        streaming = False
+        _in_flight += 1
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                content_type = dict(message.get("headers", ())).get(b"content-type", b"")
+                streaming = content_type.startswith(STREAMING_MEDIA_TYPES)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _in_flight -= 1
+            _request_stats.reset(token)
+            elapsed = time.perf_counter() - started
+            route_path = route_template(scope)
+            method = scope["method"]
+            HTTP_REQUESTS.inc(method, route_path, str(status))
+            if not streaming:
+                HTTP_DURATION.observe(elapsed, method, route_path)
+            HTTP_SQL_QUERIES.observe(stats.sql_queries, method, route_path)
+            HTTP_SQL_DURATION.observe(stats.sql_seconds, method, route_path)
+            for hook in request_hooks:
+                hook(method, route_path, status, elapsed, stats)
+
@@ -0,0 +1,251 @@
+import json
+import os
+import re
+import secrets
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders, QueryParams
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..models.property import User
+from .database import get_session
+from .metrics import requests_in_flight
+from .security import decode_token
+
+# Where reports are kept; only the newest PROFILE_KEEP are retained
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", Path(tempfile.gettempdir()) / "homiq-profiles"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+# Sampling interval; shorter gives finer reports at more overhead on the profiled request
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "2"))
+
+# A sample is attributed to the innermost frame matching one of these path fragments
+CATEGORIES = (
+    ("orm", ("/sqlalchemy/", "/sqlmodel/", "/sqlite3/", "/psycopg")),
+    ("influx_http", ("/requests/", "/urllib3/", "/http/client.py", "/socket.py", "/ssl.py")),
+    ("validation", ("/pydantic/", "/pydantic_core/", "/fastapi/_compat", "/fastapi/dependencies/")),
+    ("json", ("/json/", "/orjson", "/fastapi/encoders.py", "/app/core/responses.py")),
+)
+# Threads whose innermost frame is in one of these files are waiting, not working
+IDLE_FILES = ("threading.py", "queue.py", "selectors.py")
+
+REPORT_ID = re.compile(r"^[0-9]+-[0-9a-f]{8}$")
+TOP_FUNCTIONS = 30
+
+Frame = Tuple[str, int, str] # (filename, first line, function name)
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of all busy threads every interval seconds from a background thread.
+    Sync endpoints run in the thread pool, so the request's work is spread over the event loop
+    thread and a worker; samples of other requests served meanwhile are included too.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.max_in_flight = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.max_in_flight = max(self.max_in_flight, requests_in_flight())
+            for ident, frame in sys._current_frames().items():
+                if ident == own or frame.f_code.co_filename.endswith(IDLE_FILES):
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+                stack.reverse()
+                self.stacks[tuple(stack)] += 1
+
+
+def categorize(stack: Tuple[Frame, ...]) -> str:
+    for filename, _, _ in reversed(stack):
+        filename = filename.replace("\\", "/")
+        for category, fragments in CATEGORIES:
+            if any(fragment in filename for fragment in fragments):
+                return category
+    return "app" if any("/app/" in f.replace("\\", "/") for f, _, _ in stack) else "other"
+
+
+def _short_filename(filename: str) -> str:
+    filename = filename.replace("\\", "/")
+    for marker in ("/site-packages/", "/backend/"):
+        if marker in filename:
+            return filename.split(marker, 1)[1]
+    return filename.rsplit("/lib/", 1)[-1]
+
+
+def _label(frame: Frame) -> str:
+    filename, line, name = frame
+    return f"{name} ({_short_filename(filename)}:{line})"
+
+
+def build_report(profiler: SamplingProfiler, method: str, path: str, status: int, duration: float) -> Tuple[dict, str]:
+    """Summary (see ProfileRead) and the samples in collapsed stack format (flamegraph.pl, speedscope)."""
+    samples = sum(profiler.stacks.values())
+    ms_per_sample = duration * 1000 / samples if samples else 0.0
+
+    categories: Counter = Counter()
+    self_counts: Counter = Counter()
+    total_counts: Counter = Counter()
+    for stack, count in profiler.stacks.items():
+        categories[categorize(stack)] += count
+        self_counts[stack[-1]] += count
+        for frame in set(stack):
+            total_counts[frame] += count
+
+    report = {
+        "id": f"{int(time.time() * 1000)}-{secrets.token_hex(4)}",
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "method": method,
+        "path": path,
+        "status": status,
+        "duration_ms": round(duration * 1000, 3),
+        "interval_ms": profiler.interval * 1000,
+        "samples": samples,
+        "concurrent_requests": profiler.max_in_flight,
+        "categories": {name: round(count * ms_per_sample, 3) for name, count in categories.most_common()},
+        "top_functions": [
+            {"function": _label(frame), "self_ms": round(self_counts[frame] * ms_per_sample, 3), "total_ms": round(count * ms_per_sample, 3)}
+            for frame, count in total_counts.most_common(TOP_FUNCTIONS)
+        ],
+    }
+    collapsed = "".join(f"{';'.join(_label(f) for f in stack)} {count}\n" for stack, count in profiler.stacks.items())
+    return report, collapsed
+
+
+def server_timing(report: dict) -> str:
+    entries = [f"{name};dur={ms:.1f}" for name, ms in report["categories"].items()]
+    return ", ".join(entries + [f"total;dur={report['duration_ms']:.1f}"])
+
+
+# --- Storage ---
+
+def save_report(report: dict, collapsed: str, directory: Path = None) -> None:
+    directory = directory or PROFILE_DIR
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / f"{report['id']}.json").write_text(json.dumps(report))
+    (directory / f"{report['id']}.collapsed").write_text(collapsed)
+    # Ids start with a millisecond timestamp, so name order is age order
+    for old in sorted(directory.glob("*.json"))[:-PROFILE_KEEP or None]:
+        old.unlink(missing_ok=True)
+        old.with_suffix(".collapsed").unlink(missing_ok=True)
+
+
+def list_reports(directory: Path = None) -> List[dict]:
+    directory = directory or PROFILE_DIR
+    if not directory.exists():
+        return []
+    return [json.loads(p.read_text()) for p in sorted(directory.glob("*.json"), reverse=True)]
+
+
+def _report_path(report_id: str, suffix: str, directory: Path = None) -> Path:
+    path = (directory or PROFILE_DIR) / f"{report_id}{suffix}"
+    if not REPORT_ID.match(report_id) or not path.exists():
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return path
+
+
+def load_report(report_id: str, directory: Path = None) -> dict:
+    return json.loads(_report_path(report_id, ".json", directory).read_text())
+
+
+def load_collapsed(report_id: str, directory: Path = None) -> str:
+    return _report_path(report_id, ".collapsed", directory).read_text()
+
+
+# --- Middleware ---
+
+def profile_requested(scope: Scope) -> bool:
+    if Headers(scope=scope).get("x-profile", "").lower() in ("1", "true"):
+        return True
+    query_string = scope.get("query_string", b"")
+    return b"profile=" in query_string and QueryParams(query_string).get("profile", "").lower() in ("1", "true")
+
+
+def is_admin(scope: Scope) -> bool:
+    """
+    Whether the bearer token's user is an admin now, not when the token was issued.
+    Blocking (one primary key lookup), run it in the thread pool. Honours the app's get_session override.
+    """
+    authorization = Headers(scope=scope).get("authorization", "")
+    if not authorization.lower().startswith("bearer "):
+        return False
+    try:
+        user_id = uuid.UUID(decode_token(authorization[7:]).user_id)
+    except (HTTPException, ValueError):
+        return False
+    overrides = getattr(scope.get("app"), "dependency_overrides", {})
+    sessions = overrides.get(get_session, get_session)()
+    try:
+        user = next(sessions).get(User, user_id)
+        return user is not None and user.role == "admin"
+    finally:
+        sessions.close()
+
+
+class ProfilingMiddleware:
+    """
+    Profiles requests of admins sent with "X-Profile: 1" or ?profile=1 until the response headers go out.
+    The report is stored (see /profiles) and announced in X-Profile-Id and Server-Timing headers.
+    Other requests only pay for the header check; the role check and writing the report run in the thread pool.
+    """
+
+    def __init__(self, app: ASGIApp, interval_ms: float = PROFILE_INTERVAL_MS):
+        self.app = app
+        self.interval = interval_ms / 1000
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not profile_requested(scope) or not await run_in_threadpool(is_admin, scope):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = SamplingProfiler(self.interval)
+        started = time.perf_counter()
+        report: Optional[dict] = None
+
+        def finish(status: int) -> dict:
+            duration = time.perf_counter() - started
+            profiler.stop()
+            result, collapsed = build_report(profiler, scope["method"], scope["path"], status, duration)
+            save_report(result, collapsed)
+            return result
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal report
+            if message["type"] == "http.response.start" and report is None:
+                report = await run_in_threadpool(finish, message["status"])
+                headers = MutableHeaders(scope=message)
+                headers["X-Profile-Id"] = report["id"]
+                headers.append("Server-Timing", server_timing(report))
+            await send(message)
+
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if report is None:
+                report = await run_in_threadpool(finish, 500)
@@ -0,0 +1,85 @@
+import asyncio
+import os
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Hashable, Iterable, Optional, Set
+
+# Events buffered per subscriber; a slow client loses the oldest ones instead of growing memory
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("PUBSUB_QUEUE_SIZE", "100"))
+
+
+class Subscription:
+    """One subscriber (e.g. an SSE connection). Lives on the event loop it was created on."""
+
+    def __init__(self, broker: "Broker", topics: Set[Hashable], maxsize: int):
+        self.broker = broker
+        self.topics = topics
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0 # Events lost to a full queue since the last get
+
+    def _offer(self, event: Any) -> None:
+        # Runs on the subscriber's loop
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self) -> Any:
+        return await self.queue.get()
+
+    def take_dropped(self) -> int:
+        dropped, self.dropped = self.dropped, 0
+        return dropped
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    """
+    In-process pub/sub. publish() may be called from any thread (sync endpoints run in a thread pool);
+    delivery is handed to each subscriber's event loop. Idle subscribers cost one queue and a dict entry.
+    Only covers subscribers of this process: with several workers, each gets the events it ingested itself.
+    """
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._topics: Dict[Hashable, Set[Subscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, topics: Iterable[Hashable], queue_size: Optional[int] = None) -> Subscription:
+        """Must be called from a running event loop."""
+        subscription = Subscription(self, set(topics), queue_size or self.queue_size)
+        with self._lock:
+            for topic in subscription.topics:
+                self._topics[topic].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            for topic in subscription.topics:
+                subscribers = self._topics.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._topics[topic]
+
+    def publish(self, topic: Hashable, event: Any) -> int:
+        """Queues event for every subscriber of topic; returns how many there were."""
+        with self._lock:
+            subscribers = list(self._topics.get(topic, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._offer, event)
+            except RuntimeError:
+                # Loop already closed, the connection is gone
+                self.unsubscribe(subscription)
+        return len(subscribers)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len({s for subscribers in self._topics.values() for s in subscribers})
+
+
+broker = Broker()
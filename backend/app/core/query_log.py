@@ -0,0 +1,69 @@
+import logging
+import os
+import re
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
+
+from .metrics import RequestStats, request_hooks
+
+logger = logging.getLogger(__name__)
+
+# A request running more statements (SQL and InfluxQL together) than this is logged with its statements
+QUERY_BUDGET_COUNT = int(os.getenv("QUERY_BUDGET_COUNT", "50"))
+# ... as is one spending longer than this in them, in seconds
+QUERY_BUDGET_SECONDS = float(os.getenv("QUERY_BUDGET_SECONDS", "1.0"))
+# A single statement slower than this gets its request logged even within budget
+SLOW_QUERY_SECONDS = float(os.getenv("SLOW_QUERY_SECONDS", "0.25"))
+# Statements listed per logged request, most expensive first
+QUERY_LOG_STATEMENTS = int(os.getenv("QUERY_LOG_STATEMENTS", "10"))
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def top_statements(stats: RequestStats, limit: int = QUERY_LOG_STATEMENTS) -> List[Tuple[str, str, int, float, float]]:
+    """(kind, statement, count, total seconds, slowest) of the most expensive statements, by total time."""
+    entries = [(kind, text, count, total, slowest) for (kind, text), (count, total, slowest) in stats.statements.items()]
+    entries.sort(key=lambda e: (e[3], e[2]), reverse=True)
+    return entries[:limit]
+
+
+def format_statements(stats: RequestStats, limit: int = QUERY_LOG_STATEMENTS, width: int = 300) -> str:
+    lines = []
+    for kind, text, count, total, slowest in top_statements(stats, limit):
+        text = _WHITESPACE.sub(" ", text).strip()
+        if len(text) > width:
+            text = text[:width] + "..."
+        lines.append(f"  {count}x {total:.3f} s (slowest {slowest:.3f} s) {kind}: {text}")
+    if len(stats.statements) > limit:
+        lines.append(f"  ... {len(stats.statements) - limit} more distinct statements")
+    return "\n".join(lines)
+
+
+def check_request(method: str, route: str, status: int, seconds: float, stats: RequestStats) -> None:
+    """Request hook: logs requests over the statement budget or with a slow statement, with what they ran."""
+    queries = stats.sql_queries + stats.influx_queries
+    query_seconds = stats.sql_seconds + stats.influx_seconds
+    over_budget = queries > QUERY_BUDGET_COUNT or query_seconds > QUERY_BUDGET_SECONDS
+    if not over_budget and not any(entry[2] >= SLOW_QUERY_SECONDS for entry in stats.statements.values()):
+        return
+    reason = f"over budget ({QUERY_BUDGET_COUNT} statements / {QUERY_BUDGET_SECONDS:g} s)" if over_budget else f"slow statement (>= {SLOW_QUERY_SECONDS:g} s)"
+    logger.warning(
+        "%s %s %s: %d statements (%d SQL, %d Influx) taking %.3f s of %.3f s, %s\n%s",
+        method, route, status, queries, stats.sql_queries, stats.influx_queries, query_seconds, seconds, reason,
+        format_statements(stats),
+    )
+
+
+@contextmanager
+def capture_requests() -> Iterator[List[Tuple[str, str, RequestStats]]]:
+    """Collects (method, route, stats) of every request finished inside the block; used by tests."""
+    captured = []
+
+    def hook(method, route, status, seconds, stats):
+        captured.append((method, route, stats))
+
+    request_hooks.append(hook)
+    try:
+        yield captured
+    finally:
+        request_hooks.remove(hook)
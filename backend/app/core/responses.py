@@ -0,0 +1,35 @@
+from typing import Any, Dict, Optional
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def _default(obj: Any) -> Any:
+    # SQLModel/pydantic objects that slipped into the content (e.g. relationships)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson.
+    Handles datetime, UUID and numpy arrays natively; aware UTC times are written with "Z" like pydantic does.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_UTC_Z,
+        )
+
+
+def trusted_response(result, headers: Optional[Dict[str, str]] = None) -> ORJSONResponse:
+    """
+    Serializes DB rows as they come, without response_model validation.
+    Only for selects whose columns already match the read schema (e.g. select(MeterReading.__table__)).
+    """
+    return ORJSONResponse([dict(row) for row in result.mappings()], headers=headers)
@@ -1,12 +1,18 @@
 from datetime import datetime, timedelta
 from typing import Optional
-from jose import jwt
+from fastapi import HTTPException, status
+from jose import JWTError, jwt
 from passlib.context import CryptContext
+from ..schemas.auth import TokenData
 
 # Configuration (should be in env vars)
 SECRET_KEY = "CHANGE_ME_IN_PRODUCTION_SECRET_KEY" 
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# Stream tokens travel in the URL (EventSource can't send headers) and end up in access logs and browser history,
+# so they only open live update streams and only for long enough to connect
+STREAM_SCOPE = "stream"
+STREAM_TOKEN_EXPIRE_SECONDS = 60
 
 pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 
@@ -25,3 +31,20 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
+
+def decode_token(token: str, scope: Optional[str] = None) -> TokenData:
+    """Validates a token; scope is the one it must have (None for regular API tokens)."""
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        user_id: str = payload.get("sub")
+        role: str = payload.get("role")
+        if user_id is None or payload.get("scope") != scope:
+            raise credentials_exception
+        return TokenData(user_id=user_id, role=role)
+    except JWTError:
+        raise credentials_exception
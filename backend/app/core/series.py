@@ -0,0 +1,64 @@
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+
+def to_epoch(dt: datetime) -> int:
+    """Converts a datetime to epoch seconds. Naive datetimes are stored as UTC (datetime.utcnow)."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+def format_epoch(ts: int) -> str:
+    """Formats epoch seconds the way InfluxDB returns RFC3339 times."""
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class ReadingSeries:
+    """
+    Columnar time series of one meter: times as int64 epoch seconds, values as float64.
+    Replaces per-point dicts/tuples; 16 bytes per reading.
+    """
+    __slots__ = ('times', 'values')
+
+    def __init__(self, times: np.ndarray, values: np.ndarray):
+        self.times = np.asarray(times, dtype=np.int64)
+        self.values = np.asarray(values, dtype=np.float64)
+
+    @classmethod
+    def empty(cls) -> "ReadingSeries":
+        return cls(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64))
+
+    @classmethod
+    def from_columns(cls, times: array, values: array) -> "ReadingSeries":
+        """Wraps array('q')/array('d') columns (see influx_utils.get_meter_columns) without copying."""
+        if not times:
+            return cls.empty()
+        return cls(np.frombuffer(times, dtype=np.int64), np.frombuffer(values, dtype=np.float64))
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[datetime, float]]) -> "ReadingSeries":
+        """Builds a series from (time, value) rows, e.g. a select of MeterReading.time, MeterReading.value."""
+        times = array('q')
+        values = array('d')
+        for t, v in rows:
+            times.append(to_epoch(t))
+            values.append(v)
+        return cls.from_columns(times, values)
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def to_compact(self) -> Dict[str, List]:
+        """Compact response format: {"t": [epoch seconds...], "v": [values...]}."""
+        return {"t": self.times.tolist(), "v": self.values.tolist()}
+
+    def to_points(self) -> List[Dict]:
+        """Legacy per-point format used by the readings_influx endpoint."""
+        return [
+            {"id": idx, "value": v, "time": format_epoch(t), "is_manual": False}
+            for idx, (t, v) in enumerate(zip(self.times.tolist(), self.values.tolist()))
+        ]
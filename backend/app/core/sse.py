@@ -0,0 +1,46 @@
+import asyncio
+import os
+from typing import AsyncIterator, Hashable, Iterable
+
+import orjson
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+from .pubsub import broker
+
+# Comment line sent when nothing happened for this long, keeps proxies from closing idle connections
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+
+
+def format_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {orjson.dumps(data, option=orjson.OPT_UTC_Z).decode()}\n\n"
+
+
+async def _event_stream(request: Request, topics: Iterable[Hashable]) -> AsyncIterator[str]:
+    subscription = broker.subscribe(topics)
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                event, data = await asyncio.wait_for(subscription.get(), timeout=SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keepalive\n\n"
+                continue
+            dropped = subscription.take_dropped()
+            if dropped:
+                # The client fell behind; it should refetch instead of trusting the stream
+                yield format_event("dropped", {"count": dropped})
+            yield format_event(event, data)
+    finally:
+        subscription.close()
+
+
+def sse_response(request: Request, topics: Iterable[Hashable]) -> StreamingResponse:
+    """Server-Sent Events stream of the broker events published to topics (as (event, data) tuples)."""
+    return StreamingResponse(
+        _event_stream(request, list(topics)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
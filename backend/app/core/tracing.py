@@ -0,0 +1,337 @@
+import json
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+try:
+    from opentelemetry import trace
+    from opentelemetry.trace import SpanContext, SpanKind, Status, StatusCode, TraceFlags
+    _Span, _Tracer, _TracerProvider = trace.Span, trace.Tracer, trace.TracerProvider
+except ImportError:  # Tracing is optional, instrumentation becomes a no-op
+    trace = None
+    _Span = _Tracer = _TracerProvider = object
+
+logger = logging.getLogger(__name__)
+
+# console (span tree per request on stderr), file (JSON lines) or empty for off
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "")
+TRACING_FILE = Path(os.getenv("TRACING_FILE", Path(tempfile.gettempdir()) / "homiq-traces.jsonl"))
+# Spans kept per trace until its root ends; a sync of a long history runs thousands of statements
+MAX_TRACE_SPANS = int(os.getenv("TRACING_MAX_SPANS", "10000"))
+# Traces waiting for their root span; the oldest is dropped beyond this
+MAX_OPEN_TRACES = 1000
+# Longest db.statement attribute
+MAX_STATEMENT_LENGTH = 2000
+
+_MEASUREMENTS = re.compile(r'\bFROM\s+((?:"[^"]+"|[\w.]+)(?:\s*,\s*(?:"[^"]+"|[\w.]+))*)', re.IGNORECASE)
+
+
+class RecordedSpan(_Span):
+    """A span of LocalTracerProvider; handed to the exporter once its trace's local root ends."""
+
+    def __init__(self, provider: "LocalTracerProvider", name: str, context: "SpanContext", parent: Optional["SpanContext"],
+                 kind: "SpanKind", attributes: Optional[dict], start_time: Optional[int]):
+        self.provider = provider
+        self.name = name
+        self.context = context
+        self.parent = parent
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.events: List[dict] = []
+        self.status = (StatusCode.UNSET, None)
+        self.start_time = start_time or time.time_ns()
+        self.end_time: Optional[int] = None
+
+    def get_span_context(self) -> "SpanContext":
+        return self.context
+
+    def set_attributes(self, attributes) -> None:
+        self.attributes.update(attributes)
+
+    def set_attribute(self, key, value) -> None:
+        self.attributes[key] = value
+
+    def add_event(self, name, attributes=None, timestamp=None) -> None:
+        self.events.append({"name": name, "time_unix_nano": timestamp or time.time_ns(), "attributes": dict(attributes or {})})
+
+    def update_name(self, name) -> None:
+        self.name = name
+
+    def is_recording(self) -> bool:
+        return self.end_time is None
+
+    def set_status(self, status, description=None) -> None:
+        if isinstance(status, Status):
+            self.status = (status.status_code, status.description)
+        else:
+            self.status = (status, description)
+
+    def record_exception(self, exception, attributes=None, timestamp=None, escaped=False) -> None:
+        self.add_event("exception", {
+            "exception.type": type(exception).__name__,
+            "exception.message": str(exception),
+            **(attributes or {}),
+        }, timestamp)
+
+    def end(self, end_time=None) -> None:
+        if self.end_time is not None:
+            return
+        self.end_time = end_time or time.time_ns()
+        self.provider._on_end(self)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_time or time.time_ns()) - self.start_time) / 1e6
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": f"{self.context.trace_id:032x}",
+            "span_id": f"{self.context.span_id:016x}",
+            "parent_span_id": f"{self.parent.span_id:016x}" if self.parent else None,
+            "name": self.name,
+            "kind": self.kind.name,
+            "start_time_unix_nano": self.start_time,
+            "end_time_unix_nano": self.end_time,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": {k: list(v) if isinstance(v, tuple) else v for k, v in self.attributes.items()},
+            "events": self.events,
+            "status": {"code": self.status[0].name, "description": self.status[1]},
+        }
+
+
+class LocalTracer(_Tracer):
+    def __init__(self, provider: "LocalTracerProvider"):
+        self.provider = provider
+
+    def start_span(self, name, context=None, kind=None, attributes=None, links=None, start_time=None,
+                   record_exception=True, set_status_on_exception=True):
+        if self.provider.exporter is None:
+            return trace.INVALID_SPAN
+        parent = trace.get_current_span(context).get_span_context()
+        if not parent.is_valid:
+            parent = None
+        span_context = SpanContext(
+            trace_id=parent.trace_id if parent else random.getrandbits(128),
+            span_id=random.getrandbits(64),
+            is_remote=False,
+            trace_flags=TraceFlags(TraceFlags.SAMPLED),
+        )
+        return RecordedSpan(self.provider, name, span_context, parent, kind or SpanKind.INTERNAL, attributes, start_time)
+
+    @contextmanager
+    def start_as_current_span(self, name, context=None, kind=None, attributes=None, links=None, start_time=None,
+                              record_exception=True, set_status_on_exception=True, end_on_exit=True):
+        span = self.start_span(name, context, kind, attributes, links, start_time, record_exception, set_status_on_exception)
+        with trace.use_span(span, end_on_exit=end_on_exit, record_exception=record_exception,
+                            set_status_on_exception=set_status_on_exception) as current:
+            yield current
+
+
+class LocalTracerProvider(_TracerProvider):
+    """
+    Minimal OpenTelemetry tracer provider: spans of a trace are collected in memory and exported together
+    when the trace's local root (usually the FastAPI request span) ends. With no exporter nothing is recorded.
+    Installing the OpenTelemetry SDK's provider instead works the same for all instrumentation here.
+    """
+
+    def __init__(self, exporter=None):
+        self.exporter = exporter
+        self._tracer = LocalTracer(self)
+        self._open: Dict[int, list] = {} # trace_id -> [spans, dropped]
+        self._lock = threading.Lock()
+
+    def get_tracer(self, instrumenting_module_name, instrumenting_library_version=None, schema_url=None, attributes=None):
+        return self._tracer
+
+    def _on_end(self, span: RecordedSpan) -> None:
+        trace_id = span.context.trace_id
+        with self._lock:
+            if span.parent is not None and not span.parent.is_remote:
+                entry = self._open.get(trace_id)
+                if entry is None:
+                    if len(self._open) >= MAX_OPEN_TRACES:
+                        self._open.pop(next(iter(self._open)))
+                    entry = self._open[trace_id] = [[], 0]
+                if len(entry[0]) < MAX_TRACE_SPANS:
+                    entry[0].append(span)
+                else:
+                    entry[1] += 1
+                return
+            spans, dropped = self._open.pop(trace_id, ([], 0))
+        if dropped:
+            span.attributes["tracing.dropped_spans"] = dropped
+        exporter = self.exporter
+        if exporter is not None:
+            try:
+                exporter.export(spans + [span])
+            except Exception:
+                logger.exception("Exporting trace %032x failed", trace_id)
+
+
+# --- Exporters ---
+
+class ConsoleExporter:
+    """Prints each trace as an indented span tree."""
+
+    def __init__(self, out=None):
+        self.out = out or sys.stderr
+
+    def export(self, spans: List[RecordedSpan]) -> None:
+        children: Dict[Optional[int], List[RecordedSpan]] = {}
+        ids = {s.context.span_id for s in spans}
+        for s in sorted(spans, key=lambda s: s.start_time):
+            parent = s.parent.span_id if s.parent and s.parent.span_id in ids else None
+            children.setdefault(parent, []).append(s)
+
+        lines = [f"trace {spans[-1].context.trace_id:032x}"]
+
+        def walk(parent_id, depth):
+            for s in children.get(parent_id, []):
+                attributes = " ".join(f"{k}={v}" for k, v in s.attributes.items() if k != "db.statement")
+                statement = s.attributes.get("db.statement")
+                detail = f" {attributes}" if attributes else ""
+                if statement:
+                    detail += f" | {' '.join(str(statement).split())[:120]}"
+                error = " ERROR" if s.status[0] == StatusCode.ERROR else ""
+                lines.append(f"{'  ' * depth}{s.name} {s.duration_ms:.2f} ms{error}{detail}")
+                walk(s.context.span_id, depth + 1)
+
+        walk(None, 1)
+        self.out.write("\n".join(lines) + "\n")
+
+
+class FileExporter:
+    """Appends one JSON object per span (OTLP-like field names) to path."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[RecordedSpan]) -> None:
+        data = "".join(json.dumps(s.to_dict(), default=str) + "\n" for s in spans)
+        with self._lock, open(self.path, "a") as f:
+            f.write(data)
+
+
+class MemoryExporter:
+    """Keeps exported traces in a list; for tests."""
+
+    def __init__(self):
+        self.traces: List[List[RecordedSpan]] = []
+
+    def export(self, spans: List[RecordedSpan]) -> None:
+        self.traces.append(spans)
+
+
+def configure_tracing(exporter_name: str = TRACING_EXPORTER) -> Optional["LocalTracerProvider"]:
+    """
+    Installs LocalTracerProvider as the global OpenTelemetry provider with the named exporter.
+    Leaves a provider configured elsewhere (e.g. the OpenTelemetry SDK) alone.
+    FastAPI picks the global provider up and adds request, dependency and serialization spans.
+    """
+    if trace is None or not exporter_name:
+        return None
+    exporters = {"console": ConsoleExporter, "file": lambda: FileExporter(TRACING_FILE)}
+    if exporter_name not in exporters:
+        logger.warning("Unknown TRACING_EXPORTER %r, tracing stays off", exporter_name)
+        return None
+    if not isinstance(trace.get_tracer_provider(), trace.ProxyTracerProvider):
+        return None
+    provider = LocalTracerProvider(exporters[exporter_name]())
+    trace.set_tracer_provider(provider)
+    return provider
+
+
+# --- Instrumentation ---
+
+def span(name: str, **attributes):
+    """Context manager opening a child span of the current one (no-op without OpenTelemetry or a configured provider)."""
+    if trace is None:
+        return nullcontext()
+    return trace.get_tracer(__name__).start_as_current_span(name, attributes=attributes)
+
+
+def _start_child(name: str, attributes: dict):
+    # Only inside an existing trace: scripts and background work don't start traces of their own
+    if not trace.get_current_span().is_recording():
+        return None
+    return trace.get_tracer(__name__).start_span(name, kind=SpanKind.CLIENT, attributes=attributes)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    child = None
+    if trace.get_current_span().is_recording():
+        operation = statement.lstrip()[:6].upper()
+        child = _start_child(f"SQL {operation}", {
+            "db.system": conn.dialect.name,
+            "db.operation": operation,
+            "db.statement": statement[:MAX_STATEMENT_LENGTH],
+        })
+    conn.info.setdefault("trace_spans", []).append(child)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    child = conn.info["trace_spans"].pop()
+    if child is not None:
+        if cursor.rowcount is not None and cursor.rowcount >= 0:
+            child.set_attribute("db.rows_affected", cursor.rowcount)
+        child.end()
+
+
+def _handle_error(exception_context):
+    spans = exception_context.connection.info.get("trace_spans") if exception_context.connection is not None else None
+    child = spans.pop() if spans else None
+    if child is not None:
+        child.record_exception(exception_context.original_exception)
+        child.set_status(StatusCode.ERROR, str(exception_context.original_exception))
+        child.end()
+
+
+def trace_engine(engine: Engine) -> Engine:
+    """Adds a span per SQL statement executed inside a trace."""
+    if trace is not None and not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+    return engine
+
+
+def influx_measurements(query: str) -> tuple:
+    match = _MEASUREMENTS.search(query)
+    if not match:
+        return ()
+    return tuple(part.strip().strip('"') for part in match.group(1).split(","))
+
+
+def start_influx_span(db_name: str, query: str):
+    """Span of one InfluxDB query, or None outside a trace. Not made current: nothing runs beneath it."""
+    if trace is None:
+        return None
+    return _start_child("InfluxQL", {
+        "db.system": "influxdb",
+        "db.name": db_name,
+        "db.statement": query[:MAX_STATEMENT_LENGTH],
+        "influx.measurements": influx_measurements(query),
+    })
+
+
+def end_influx_span(influx_span, size: int, rows: int, failed: bool) -> None:
+    influx_span.set_attributes({"influx.response_bytes": size, "influx.rows": rows})
+    if failed:
+        influx_span.set_status(StatusCode.ERROR)
+    influx_span.end()
+
+
+def count_rows(data: dict) -> int:
+    return sum(len(series.get("values", ())) for result in data.get("results", ()) for series in result.get("series", ()))
@@ -1,14 +1,28 @@
+import os
+import secrets
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from typing import Optional
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from .core.database import create_db_and_tables
-from .api import buildings, units, users, telemetry, auth
+from .core.compression import CompressionMiddleware
+from .core.metrics import MetricsMiddleware, registry, request_hooks, requests_in_flight
+from .core.query_log import check_request
+from .core.profiling import ProfilingMiddleware
+from .core.tracing import configure_tracing
+from .core.cache import building_cache
+from .core.pubsub import broker
+from .api import buildings, units, users, telemetry, auth, billing, profiles
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     create_db_and_tables()
     yield
 
+# FastAPI traces requests itself once a provider is installed, see TRACING_EXPORTER
+configure_tracing()
+
 app = FastAPI(title="Homiq API", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
@@ -18,12 +32,19 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(ProfilingMiddleware)
+# Outermost, so the recorded latency includes compression and CORS
+app.add_middleware(MetricsMiddleware)
+request_hooks.append(check_request)
 
 app.include_router(auth.router, tags=["Authentication"])
 app.include_router(buildings.router, prefix="/buildings", tags=["Buildings"])
 app.include_router(units.router, prefix="/units", tags=["Units"])
 app.include_router(users.router, prefix="/users", tags=["Users"])
 app.include_router(telemetry.router, prefix="/telemetry", tags=["Telemetry"])
+app.include_router(billing.router, tags=["Billing"])
+app.include_router(profiles.router, prefix="/profiles", tags=["Profiling"])
 
 @app.get("/")
 def read_root():
@@ -32,3 +53,23 @@ def read_root():
 @app.get("/health")
 def health_check():
     return {"status": "ok"}
+
+# Bearer token required by /metrics; without it the endpoint is disabled
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+registry.callback("building_cache_hits_total", "Building cache lookups served from the cache.", "counter", lambda: building_cache.hits)
+registry.callback("building_cache_misses_total", "Building cache lookups that had to compute the result.", "counter", lambda: building_cache.misses)
+registry.callback(
+    "building_cache_hit_ratio", "Share of building cache lookups served from the cache since start.", "gauge",
+    lambda: building_cache.hits / max(building_cache.hits + building_cache.misses, 1),
+)
+registry.callback("http_requests_in_flight", "HTTP requests currently being served.", "gauge", requests_in_flight)
+registry.callback("stream_subscribers", "Open live update (SSE) subscriptions.", "gauge", broker.subscriber_count)
+
+@app.get("/metrics", include_in_schema=False)
+def metrics(authorization: Optional[str] = Header(None)):
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not secrets.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
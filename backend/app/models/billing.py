@@ -0,0 +1,47 @@
+import uuid
+from datetime import date, datetime
+from typing import Dict, List, Optional
+from sqlmodel import Field, SQLModel, Relationship
+
+# Settlement (vyúčtování) of one building for one period, see services/billing.py
+class SettlementBase(SQLModel):
+    building_id: uuid.UUID = Field(foreign_key="buildings.id", index=True)
+    period_start: date
+    period_end: date # Exclusive
+
+class Settlement(SettlementBase, table=True):
+    __tablename__ = "settlements"
+    id: Optional[uuid.UUID] = Field(default_factory=uuid.uuid4, primary_key=True)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    items: List["SettlementItem"] = Relationship(back_populates="settlement")
+
+class SettlementItemBase(SQLModel):
+    unit_id: uuid.UUID = Field(foreign_key="units.id", index=True)
+    cost_type: str # Meter type: heat, water_hot, water_cold, electricity...
+    area_m2: float
+    consumption: float # Measured consumption in the period
+    basic_amount: float # Part allocated by area (základní složka)
+    consumption_amount: float # Part allocated by measured consumption (spotřební složka)
+    amount: float
+
+class SettlementItem(SettlementItemBase, table=True):
+    __tablename__ = "settlement_items"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    settlement_id: uuid.UUID = Field(foreign_key="settlements.id", index=True)
+
+    settlement: Optional[Settlement] = Relationship(back_populates="items")
+
+class SettlementCreate(SQLModel):
+    period_start: date
+    period_end: date
+    costs: Dict[str, float] # Total building cost per meter type
+    basic_shares: Optional[Dict[str, float]] = None # Share allocated by area per type, defaults in services/billing.py
+
+class SettlementItemRead(SettlementItemBase):
+    pass
+
+class SettlementRead(SettlementBase):
+    id: uuid.UUID
+    created_at: datetime
+    items: List[SettlementItemRead] = []
@@ -8,7 +8,7 @@ class UserBase(SQLModel):
     email: str = Field(index=True, unique=True)
     full_name: Optional[str] = None
     role: str = "home_lord" # admin, home_lord, owner
-    invite_token: Optional[str] = None
+    invite_token: Optional[str] = Field(default=None, index=True)
     invite_expires_at: Optional[datetime] = None
     last_login_at: Optional[datetime] = None
     status: str = Field(default="active") # active, pending
@@ -21,7 +21,7 @@ class User(UserBase, table=True):
     units: List["Unit"] = Relationship(back_populates="owner")
     managed_buildings: List["Building"] = Relationship(back_populates="manager")
 
-    created_by_id: Optional[uuid.UUID] = Field(default=None, foreign_key="users.id")
+    created_by_id: Optional[uuid.UUID] = Field(default=None, foreign_key="users.id", index=True)
     created_by: Optional["User"] = Relationship(
         sa_relationship_kwargs={"remote_side": "User.id"},
         back_populates="created_users"
@@ -59,7 +59,7 @@ class Building(BuildingBase, table=True):
     __tablename__ = "buildings"
     id: Optional[uuid.UUID] = Field(default_factory=uuid.uuid4, primary_key=True)
     
-    manager_id: Optional[uuid.UUID] = Field(default=None, foreign_key="users.id")
+    manager_id: Optional[uuid.UUID] = Field(default=None, foreign_key="users.id", index=True)
     manager: Optional[User] = Relationship(back_populates="managed_buildings")
 
     units: List["Unit"] = Relationship(back_populates="building")
@@ -86,8 +86,8 @@ class UnitBase(SQLModel):
     unit_number: str
     floor: int
     area_m2: float
-    building_id: uuid.UUID = Field(foreign_key="buildings.id")
-    owner_id: Optional[uuid.UUID] = Field(default=None, foreign_key="users.id")
+    building_id: uuid.UUID = Field(foreign_key="buildings.id", index=True)
+    owner_id: Optional[uuid.UUID] = Field(default=None, foreign_key="users.id", index=True)
 
 class Unit(UnitBase, table=True):
     __tablename__ = "units"
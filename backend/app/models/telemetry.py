@@ -1,6 +1,7 @@
 import uuid
 from datetime import datetime
 from typing import Optional, List
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel, Relationship
 from .property import Unit
 
@@ -9,7 +10,7 @@ class MeterBase(SQLModel):
     serial_number: str = Field(index=True, unique=True)
     type: str  # water_cold, water_hot, heat, electricity
     unit_of_measure: str # m3, kWh
-    unit_id: uuid.UUID = Field(foreign_key="units.id")
+    unit_id: uuid.UUID = Field(foreign_key="units.id", index=True)
 
 class Meter(MeterBase, table=True):
     __tablename__ = "meters"
@@ -34,6 +35,8 @@ class MeterReadingBase(SQLModel):
 
 class MeterReading(MeterReadingBase, table=True):
     __tablename__ = "meter_readings"
+    # Every readings query and the sync dedupe filter on (meter_id, time); one reading per meter and time
+    __table_args__ = (Index("ix_meter_readings_meter_id_time", "meter_id", "time", unique=True),)
     id: Optional[int] = Field(default=None, primary_key=True) # Integer ID for simplicity in SQLite, eventually time+id composite
     
     meter: Optional[Meter] = Relationship(back_populates="readings")
@@ -43,3 +46,85 @@ class MeterReadingCreate(MeterReadingBase):
 
 class MeterReadingRead(MeterReadingBase):
     id: int
+
+class CompactSeries(SQLModel):
+    """Columnar readings: t = epoch seconds, v = values (same order)."""
+    t: List[int]
+    v: List[float]
+
+# Rollups of MeterReading per meter and day / month, maintained on ingest (see services/rollups.py)
+class MeterRollupBase(SQLModel):
+    meter_id: uuid.UUID = Field(foreign_key="meters.id")
+    bucket: datetime # Start of the day / month, UTC
+    first_time: datetime
+    first_value: float
+    last_time: datetime
+    last_value: float
+    min_value: float
+    max_value: float
+    delta: float = 0.0 # last_value - first_value
+    count: int = 0
+
+class MeterDailyRollup(MeterRollupBase, table=True):
+    __tablename__ = "meter_readings_daily"
+    __table_args__ = (Index("ix_meter_readings_daily_meter_id_bucket", "meter_id", "bucket", unique=True),)
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+class MeterMonthlyRollup(MeterRollupBase, table=True):
+    __tablename__ = "meter_readings_monthly"
+    __table_args__ = (Index("ix_meter_readings_monthly_meter_id_bucket", "meter_id", "bucket", unique=True),)
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+# Rolling per-meter state of the anomaly detector (see services/anomalies.py), one row per meter
+class MeterDetectorState(SQLModel, table=True):
+    __tablename__ = "meter_detector_state"
+    meter_id: uuid.UUID = Field(foreign_key="meters.id", primary_key=True)
+    meter_type: str
+    last_time: datetime
+    last_value: float
+    rate_mean: float = 0.0 # EWMA of consumption per hour
+    rate_var: float = 0.0
+    samples: int = 0
+    flow_since: Optional[datetime] = None # Start of the current run of non-zero flow
+    flow_alerted: bool = False
+    unchanged_since: Optional[datetime] = None # First reading of the current run of identical values
+    stuck_alerted: bool = False
+
+class MeterAlertBase(SQLModel):
+    meter_id: uuid.UUID = Field(foreign_key="meters.id", index=True)
+    kind: str # continuous_flow, spike, negative_delta, stuck
+    time: datetime # Time of the reading that triggered the alert
+    value: float
+    detail: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+class MeterAlert(MeterAlertBase, table=True):
+    __tablename__ = "meter_alerts"
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+class MeterAlertRead(MeterAlertBase):
+    id: int
+    serial_number: str
+    meter_type: str
+    unit_id: uuid.UUID
+    unit_number: str
+
+# Newest reading of every meter, maintained on ingest (see services/latest.py)
+class MeterLatest(SQLModel, table=True):
+    __tablename__ = "meter_latest"
+    meter_id: uuid.UUID = Field(foreign_key="meters.id", primary_key=True)
+    time: datetime
+    value: float
+    source: str # sync, manual, push, import
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class MeterLatestRead(SQLModel):
+    meter_id: uuid.UUID
+    serial_number: str
+    type: str
+    unit_of_measure: str
+    unit_id: uuid.UUID
+    unit_number: str
+    time: Optional[datetime] = None # None: no readings yet
+    value: Optional[float] = None
+    source: Optional[str] = None
@@ -8,6 +8,10 @@ class Token(BaseModel):
     user_id: str
     full_name: Optional[str] = None
 
+class StreamToken(BaseModel):
+    access_token: str
+    expires_in: int # Seconds
+
 class TokenData(BaseModel):
     user_id: Optional[str] = None
     role: Optional[str] = None
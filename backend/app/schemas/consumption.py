@@ -0,0 +1,65 @@
+import uuid
+from datetime import date
+from typing import Dict, List, Optional
+from pydantic import BaseModel
+
+class PeriodConsumption(BaseModel):
+    start: date # First day of the day / month / year
+    consumption: float
+
+class MeterConsumptionRead(BaseModel):
+    meter_id: uuid.UUID
+    serial_number: str
+    type: str
+    unit_of_measure: str
+    total: float
+    resets: int # Counter resets / meter replacements detected
+    negative_steps: int # Readings lower than the previous one (ignored)
+    periods: List[PeriodConsumption]
+
+class UnitConsumptionRead(BaseModel):
+    unit_id: uuid.UUID
+    period: str
+    meters: List[MeterConsumptionRead]
+
+class TypeConsumption(BaseModel):
+    type: str
+    unit_of_measure: str
+    consumption: float
+    meters: int
+
+class UnitTypeConsumption(BaseModel):
+    unit_id: uuid.UUID
+    unit_number: str
+    consumption: Dict[str, float] # Meter type -> consumption
+
+class BuildingConsumptionRead(BaseModel):
+    building_id: uuid.UUID
+    date_from: date
+    date_to: date # Exclusive
+    source: str # Rollup table used: daily / monthly
+    totals: List[TypeConsumption]
+    units: List[UnitTypeConsumption]
+
+class UnitRanking(BaseModel):
+    unit_id: uuid.UUID
+    unit_number: str
+    area_m2: float
+    consumption: float
+    per_m2: Optional[float] # None when the unit has no area
+    percentile: Optional[float] # 0 = lowest per m² in the building, 100 = highest
+    z_score: Optional[float]
+    outlier: bool
+
+class TypeRanking(BaseModel):
+    type: str
+    unit_of_measure: str # Of consumption; per_m2 is in <unit_of_measure>/m²
+    mean_per_m2: Optional[float]
+    median_per_m2: Optional[float]
+    units: List[UnitRanking]
+
+class BuildingRankingRead(BaseModel):
+    building_id: uuid.UUID
+    date_from: date
+    date_to: date # Exclusive
+    types: List[TypeRanking]
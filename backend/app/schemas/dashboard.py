@@ -0,0 +1,44 @@
+import uuid
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel
+
+from ..models.telemetry import CompactSeries
+
+class DashboardOwner(BaseModel):
+    id: uuid.UUID
+    email: str
+    full_name: Optional[str] = None
+
+class DashboardBuilding(BaseModel):
+    id: uuid.UUID
+    name: str
+    address: str
+
+class DashboardUnit(BaseModel):
+    id: uuid.UUID
+    unit_number: str
+    floor: int
+    area_m2: float
+    building_id: uuid.UUID
+    owner_id: Optional[uuid.UUID] = None
+
+class DashboardLatest(BaseModel):
+    time: datetime
+    value: float
+    source: str
+
+class DashboardMeter(BaseModel):
+    id: uuid.UUID
+    serial_number: str
+    type: str
+    unit_of_measure: str
+    latest: Optional[DashboardLatest] = None
+    series: CompactSeries # Downsampled history, t = epoch seconds
+
+class UnitDashboard(BaseModel):
+    unit: DashboardUnit
+    building: DashboardBuilding
+    owner: Optional[DashboardOwner] = None
+    interval: str
+    meters: List[DashboardMeter]
@@ -0,0 +1,13 @@
+from typing import List, Optional
+from pydantic import BaseModel
+
+class RejectedRow(BaseModel):
+    line: int # Line number in the file (header = 1)
+    serial_number: Optional[str] = None
+    reason: str
+
+class ReadingImportReport(BaseModel):
+    rows: int # Data rows in the file
+    inserted: int
+    duplicates: int # Already stored for the same meter and time
+    rejected: List[RejectedRow]
@@ -0,0 +1,21 @@
+from datetime import datetime
+from typing import Dict, List
+from pydantic import BaseModel
+
+class ProfileFunction(BaseModel):
+    function: str # name (file:line)
+    self_ms: float # Estimated time with the function on top of the stack
+    total_ms: float # Estimated time with the function anywhere on the stack
+
+class ProfileRead(BaseModel):
+    id: str
+    created_at: datetime
+    method: str
+    path: str
+    status: int
+    duration_ms: float # Until the response headers were sent
+    interval_ms: float
+    samples: int
+    concurrent_requests: int # Most requests in flight while sampling; above 1 other requests' stacks are mixed in
+    categories: Dict[str, float] # validation, orm, influx_http, json, app, other -> estimated ms
+    top_functions: List[ProfileFunction]
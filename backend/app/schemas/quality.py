@@ -0,0 +1,24 @@
+import uuid
+from datetime import date, datetime
+from typing import List, Optional
+from pydantic import BaseModel
+
+class MeterGapRead(BaseModel):
+    meter_id: uuid.UUID
+    serial_number: str
+    type: str
+    unit_id: uuid.UUID
+    unit_number: str
+    reporting_days: int # Days with at least one reading in the window
+    missing_days: int
+    reporting_rate: float # reporting_days / days in the window
+    longest_gap_days: int # Longest run of missing days in the window, including its start and end
+    last_seen: Optional[datetime] # Last reading ever, also before the window
+    severity: str # stopped, gaps, ok
+
+class BuildingGapReport(BaseModel):
+    building_id: uuid.UUID
+    date_from: date
+    date_to: date # Exclusive
+    days: int
+    meters: List[MeterGapRead]
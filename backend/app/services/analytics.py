@@ -0,0 +1,97 @@
+import uuid
+from datetime import date
+from typing import Tuple
+
+import numpy as np
+from sqlmodel import Session
+
+from ..core.cache import building_cache
+from ..schemas.consumption import BuildingRankingRead, TypeRanking, UnitRanking
+from .billing import load_building_consumption
+
+# |z-score| from which a unit is reported as an outlier
+OUTLIER_Z = 2.0
+
+
+def normalized_stats(consumption: np.ndarray, areas: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Consumption per m² with percentiles and z-scores, for all units and meter types at once.
+    consumption: (units, types); areas: (units,).
+    Returns (per_m2, percentiles, z_scores), all (units, types). Units without a known area get NaN everywhere
+    and are left out of the statistics of the others.
+    """
+    valid_area = areas > 0
+    per_m2 = np.full(consumption.shape, np.nan)
+    np.divide(consumption, areas[:, None], out=per_m2, where=valid_area[:, None])
+
+    valid = ~np.isnan(per_m2)
+    counts = valid.sum(axis=0)
+
+    # Percentile rank: share of the other units using less (ties share the average rank)
+    filled = np.where(valid, per_m2, np.inf)
+    less = (filled[:, None, :] > filled[None, :, :]) & valid[None, :, :]
+    equal = (filled[:, None, :] == filled[None, :, :]) & valid[None, :, :]
+    ranks = less.sum(axis=1) + (equal.sum(axis=1) - 1) / 2.0
+    percentiles = np.where(valid, ranks / np.maximum(counts - 1, 1) * 100.0, np.nan)
+
+    n = np.maximum(counts, 1)
+    mean = np.where(valid, per_m2, 0.0).sum(axis=0) / n
+    std = np.sqrt(np.where(valid, (per_m2 - mean) ** 2, 0.0).sum(axis=0) / n)
+    z_scores = np.full(consumption.shape, np.nan)
+    np.divide(per_m2 - mean, std, out=z_scores, where=valid & (std > 0))
+    z_scores[valid & (std == 0)] = 0.0
+    return per_m2, percentiles, z_scores
+
+
+def _nullable(values: np.ndarray) -> list:
+    return [None if np.isnan(v) else v for v in values.tolist()]
+
+
+def building_ranking(session: Session, building_id: uuid.UUID, period_start: date, period_end: date) -> BuildingRankingRead:
+    """
+    Ranks a building's units by consumption per m² for each meter type in [period_start, period_end).
+    Cached until readings, meters or units of the building change.
+    """
+    key = ("ranking", period_start, period_end)
+    # Before loading: a write committed while computing makes set() drop the stale result
+    generation = building_cache.generation(building_id)
+    cached = building_cache.get(building_id, key)
+    if cached is not None:
+        return cached
+
+    data = load_building_consumption(session, building_id, period_start, period_end)
+    per_m2, percentiles, z_scores = normalized_stats(data.consumption, data.areas)
+
+    types = []
+    for j, meter_type in enumerate(data.types):
+        column = per_m2[:, j]
+        known = column[~np.isnan(column)]
+        units = [
+            UnitRanking(
+                unit_id=unit_id,
+                unit_number=unit_number,
+                area_m2=area,
+                consumption=used,
+                per_m2=normalized,
+                percentile=percentile,
+                z_score=z,
+                outlier=z is not None and abs(z) >= OUTLIER_Z,
+            )
+            for unit_id, unit_number, area, used, normalized, percentile, z in zip(
+                data.unit_ids, data.unit_numbers, data.areas.tolist(), data.consumption[:, j].tolist(),
+                _nullable(column), _nullable(percentiles[:, j]), _nullable(z_scores[:, j]),
+            )
+        ]
+        # Highest usage first, units without area last
+        units.sort(key=lambda u: (u.per_m2 is None, -(u.per_m2 or 0.0)))
+        types.append(TypeRanking(
+            type=meter_type,
+            unit_of_measure=data.units_of_measure[meter_type],
+            mean_per_m2=float(known.mean()) if len(known) else None,
+            median_per_m2=float(np.median(known)) if len(known) else None,
+            units=units,
+        ))
+
+    result = BuildingRankingRead(building_id=building_id, date_from=period_start, date_to=period_end, types=types)
+    building_cache.set(building_id, key, result, generation)
+    return result
@@ -0,0 +1,149 @@
+import math
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Iterable, List, Tuple
+
+from sqlalchemy import insert
+from sqlmodel import Session, delete, select
+
+from ..models.telemetry import Meter, MeterAlert, MeterDetectorState
+from .rollups import to_naive_utc
+
+# Water flowing without a single zero-consumption interval for this long is a leak candidate
+CONTINUOUS_FLOW_HOURS = float(os.getenv("ALERT_CONTINUOUS_FLOW_HOURS", "24"))
+# Readings further apart can't show a zero-flow interval; up to DAILY_FLOW_MAX_GAP_HOURS they are checked
+# with the daily rule below instead, anything coarser (monthly imports) ends the current flow run
+FLOW_MAX_GAP_HOURS = float(os.getenv("ALERT_FLOW_MAX_GAP_HOURS", "3"))
+# Daily readings (Influx sync stores one MAX per day) can't show a pause at night. A leak still keeps the
+# daily consumption from ever dropping low: at least DAILY_FLOW_MIN (meter unit, m3 for water) every day
+# for DAILY_FLOW_DAYS days in a row is flagged as continuous flow.
+DAILY_FLOW_MAX_GAP_HOURS = float(os.getenv("ALERT_DAILY_FLOW_MAX_GAP_HOURS", "36"))
+DAILY_FLOW_MIN = float(os.getenv("ALERT_DAILY_FLOW_MIN", "0.3"))
+DAILY_FLOW_DAYS = float(os.getenv("ALERT_DAILY_FLOW_DAYS", "14"))
+# Counter of a meter that normally consumes, unchanged for this long
+STUCK_HOURS = float(os.getenv("ALERT_STUCK_HOURS", str(7 * 24)))
+# Spike: rate above mean + SPIKE_Z * std and SPIKE_MIN_RATIO * mean, once SPIKE_MIN_SAMPLES steps are known
+SPIKE_Z = float(os.getenv("ALERT_SPIKE_Z", "4"))
+SPIKE_MIN_RATIO = float(os.getenv("ALERT_SPIKE_MIN_RATIO", "3"))
+SPIKE_MIN_SAMPLES = int(os.getenv("ALERT_SPIKE_MIN_SAMPLES", "20"))
+# Rates (per hour, in the meter's unit) never reported as spikes, so a meter idle for weeks
+# (vacant flat, heating off in summer) doesn't alert on its first use; SPIKE_MIN_RATE for other types
+SPIKE_MIN_RATES = {"water_cold": 0.05, "water_hot": 0.05, "heat": 1.0, "electricity": 1.0}
+SPIKE_MIN_RATE = float(os.getenv("ALERT_SPIKE_MIN_RATE", "0.05"))
+# Time constant of the rolling rate statistics; time based so a quiet night doesn't wipe them out
+EWMA_WINDOW_HOURS = float(os.getenv("ALERT_EWMA_WINDOW_HOURS", str(7 * 24)))
+# Alerts about readings older than this are not stored: the first sync or a backfill of years of history
+# still trains the detector, but doesn't flood the alerts table with findings nobody can act on
+ALERT_MAX_AGE_HOURS = float(os.getenv("ALERT_MAX_AGE_HOURS", str(7 * 24)))
+
+# Meter types the continuous flow rule applies to (heating legitimately runs all day)
+FLOW_METER_TYPES = ("water_cold", "water_hot")
+
+STATE_FIELDS = ("last_time", "last_value", "rate_mean", "rate_var", "samples", "flow_since", "flow_alerted", "unchanged_since", "stuck_alerted")
+
+
+def detect(state: MeterDetectorState, readings: List[Tuple[datetime, float]]) -> List[dict]:
+    """
+    Runs the detector over new readings (time, value) of one meter, sorted by time, updating state in place.
+    Readings not newer than the state's last reading are skipped (backfills don't rewind the stream).
+    Returns the raised alerts as MeterAlert rows (dicts).
+    """
+    # Plain locals: the loop must stay cheap for big sync batches
+    last_time, last_value, mean, var, samples, flow_since, flow_alerted, unchanged_since, stuck_alerted = (
+        getattr(state, field) for field in STATE_FIELDS
+    )
+    meter_id = state.meter_id
+    watch_flow = state.meter_type in FLOW_METER_TYPES
+    min_spike_rate = SPIKE_MIN_RATES.get(state.meter_type, SPIKE_MIN_RATE)
+    alerts = []
+
+    def alert(kind, t, v, detail):
+        alerts.append({"meter_id": meter_id, "kind": kind, "time": t, "value": v, "detail": detail})
+
+    for t, v in readings:
+        if t <= last_time:
+            continue
+        hours = (t - last_time).total_seconds() / 3600.0
+        delta = v - last_value
+
+        if delta < 0:
+            alert("negative_delta", t, v, f"Counter dropped by {-delta:g} (from {last_value:g})")
+            unchanged_since, stuck_alerted = None, False
+            last_time, last_value = t, v
+            continue
+
+        rate = delta / hours
+        threshold = max(mean + SPIKE_Z * math.sqrt(var), SPIKE_MIN_RATIO * mean, min_spike_rate)
+        if samples >= SPIKE_MIN_SAMPLES and rate > threshold:
+            alert("spike", t, v, f"{rate:g}/h against a typical {mean:g}/h")
+            # Winsorized, so one burst neither hides the next nor freezes the statistics
+            rate = threshold
+        # Plain running mean while the history is short, so the start isn't biased towards zero
+        alpha = max(1.0 - math.exp(-hours / EWMA_WINDOW_HOURS), 1.0 / (samples + 1))
+        diff = rate - mean
+        mean += alpha * diff
+        var = (1 - alpha) * (var + alpha * diff * diff)
+        samples += 1
+
+        if delta == 0:
+            if unchanged_since is None:
+                unchanged_since = last_time
+            if not stuck_alerted and mean > 0 and (t - unchanged_since).total_seconds() >= STUCK_HOURS * 3600:
+                alert("stuck", t, v, f"Value unchanged since {unchanged_since.isoformat()}")
+                stuck_alerted = True
+        else:
+            unchanged_since, stuck_alerted = None, False
+
+        if watch_flow:
+            if hours <= FLOW_MAX_GAP_HOURS:
+                flowing, window_hours = delta > 0, CONTINUOUS_FLOW_HOURS
+            elif hours <= DAILY_FLOW_MAX_GAP_HOURS:
+                flowing, window_hours = delta * 24 / hours >= DAILY_FLOW_MIN, DAILY_FLOW_DAYS * 24
+            else:
+                # Too coarse for either rule, no verdict
+                flowing = False
+            if not flowing:
+                flow_since, flow_alerted = None, False
+            else:
+                if flow_since is None:
+                    flow_since = last_time
+                if not flow_alerted and (t - flow_since).total_seconds() >= window_hours * 3600:
+                    detail = (f"Flow without a pause since {flow_since.isoformat()}" if hours <= FLOW_MAX_GAP_HOURS
+                              else f"At least {DAILY_FLOW_MIN:g} a day since {flow_since.isoformat()}")
+                    alert("continuous_flow", t, v, detail)
+                    flow_alerted = True
+
+        last_time, last_value = t, v
+
+    for field, value in zip(STATE_FIELDS, (last_time, last_value, mean, var, samples, flow_since, flow_alerted, unchanged_since, stuck_alerted)):
+        setattr(state, field, value)
+    return alerts
+
+
+def process_readings(session: Session, meter_id: uuid.UUID, readings: Iterable[Tuple[datetime, float]]) -> List[dict]:
+    """
+    Feeds newly stored readings of one meter to the detector and stores its alerts,
+    except those older than ALERT_MAX_AGE_HOURS. One state lookup per batch; the meter's history is never reloaded. Does not commit.
+    """
+    points = sorted((to_naive_utc(t), v) for t, v in readings)
+    if not points:
+        return []
+
+    state = session.get(MeterDetectorState, meter_id)
+    if state is None:
+        meter_type = session.exec(select(Meter.type).where(Meter.id == meter_id)).first()
+        first_time, first_value = points[0]
+        state = MeterDetectorState(meter_id=meter_id, meter_type=meter_type or "", last_time=first_time, last_value=first_value)
+        session.add(state)
+
+    cutoff = datetime.utcnow() - timedelta(hours=ALERT_MAX_AGE_HOURS)
+    alerts = [a for a in detect(state, points) if a["time"] >= cutoff]
+    if alerts:
+        session.execute(insert(MeterAlert), alerts)
+    return alerts
+
+
+def delete_detector_data(session: Session, meter_id: uuid.UUID) -> None:
+    session.exec(delete(MeterAlert).where(MeterAlert.meter_id == meter_id))
+    session.exec(delete(MeterDetectorState).where(MeterDetectorState.meter_id == meter_id))
@@ -0,0 +1,211 @@
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import insert
+from sqlmodel import Session, create_engine, select
+
+from ..models.property import Unit
+from ..models.telemetry import Meter
+from ..models.billing import Settlement, SettlementItem
+from .consumption import building_rollup_statement, totals_between
+
+# Share of the cost allocated by floor area (základní složka), the rest by measured consumption.
+# Vyhláška č. 269/2015 Sb.: heating 40-50 %, hot water heating 30-40 %. Other types are fully metered.
+DEFAULT_BASIC_SHARES = {
+    "heat": 0.5,
+    "water_hot": 0.3,
+}
+
+
+class BuildingConsumption:
+    """Period consumption of a building as arrays: one row per unit, one column per meter type."""
+    __slots__ = ('unit_ids', 'unit_numbers', 'areas', 'types', 'units_of_measure', 'consumption')
+
+    def __init__(self, unit_ids: List[uuid.UUID], unit_numbers: List[str], areas: np.ndarray, types: List[str], units_of_measure: Dict[str, str], consumption: np.ndarray):
+        self.unit_ids = unit_ids
+        self.unit_numbers = unit_numbers
+        self.areas = areas
+        self.types = types
+        self.units_of_measure = units_of_measure # Meter type -> unit of measure
+        self.consumption = consumption
+
+
+def _as_datetime(d: date) -> datetime:
+    return datetime(d.year, d.month, d.day)
+
+
+def load_building_consumption(session: Session, building_id: uuid.UUID, period_start: date, period_end: date, types: Optional[List[str]] = None) -> BuildingConsumption:
+    """
+    Loads the consumption of every unit and meter type in [period_start, period_end).
+    types defaults to all meter types present in the building.
+    Units and meters come in one query each, the building's rollups (monthly for whole months) in a third one.
+    """
+    units = session.exec(select(Unit.id, Unit.unit_number, Unit.area_m2).where(Unit.building_id == building_id).order_by(Unit.unit_number)).all()
+    meters = session.exec(select(Meter.id, Meter.unit_id, Meter.type, Meter.unit_of_measure).join(Unit).where(Unit.building_id == building_id)).all()
+    units_of_measure = {meter_type: uom for _, _, meter_type, uom in meters}
+    if types is None:
+        types = sorted(units_of_measure)
+
+    start, end = _as_datetime(period_start), _as_datetime(period_end)
+    rows = session.exec(building_rollup_statement(building_id, start, end))
+    totals = totals_between(rows, start, end)
+
+    unit_index = {unit_id: i for i, (unit_id, _, _) in enumerate(units)}
+    type_index = {t: j for j, t in enumerate(types)}
+    consumption = np.zeros((len(units), len(types)), dtype=np.float64)
+    for meter_id, unit_id, meter_type, _ in meters:
+        j = type_index.get(meter_type)
+        if j is not None and meter_id in totals:
+            consumption[unit_index[unit_id], j] += totals[meter_id]
+
+    areas = np.array([area or 0.0 for _, _, area in units], dtype=np.float64)
+    return BuildingConsumption(
+        [unit_id for unit_id, _, _ in units],
+        [number for _, number, _ in units],
+        areas,
+        types,
+        units_of_measure,
+        consumption,
+    )
+
+
+def allocate(costs: np.ndarray, basic_shares: np.ndarray, areas: np.ndarray, consumption: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Splits each cost type across units: basic_shares by area, the rest by measured consumption.
+    costs, basic_shares: (types,); areas: (units,); consumption: (units, types).
+    Returns (basic, consumption_part), both (units, types). A type with no measured consumption
+    is allocated entirely by area.
+    """
+    n_units = len(areas)
+    if n_units == 0:
+        empty = np.zeros((0, len(costs)))
+        return empty, empty
+
+    total_area = areas.sum()
+    area_weights = areas / total_area if total_area > 0 else np.full(n_units, 1.0 / n_units)
+
+    basic = np.outer(area_weights, costs * basic_shares)
+
+    totals = consumption.sum(axis=0)
+    fallback = np.repeat(area_weights[:, None], len(costs), axis=1)
+    weights = np.divide(consumption, totals, out=fallback, where=totals > 0)
+    consumption_part = weights * (costs * (1.0 - basic_shares))
+    return basic, consumption_part
+
+
+def settle_building(
+    session: Session,
+    building_id: uuid.UUID,
+    period_start: date,
+    period_end: date,
+    costs: Dict[str, float],
+    basic_shares: Optional[Dict[str, float]] = None,
+) -> Settlement:
+    """Computes and stores the settlement of one building. Does not commit."""
+    shares = {**DEFAULT_BASIC_SHARES, **(basic_shares or {})}
+    types = sorted(costs)
+    data = load_building_consumption(session, building_id, period_start, period_end, types)
+
+    cost_vector = np.array([costs[t] for t in types], dtype=np.float64)
+    share_vector = np.array([shares.get(t, 0.0) for t in types], dtype=np.float64)
+    basic, consumption_part = allocate(cost_vector, share_vector, data.areas, data.consumption)
+    amounts = basic + consumption_part
+
+    settlement = Settlement(building_id=building_id, period_start=period_start, period_end=period_end)
+    session.add(settlement)
+    session.flush()
+
+    items = [
+        {
+            "settlement_id": settlement.id,
+            "unit_id": unit_id,
+            "cost_type": cost_type,
+            "area_m2": area,
+            "consumption": used,
+            "basic_amount": basic_amount,
+            "consumption_amount": consumption_amount,
+            "amount": amount,
+        }
+        for unit_id, area, used_row, basic_row, consumption_row, amount_row in zip(
+            data.unit_ids, data.areas.tolist(), data.consumption.tolist(), basic.tolist(), consumption_part.tolist(), amounts.tolist()
+        )
+        for cost_type, used, basic_amount, consumption_amount, amount in zip(types, used_row, basic_row, consumption_row, amount_row)
+    ]
+    if items:
+        session.execute(insert(SettlementItem), items)
+    return settlement
+
+
+# --- Batch processing ---
+
+class SettlementRunReport:
+    """Timing report of a batch run."""
+
+    def __init__(self, durations: Dict[uuid.UUID, float], errors: Dict[uuid.UUID, str], wall_time: float, workers: int):
+        self.durations = durations # building_id -> seconds
+        self.errors = errors # building_id -> error message
+        self.wall_time = wall_time
+        self.workers = workers
+
+    def format(self) -> str:
+        done = len(self.durations)
+        lines = [f"Settled {done} buildings ({len(self.errors)} failed) in {self.wall_time:.2f} s with {self.workers} workers"]
+        if done:
+            timings = np.array(list(self.durations.values())) * 1000
+            lines.append(
+                f"per building: mean {timings.mean():.1f} ms, p50 {np.percentile(timings, 50):.1f} ms, "
+                f"p95 {np.percentile(timings, 95):.1f} ms, max {timings.max():.1f} ms; "
+                f"throughput {done / self.wall_time:.1f} buildings/s"
+            )
+        for building_id, error in self.errors.items():
+            lines.append(f"  {building_id}: {error}")
+        return "\n".join(lines)
+
+
+_worker_engine = None
+
+
+def _init_worker(database_url: Optional[str]) -> None:
+    # Each worker process opens its own connections; the ones inherited over fork are dropped
+    global _worker_engine
+    if database_url:
+        _worker_engine = create_engine(database_url)
+    else:
+        from ..core.database import engine
+        engine.dispose(close=False)
+        _worker_engine = engine
+
+
+def _settle_job(job: Tuple) -> Tuple[uuid.UUID, float, Optional[str]]:
+    building_id, period_start, period_end, costs, basic_shares = job
+    started = time.perf_counter()
+    try:
+        with Session(_worker_engine) as session:
+            settle_building(session, building_id, period_start, period_end, costs, basic_shares)
+            session.commit()
+    except Exception as e:
+        return building_id, time.perf_counter() - started, str(e)
+    return building_id, time.perf_counter() - started, None
+
+
+def run_settlements(jobs: List[Tuple], workers: Optional[int] = None, database_url: Optional[str] = None) -> SettlementRunReport:
+    """
+    Settles many buildings in a process pool, each building in its own transaction.
+    jobs: (building_id, period_start, period_end, costs, basic_shares) tuples.
+    database_url defaults to the application database.
+    """
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    durations, errors = {}, {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(database_url,)) as pool:
+        for building_id, duration, error in pool.map(_settle_job, jobs, chunksize=max(1, len(jobs) // (workers * 4))):
+            if error:
+                errors[building_id] = error
+            else:
+                durations[building_id] = duration
+    return SettlementRunReport(durations, errors, time.perf_counter() - started, workers)
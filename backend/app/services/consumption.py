@@ -0,0 +1,178 @@
+from datetime import date, datetime
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+from sqlalchemy import or_
+from sqlalchemy.orm import aliased
+from sqlmodel import select, func
+
+from ..core.series import ReadingSeries, to_epoch
+from ..models.property import Unit
+from ..models.telemetry import Meter, MeterDailyRollup, MeterMonthlyRollup
+
+# numpy datetime64 units for the supported periods
+PERIOD_UNITS = {"day": "D", "month": "M", "year": "Y"}
+
+# A drop below this fraction of the previous value is a counter reset / meter replacement
+# (the new counter starts near zero); smaller drops are negative steps (corrections, noise).
+RESET_RATIO = 0.5
+
+
+class MeterConsumption:
+    """
+    Per-period consumption of one meter. periods are datetime64 period starts;
+    period_resets / period_negative_steps count the steps of each period, so subsets of periods keep exact counts.
+    """
+    __slots__ = ('periods', 'consumption', 'period_resets', 'period_negative_steps')
+
+    def __init__(self, periods: np.ndarray, consumption: np.ndarray, period_resets: np.ndarray = None, period_negative_steps: np.ndarray = None):
+        self.periods = periods
+        self.consumption = consumption
+        self.period_resets = period_resets if period_resets is not None else np.zeros(len(periods), dtype=np.int64)
+        self.period_negative_steps = period_negative_steps if period_negative_steps is not None else np.zeros(len(periods), dtype=np.int64)
+
+    @classmethod
+    def empty(cls, period: str) -> "MeterConsumption":
+        return cls(np.empty(0, dtype=f"datetime64[{PERIOD_UNITS[period]}]"), np.empty(0, dtype=np.float64))
+
+    @property
+    def total(self) -> float:
+        return float(self.consumption.sum())
+
+    @property
+    def resets(self) -> int:
+        return int(self.period_resets.sum())
+
+    @property
+    def negative_steps(self) -> int:
+        return int(self.period_negative_steps.sum())
+
+
+def step_consumption(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Consumption between consecutive readings of a cumulative counter.
+    Returns (deltas, resets, negative_steps); deltas[i] is the consumption from values[i] to values[i + 1].
+
+    - Counter reset / meter replacement (big drop): the new value is counted from zero.
+    - Negative step (small drop): counts as zero, and consumption resumes only once the counter
+      passes its previous maximum again, so noise is never counted twice.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < 2:
+        empty = np.empty(0, dtype=np.float64)
+        return empty, empty.astype(bool), empty.astype(bool)
+
+    prev, curr = values[:-1], values[1:]
+    drops = curr < prev
+    resets = drops & (curr < prev * RESET_RATIO)
+    negative_steps = drops & ~resets
+
+    # Unroll resets: everything after a reset is shifted by the value the old counter ended at
+    offsets = np.concatenate(([0.0], np.cumsum(np.where(resets, prev, 0.0))))
+    unrolled = values + offsets
+    # High-water mark ignores negative steps
+    monotonic = np.maximum.accumulate(unrolled)
+    return np.diff(monotonic), resets, negative_steps
+
+
+def meter_consumption(series: ReadingSeries, period: str = "month") -> MeterConsumption:
+    """
+    Aggregates a meter's step consumption per period (day / month / year, UTC).
+    Each step is attributed to the period of its later reading.
+    """
+    unit = PERIOD_UNITS[period]
+    deltas, resets, negative_steps = step_consumption(series.values)
+    if not len(deltas):
+        return MeterConsumption.empty(period)
+
+    buckets = series.times[1:].astype("datetime64[s]").astype(f"datetime64[{unit}]")
+    periods, inverse = np.unique(buckets, return_inverse=True)
+    consumption = np.bincount(inverse, weights=deltas, minlength=len(periods))
+    period_resets = np.bincount(inverse, weights=resets, minlength=len(periods)).astype(np.int64)
+    period_negative_steps = np.bincount(inverse, weights=negative_steps, minlength=len(periods)).astype(np.int64)
+    return MeterConsumption(periods, consumption, period_resets, period_negative_steps)
+
+
+def iter_meter_series(rows: Iterable[Tuple]) -> Iterator[Tuple[object, ReadingSeries]]:
+    """Groups rows (meter_id, time, value) ordered by meter and time into one series per meter."""
+    current = None
+    rows_of_meter: List[Tuple] = []
+    for meter_id, t, v in rows:
+        if meter_id != current and rows_of_meter:
+            yield current, ReadingSeries.from_rows(rows_of_meter)
+            rows_of_meter = []
+        current = meter_id
+        rows_of_meter.append((t, v))
+    if rows_of_meter:
+        yield current, ReadingSeries.from_rows(rows_of_meter)
+
+
+def consumption_by_meter(rows: Iterable[Tuple], period: str = "month") -> Dict:
+    """
+    Consumption of many meters from rows (meter_id, time, value) ordered by meter and time,
+    e.g. daily rollups of a whole unit or building fetched in one query.
+    """
+    return {meter_id: meter_consumption(series, period) for meter_id, series in iter_meter_series(rows)}
+
+
+def consumption_between(series: ReadingSeries, start: datetime, end: datetime) -> float:
+    """Total consumption of the steps whose later reading falls in [start, end)."""
+    deltas, _, _ = step_consumption(series.values)
+    later = series.times[1:]
+    mask = (later >= to_epoch(start)) & (later < to_epoch(end))
+    return float(deltas[mask].sum())
+
+
+def totals_between(rows: Iterable[Tuple], start: datetime, end: datetime) -> Dict:
+    """consumption_between for many meters, rows as in consumption_by_meter."""
+    return {meter_id: consumption_between(series, start, end) for meter_id, series in iter_meter_series(rows)}
+
+
+def period_start(day: date, period: str) -> datetime:
+    """Start of the period containing day."""
+    start = np.datetime64(day, 'D').astype(f"datetime64[{PERIOD_UNITS[period]}]").astype("datetime64[D]").astype(object)
+    return datetime.combine(start, datetime.min.time())
+
+
+def since(consumption: MeterConsumption, start: date) -> MeterConsumption:
+    """Drops periods that end before start (the period containing start is kept whole), with their resets and negative steps."""
+    mask = consumption.periods >= np.datetime64(start, 'D').astype(consumption.periods.dtype)
+    return MeterConsumption(consumption.periods[mask], consumption.consumption[mask], consumption.period_resets[mask], consumption.period_negative_steps[mask])
+
+
+def period_starts(consumption: MeterConsumption) -> List[date]:
+    """Period starts as datetime.date objects."""
+    return consumption.periods.astype("datetime64[D]").astype(object).tolist()
+
+
+def rollup_for_range(start: datetime, end: datetime):
+    """Monthly rollups when the range is whole months (12 rows a year), daily rollups otherwise."""
+    if start.day == 1 and end.day == 1 and start.time() == end.time() == datetime.min.time():
+        return MeterMonthlyRollup
+    return MeterDailyRollup
+
+
+def building_rollup_statement(building_id, start: datetime, end: datetime, *columns):
+    """
+    Select of (meter_id, bucket, last_value, *columns) for all meters of a building, ordered by meter and bucket,
+    covering [start, end) plus each meter's last bucket before start as the baseline of the first step.
+    Feed the first three columns to totals_between.
+    """
+    rollup = rollup_for_range(start, end)
+    previous = aliased(rollup)
+    baseline = (
+        select(func.max(previous.bucket))
+        .where(previous.meter_id == rollup.meter_id, previous.bucket < start)
+        .scalar_subquery()
+    )
+    return (
+        select(rollup.meter_id, rollup.bucket, rollup.last_value, *columns)
+        .join(Meter, Meter.id == rollup.meter_id)
+        .join(Unit, Unit.id == Meter.unit_id)
+        .where(
+            Unit.building_id == building_id,
+            rollup.bucket < end,
+            or_(rollup.bucket >= start, rollup.bucket == baseline),
+        )
+        .order_by(rollup.meter_id, rollup.bucket)
+    )
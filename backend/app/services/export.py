@@ -0,0 +1,102 @@
+import csv
+import io
+import uuid
+from datetime import datetime
+from typing import Iterator, Optional
+
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from ..models.property import Unit
+from ..models.telemetry import Meter, MeterReading
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional, CSV always works
+    pa = None
+
+# Rows fetched from the cursor (and written as one CSV chunk / Parquet row group) at a time
+EXPORT_BATCH_SIZE = 10000
+
+EXPORT_COLUMNS = ("time", "unit_number", "serial_number", "type", "unit_of_measure", "value", "is_manual")
+
+
+def export_statement(building_id: uuid.UUID, start: Optional[datetime] = None, end: Optional[datetime] = None):
+    """Readings of all meters of a building in [start, end), in (meter, time) order so the (meter_id, time) index serves it."""
+    statement = (
+        select(
+            MeterReading.time, Unit.unit_number, Meter.serial_number, Meter.type, Meter.unit_of_measure,
+            MeterReading.value, MeterReading.is_manual,
+        )
+        .join(Meter, Meter.id == MeterReading.meter_id)
+        .join(Unit, Unit.id == Meter.unit_id)
+        .where(Unit.building_id == building_id)
+    )
+    if start:
+        statement = statement.where(MeterReading.time >= start)
+    if end:
+        statement = statement.where(MeterReading.time < end)
+    return statement.order_by(MeterReading.meter_id, MeterReading.time)
+
+
+def _iter_batches(bind: Engine, statement, batch_size: int) -> Iterator[list]:
+    # Own session: the response body is streamed after the request's session is gone.
+    # stream_results keeps a server-side cursor open, yield_per bounds the rows held in memory.
+    with Session(bind) as session:
+        result = session.exec(statement.execution_options(stream_results=True, yield_per=batch_size))
+        for batch in result.partitions():
+            yield batch
+
+
+def iter_csv(bind: Engine, statement, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    """CSV export in chunks of batch_size rows; times in ISO 8601 (UTC)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    yield buffer.getvalue().encode()
+
+    for batch in _iter_batches(bind, statement, batch_size):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows((t.isoformat(), *rest) for t, *rest in batch)
+        yield buffer.getvalue().encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands out what was written since the last drain."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_parquet(bind: Engine, statement, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    """Parquet export, one row group per batch_size rows. Requires pyarrow."""
+    schema = pa.schema([
+        ("time", pa.timestamp("us", tz="UTC")),
+        ("unit_number", pa.string()),
+        ("serial_number", pa.string()),
+        ("type", pa.string()),
+        ("unit_of_measure", pa.string()),
+        ("value", pa.float64()),
+        ("is_manual", pa.bool_()),
+    ])
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+        for batch in _iter_batches(bind, statement, batch_size):
+            columns = list(zip(*batch))
+            writer.write_table(pa.Table.from_arrays([pa.array(c, type=f.type) for c, f in zip(columns, schema)], schema=schema))
+            yield sink.drain()
+    yield sink.drain()
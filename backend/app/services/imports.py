@@ -0,0 +1,161 @@
+import csv
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+from sqlmodel import Session, select
+
+from ..core.database import upsert_insert
+from ..models.property import Unit
+from ..models.telemetry import Meter, MeterLatest, MeterReading
+from ..schemas.imports import ReadingImportReport, RejectedRow
+from .ingestion import ingest_readings
+from .rollups import to_naive_utc
+
+REQUIRED_COLUMNS = ("serial_number", "time", "value")
+
+
+class ImportFormatError(ValueError):
+    """The file can't be imported at all (e.g. missing columns)."""
+
+
+def _parse_time(text: str) -> datetime:
+    # ISO 8601, date only means midnight; aware times are converted to naive UTC like everywhere else
+    return to_naive_utc(datetime.fromisoformat(text.strip()))
+
+
+def _parse_value(text: str) -> float:
+    # Spreadsheets exported with a Czech locale use decimal commas
+    return float(text.strip().replace(" ", "").replace(",", "."))
+
+
+def _sniff_delimiter(header: str) -> str:
+    return ";" if header.count(";") > header.count(",") else ","
+
+
+def import_readings(
+    session: Session,
+    lines: Iterable[str],
+    allowed_building_ids: Optional[Set[uuid.UUID]] = None,
+    is_manual: bool = True,
+) -> ReadingImportReport:
+    """
+    Imports readings from CSV lines with the columns serial_number, time, value (',' or ';' separated).
+    Rows are rejected when the serial is unknown (or outside allowed_building_ids), the time or value doesn't parse,
+    the row repeats another row of the file, it is older than the meter's last stored reading, or its value
+    is lower than the meter's previous accepted (or stored) reading. Rows already stored for the same meter and time are skipped.
+    Accepted rows are inserted in one statement and go through ingestion. Does not commit.
+
+    The whole file is parsed into memory before validation (the serial, time and value of every row),
+    so very large exports should be split into several uploads.
+    """
+    lines = iter(lines)
+    header = next(lines, "")
+    reader = csv.DictReader([header], delimiter=_sniff_delimiter(header))
+    columns = [c.strip().lower() for c in (reader.fieldnames or [])]
+    missing = [c for c in REQUIRED_COLUMNS if c not in columns]
+    if missing:
+        raise ImportFormatError(f"Missing columns: {', '.join(missing)}")
+    reader = csv.DictReader(lines, fieldnames=columns, delimiter=_sniff_delimiter(header))
+
+    rejected: List[RejectedRow] = []
+    line_numbers, serials, times, values = [], [], [], []
+    rows = 0
+    for rows, row in enumerate(reader, start=1):
+        line = rows + 1
+        serial = (row.get("serial_number") or "").strip()
+        try:
+            t = _parse_time(row.get("time") or "")
+            v = _parse_value(row.get("value") or "")
+        except ValueError:
+            rejected.append(RejectedRow(line=line, serial_number=serial or None, reason="Invalid time or value"))
+            continue
+        line_numbers.append(line)
+        serials.append(serial)
+        times.append(t)
+        values.append(v)
+
+    # Serials resolved in one query
+    meters = {
+        serial: (meter_id, building_id)
+        for serial, meter_id, building_id in session.exec(
+            select(Meter.serial_number, Meter.id, Unit.building_id).join(Unit).where(Meter.serial_number.in_(set(serials)))
+        )
+    } if serials else {}
+
+    meter_ids: List[uuid.UUID] = []
+    meter_index: Dict[uuid.UUID, int] = {}
+    codes = np.full(len(serials), -1, dtype=np.int64)
+    for i, serial in enumerate(serials):
+        meter = meters.get(serial)
+        if meter is None:
+            rejected.append(RejectedRow(line=line_numbers[i], serial_number=serial, reason="Unknown meter"))
+        elif allowed_building_ids is not None and meter[1] not in allowed_building_ids:
+            rejected.append(RejectedRow(line=line_numbers[i], serial_number=serial, reason="Not authorized for this meter"))
+        else:
+            codes[i] = meter_index.setdefault(meter[0], len(meter_index))
+            if codes[i] == len(meter_ids):
+                meter_ids.append(meter[0])
+
+    # Last stored reading of every meter in the file, one query
+    stored_time = np.full(len(meter_ids), np.datetime64("NaT"), dtype="datetime64[us]")
+    stored_value = np.full(len(meter_ids), np.nan)
+    if meter_ids:
+        statement = select(MeterLatest.meter_id, MeterLatest.time, MeterLatest.value).where(MeterLatest.meter_id.in_(meter_ids))
+        for meter_id, t, v in session.exec(statement):
+            stored_time[meter_index[meter_id]] = np.datetime64(t, "us")
+            stored_value[meter_index[meter_id]] = v
+
+    # Vectorized validation: rows sorted by meter and time, each compared with its predecessors
+    known = np.flatnonzero(codes >= 0)
+    inserted = duplicates = 0
+    if len(known):
+        code = codes[known]
+        t = np.array([times[i] for i in known], dtype="datetime64[us]")
+        v = np.array([values[i] for i in known], dtype=np.float64)
+        order = np.lexsort((t, code))
+        known, code, t, v = known[order], code[order], t[order], v[order]
+
+        first = np.ones(len(code), dtype=bool)
+        first[1:] = code[1:] != code[:-1]
+        duplicate_in_file = ~first & (t == np.roll(t, 1))
+        older = t < stored_time[code]  # NaT comparisons are False
+        # Accepted values never decrease, so the previous accepted value is the highest earlier candidate
+        # (or the stored value): a row rejected as lower never becomes the baseline of the next one
+        candidate = np.where(duplicate_in_file | older, -np.inf, v)
+        prev_value = np.fmax(stored_value[code], -np.inf)
+        starts = np.flatnonzero(first)
+        for start, end in zip(starts, np.append(starts[1:], len(code))):
+            highest = np.maximum.accumulate(candidate[start:end - 1])
+            prev_value[start + 1:end] = np.maximum(prev_value[start + 1:end], highest)
+        lower = ~duplicate_in_file & ~older & (v < prev_value)
+        reasons = (
+            (duplicate_in_file, "Duplicate row in the file"),
+            (older, "Older than the last stored reading"),
+            (lower, "Lower than the previous reading"),
+        )
+        bad = np.zeros(len(code), dtype=bool)
+        for mask, reason in reasons:
+            for i in np.flatnonzero(mask & ~bad):
+                row = known[i]
+                rejected.append(RejectedRow(line=line_numbers[row], serial_number=serials[row], reason=reason))
+            bad |= mask
+
+        accepted = [
+            {"meter_id": meter_ids[code[i]], "time": times[known[i]], "value": values[known[i]], "is_manual": is_manual}
+            for i in np.flatnonzero(~bad)
+        ]
+        if accepted:
+            statement = upsert_insert(session, MeterReading).on_conflict_do_nothing(index_elements=["meter_id", "time"]).returning(MeterReading.meter_id, MeterReading.time, MeterReading.value)
+            by_meter = defaultdict(list)
+            for meter_id, t_, v_ in session.execute(statement, accepted):
+                by_meter[meter_id].append((t_, v_))
+            for meter_id, points in by_meter.items():
+                ingest_readings(session, meter_id, points, source="import")
+            inserted = sum(len(points) for points in by_meter.values())
+            duplicates = len(accepted) - inserted
+
+    rejected.sort(key=lambda r: r.line)
+    return ReadingImportReport(rows=rows, inserted=inserted, duplicates=duplicates, rejected=rejected)
@@ -0,0 +1,88 @@
+import uuid
+from datetime import datetime
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session as ORMSession
+from sqlmodel import Session, delete, select
+
+from ..core.cache import building_cache
+from ..core.pubsub import broker
+from ..models.property import Unit
+from ..models.telemetry import Meter, MeterReading
+from .rollups import update_rollups, delete_rollups, to_naive_utc
+from .anomalies import process_readings, delete_detector_data
+from .latest import update_latest, delete_latest
+
+# session.info keys: buildings whose data changed and live events to publish, both once the transaction commits
+TOUCHED_BUILDINGS = "touched_buildings"
+PENDING_EVENTS = "pending_events"
+
+
+def touch_building(session: Session, building_id: uuid.UUID) -> None:
+    """Drops the building's cached analytics once the current transaction commits (units, meters or readings changed)."""
+    session.info.setdefault(TOUCHED_BUILDINGS, set()).add(building_id)
+
+
+def _touch_meter(session: Session, meter_id: uuid.UUID) -> Tuple[Optional[uuid.UUID], Optional[uuid.UUID]]:
+    """Marks the meter's building as changed; returns (unit_id, building_id)."""
+    row = session.exec(select(Unit.id, Unit.building_id).join(Meter).where(Meter.id == meter_id)).first()
+    if row is None:
+        return None, None
+    touch_building(session, row[1])
+    return row
+
+
+def _queue_event(session: Session, unit_id: uuid.UUID, building_id: uuid.UUID, event: str, data: dict) -> None:
+    session.info.setdefault(PENDING_EVENTS, []).append((unit_id, building_id, event, data))
+
+
+@event.listens_for(ORMSession, "after_commit")
+def _after_commit(session) -> None:
+    # Only after commit, so no request recomputes from the old data after the invalidation
+    # (one already computing is caught by the cache generation) and subscribers never see readings that end up rolled back
+    touched = session.info.pop(TOUCHED_BUILDINGS, None)
+    if touched:
+        building_cache.invalidate(touched)
+    for unit_id, building_id, event_name, data in session.info.pop(PENDING_EVENTS, ()):
+        broker.publish(("unit", unit_id), (event_name, data))
+        broker.publish(("building", building_id), (event_name, data))
+
+
+@event.listens_for(ORMSession, "after_rollback")
+def _after_rollback(session) -> None:
+    session.info.pop(TOUCHED_BUILDINGS, None)
+    session.info.pop(PENDING_EVENTS, None)
+
+
+def ingest_readings(session: Session, meter_id: uuid.UUID, readings: Iterable[Tuple[datetime, float]], source: str = "sync") -> None:
+    """
+    Single entry point for derived data of newly stored readings.
+    source: where they came from (sync, manual, push, import), kept with the meter's latest value.
+    Runs in the caller's transaction, before its commit.
+    """
+    readings = [(to_naive_utc(t), v) for t, v in readings]
+    if not readings:
+        return
+    update_rollups(session, meter_id, readings)
+    update_latest(session, meter_id, readings, source)
+    alerts = process_readings(session, meter_id, readings)
+
+    unit_id, building_id = _touch_meter(session, meter_id)
+    if unit_id is not None:
+        # Live update: the newest reading of the batch, not the whole batch (a sync can bring years of history)
+        t, v = max(readings, key=lambda r: r[0])
+        _queue_event(session, unit_id, building_id, "reading", {
+            "meter_id": meter_id, "unit_id": unit_id, "time": t, "value": v, "count": len(readings), "source": source,
+        })
+        for alert in alerts:
+            _queue_event(session, unit_id, building_id, "alert", {**alert, "unit_id": unit_id})
+
+
+def delete_meter_readings(session: Session, meter_id: uuid.UUID) -> None:
+    """Deletes all readings of a meter together with their derived data (rollups, detector state, alerts, latest value)."""
+    _touch_meter(session, meter_id)
+    session.exec(delete(MeterReading).where(MeterReading.meter_id == meter_id))
+    delete_rollups(session, meter_id)
+    delete_detector_data(session, meter_id)
+    delete_latest(session, meter_id)
@@ -0,0 +1,67 @@
+import uuid
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import case
+from sqlmodel import Session, delete, select, func
+
+from ..core.database import upsert_insert
+from ..models.property import Unit
+from ..models.telemetry import Meter, MeterLatest, MeterReading
+
+
+def update_latest(session: Session, meter_id: uuid.UUID, points: List[Tuple[datetime, float]], source: str) -> None:
+    """
+    Moves the meter's latest reading forward to the newest of points (naive UTC, any order).
+    One upsert; older points (backfills) leave the row alone.
+    """
+    t, v = max(points, key=lambda p: p[0])
+    statement = upsert_insert(session, MeterLatest).values(meter_id=meter_id, time=t, value=v, source=source, updated_at=datetime.utcnow())
+    statement = statement.on_conflict_do_update(
+        index_elements=["meter_id"],
+        set_={"time": statement.excluded.time, "value": statement.excluded.value, "source": statement.excluded.source, "updated_at": statement.excluded.updated_at},
+        where=statement.excluded.time >= MeterLatest.time,
+    )
+    session.execute(statement)
+
+
+def delete_latest(session: Session, meter_id: uuid.UUID) -> None:
+    session.exec(delete(MeterLatest).where(MeterLatest.meter_id == meter_id))
+
+
+def rebuild_latest(session: Session, meter_id: Optional[uuid.UUID] = None) -> int:
+    """Recomputes meter_latest from meter_readings (all meters or one) with one INSERT ... SELECT. Does not commit."""
+    newest = select(MeterReading.meter_id, func.max(MeterReading.time).label("time")).group_by(MeterReading.meter_id)
+    if meter_id is not None:
+        newest = newest.where(MeterReading.meter_id == meter_id)
+    newest = newest.subquery()
+    rows = (
+        select(
+            MeterReading.meter_id, MeterReading.time, MeterReading.value,
+            case((MeterReading.is_manual, "manual"), else_="sync"), func.now(),
+        )
+        .join(newest, (newest.c.meter_id == MeterReading.meter_id) & (newest.c.time == MeterReading.time))
+    )
+
+    session.exec(delete(MeterLatest).where(MeterLatest.meter_id == meter_id) if meter_id is not None else delete(MeterLatest))
+    result = session.execute(
+        upsert_insert(session, MeterLatest).from_select(["meter_id", "time", "value", "source", "updated_at"], rows)
+    )
+    return result.rowcount
+
+
+def latest_statement(*where):
+    """
+    Latest value of every meter matching where (e.g. Meter.unit_id == ..., Unit.building_id == ...),
+    as MeterLatestRead columns. Meters without readings are included with nulls.
+    """
+    return (
+        select(
+            Meter.id.label("meter_id"), Meter.serial_number, Meter.type, Meter.unit_of_measure, Meter.unit_id, Unit.unit_number,
+            MeterLatest.time, MeterLatest.value, MeterLatest.source,
+        )
+        .join(Unit, Unit.id == Meter.unit_id)
+        .outerjoin(MeterLatest, MeterLatest.meter_id == Meter.id)
+        .where(*where)
+        .order_by(Unit.unit_number, Meter.serial_number)
+    )
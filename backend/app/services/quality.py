@@ -0,0 +1,148 @@
+import uuid
+from datetime import date, datetime, timedelta
+from typing import List
+
+from sqlalchemy import Date, cast
+from sqlmodel import Session, select, func
+
+from ..core.cache import building_cache
+from ..models.property import Unit
+from ..models.telemetry import Meter, MeterDailyRollup, MeterMonthlyRollup
+from ..schemas.quality import BuildingGapReport, MeterGapRead
+
+# A meter whose last STOPPED_DAYS days of the window are all missing has stopped reporting
+STOPPED_DAYS = 3
+# Below this reporting rate a meter has gaps worth a look
+MIN_REPORTING_RATE = 0.95
+
+SEVERITY_ORDER = {"stopped": 0, "gaps": 1, "ok": 2}
+SORT_KEYS = {
+    "severity": lambda m: (SEVERITY_ORDER[m.severity], -m.longest_gap_days, m.reporting_rate),
+    "missing_days": lambda m: -m.missing_days,
+    "reporting_rate": lambda m: m.reporting_rate,
+    "last_seen": lambda m: m.last_seen or datetime.min,
+    "unit": lambda m: (m.unit_number, m.serial_number),
+}
+
+
+def _days_between(dialect: str, later, earlier):
+    """Whole days between two midnight timestamps, as SQL."""
+    if dialect == "sqlite":
+        return func.julianday(later) - func.julianday(earlier)
+    # PostgreSQL: date - date is an integer number of days
+    return cast(later, Date) - cast(earlier, Date)
+
+
+def gap_statement(building_id: uuid.UUID, start: datetime, end: datetime, dialect: str = "sqlite"):
+    """
+    One grouped query over the daily rollups: per meter of the building, the number of reporting days
+    in [start, end), the first and last of them, the longest gap between two of them (LAG window function)
+    and the last reading ever (monthly rollups). Meters without any data in the window are included.
+    dialect is the name of the database dialect the statement runs on.
+    """
+    daily = MeterDailyRollup
+    previous_bucket = func.lag(daily.bucket).over(partition_by=daily.meter_id, order_by=daily.bucket)
+    days = (
+        select(
+            daily.meter_id,
+            daily.bucket,
+            (_days_between(dialect, daily.bucket, previous_bucket) - 1).label("gap"),
+        )
+        .where(daily.bucket >= start, daily.bucket < end)
+        .subquery()
+    )
+    per_meter = (
+        select(
+            days.c.meter_id,
+            func.count().label("reporting_days"),
+            func.min(days.c.bucket).label("first_bucket"),
+            func.max(days.c.bucket).label("last_bucket"),
+            func.max(days.c.gap).label("inner_gap"),
+        )
+        .group_by(days.c.meter_id)
+        .subquery()
+    )
+    last_seen = (
+        select(MeterMonthlyRollup.meter_id, func.max(MeterMonthlyRollup.last_time).label("last_seen"))
+        .group_by(MeterMonthlyRollup.meter_id)
+        .subquery()
+    )
+    return (
+        select(
+            Meter.id, Meter.serial_number, Meter.type, Unit.id, Unit.unit_number,
+            per_meter.c.reporting_days, per_meter.c.first_bucket, per_meter.c.last_bucket, per_meter.c.inner_gap,
+            last_seen.c.last_seen,
+        )
+        .join(Unit, Unit.id == Meter.unit_id)
+        .outerjoin(per_meter, per_meter.c.meter_id == Meter.id)
+        .outerjoin(last_seen, last_seen.c.meter_id == Meter.id)
+        .where(Unit.building_id == building_id)
+    )
+
+
+def _as_date(value) -> date:
+    # SQLite hands back subquery datetimes as strings
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _as_datetime(value):
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def building_gap_report(session: Session, building_id: uuid.UUID, date_from: date, date_to: date) -> BuildingGapReport:
+    """Missing days, reporting rate and last-seen time of every meter of a building. Cached until the building's data changes."""
+    key = ("gaps", date_from, date_to)
+    # Read before loading, see BuildingCache
+    generation = building_cache.generation(building_id)
+    cached = building_cache.get(building_id, key)
+    if cached is not None:
+        return cached
+
+    days = (date_to - date_from).days
+    start = datetime.combine(date_from, datetime.min.time())
+    end = datetime.combine(date_to, datetime.min.time())
+
+    meters: List[MeterGapRead] = []
+    for meter_id, serial, meter_type, unit_id, unit_number, reporting, first_bucket, last_bucket, inner_gap, last_seen in session.exec(gap_statement(building_id, start, end, session.get_bind().dialect.name)):
+        reporting = reporting or 0
+        if reporting:
+            leading = (_as_date(first_bucket) - date_from).days
+            trailing = (date_to - _as_date(last_bucket)).days - 1
+            longest_gap = max(leading, trailing, int(inner_gap or 0))
+        else:
+            trailing = longest_gap = days
+
+        rate = reporting / days if days else 1.0
+        if trailing >= min(STOPPED_DAYS, days):
+            severity = "stopped"
+        elif rate < MIN_REPORTING_RATE:
+            severity = "gaps"
+        else:
+            severity = "ok"
+
+        meters.append(MeterGapRead(
+            meter_id=meter_id,
+            serial_number=serial,
+            type=meter_type,
+            unit_id=unit_id,
+            unit_number=unit_number,
+            reporting_days=reporting,
+            missing_days=days - reporting,
+            reporting_rate=rate,
+            longest_gap_days=longest_gap,
+            last_seen=_as_datetime(last_seen),
+            severity=severity,
+        ))
+
+    meters.sort(key=SORT_KEYS["severity"])
+    report = BuildingGapReport(building_id=building_id, date_from=date_from, date_to=date_to, days=days, meters=meters)
+    building_cache.set(building_id, key, report, generation)
+    return report
+
+
+def last_days(days: int = 30) -> tuple:
+    """The last `days` full days, today excluded (its readings may still be arriving)."""
+    today = date.today()
+    return today - timedelta(days=days), today
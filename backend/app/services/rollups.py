@@ -0,0 +1,130 @@
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Callable, Iterable, List, Optional, Tuple, Type
+
+from sqlmodel import Session, select, delete
+
+from ..core.database import upsert_insert
+from ..models.telemetry import MeterReading, MeterRollupBase, MeterDailyRollup, MeterMonthlyRollup
+
+
+def to_naive_utc(dt: datetime) -> datetime:
+    """Readings arrive both naive (UTC) and tz-aware (Influx sync); rollups store naive UTC."""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def day_start(dt: datetime) -> datetime:
+    return datetime(dt.year, dt.month, dt.day)
+
+
+def month_start(dt: datetime) -> datetime:
+    return datetime(dt.year, dt.month, 1)
+
+
+ROLLUPS: List[Tuple[Type[MeterRollupBase], Callable[[datetime], datetime]]] = [
+    (MeterDailyRollup, day_start),
+    (MeterMonthlyRollup, month_start),
+]
+
+ROLLUP_BY_RESOLUTION = {"day": MeterDailyRollup, "month": MeterMonthlyRollup}
+
+
+# Aggregate columns of a rollup row, besides its key (meter_id, bucket)
+ROLLUP_FIELDS = ("first_time", "first_value", "last_time", "last_value", "min_value", "max_value", "delta", "count")
+
+
+def _merge(row: Optional[dict], meter_id: uuid.UUID, bucket: datetime, points: List[Tuple[datetime, float]]) -> dict:
+    # points are sorted by time
+    if row is None:
+        first_time, first_value = points[0]
+        row = {
+            "meter_id": meter_id, "bucket": bucket,
+            "first_time": first_time, "first_value": first_value,
+            "last_time": first_time, "last_value": first_value,
+            "min_value": first_value, "max_value": first_value,
+            "delta": 0.0, "count": 0,
+        }
+
+    for t, v in points:
+        if t < row["first_time"]:
+            row["first_time"], row["first_value"] = t, v
+        if t >= row["last_time"]:
+            row["last_time"], row["last_value"] = t, v
+        row["min_value"] = min(row["min_value"], v)
+        row["max_value"] = max(row["max_value"], v)
+    row["count"] += len(points)
+    row["delta"] = row["last_value"] - row["first_value"]
+    return row
+
+
+def update_rollups(session: Session, meter_id: uuid.UUID, points: Iterable[Tuple[datetime, float]]) -> None:
+    """
+    Folds newly inserted readings (time, value) of one meter into its daily and monthly rollups.
+    Incremental: only the touched buckets are loaded, with one range query per rollup table,
+    and written back with one INSERT ... ON CONFLICT DO UPDATE per rollup table.
+    Does not commit; call it in the same transaction that inserts the readings.
+    """
+    points = sorted((to_naive_utc(t), v) for t, v in points)
+    if not points:
+        return
+
+    for model, bucket_of in ROLLUPS:
+        grouped = defaultdict(list)
+        for t, v in points:
+            grouped[bucket_of(t)].append((t, v))
+
+        # Plain rows rather than entities, the upsert below bypasses the identity map
+        columns = [getattr(model, field) for field in ROLLUP_FIELDS]
+        existing = {
+            row[0]: {"meter_id": meter_id, "bucket": row[0], **dict(zip(ROLLUP_FIELDS, row[1:]))}
+            for row in session.execute(select(model.bucket, *columns).where(
+                model.meter_id == meter_id,
+                model.bucket >= min(grouped),
+                model.bucket <= max(grouped),
+            ))
+        }
+        rows = [_merge(existing.get(bucket), meter_id, bucket, bucket_points) for bucket, bucket_points in grouped.items()]
+        statement = upsert_insert(session, model)
+        statement = statement.on_conflict_do_update(
+            index_elements=["meter_id", "bucket"],
+            set_={field: statement.excluded[field] for field in ROLLUP_FIELDS},
+        )
+        session.execute(statement, rows)
+
+
+def delete_rollups(session: Session, meter_id: uuid.UUID) -> None:
+    for model, _ in ROLLUPS:
+        session.exec(delete(model).where(model.meter_id == meter_id))
+
+
+def rebuild_rollups(session: Session, meter_id: Optional[uuid.UUID] = None, batch_size: int = 10000) -> int:
+    """
+    Recomputes rollups from raw readings (all meters, or one). Used to backfill existing databases.
+    Streams readings ordered by meter and time, so memory is bounded by one meter's buckets.
+    Returns the number of readings processed.
+    """
+    statement = select(MeterReading.meter_id, MeterReading.time, MeterReading.value).order_by(MeterReading.meter_id, MeterReading.time)
+    if meter_id:
+        statement = statement.where(MeterReading.meter_id == meter_id)
+        delete_rollups(session, meter_id)
+    else:
+        for model, _ in ROLLUPS:
+            session.exec(delete(model))
+
+    processed = 0
+    current_meter = None
+    buffer: List[Tuple[datetime, float]] = []
+    for row_meter_id, t, v in session.exec(statement.execution_options(yield_per=batch_size)):
+        if row_meter_id != current_meter and buffer:
+            update_rollups(session, current_meter, buffer)
+            session.flush()
+            buffer = []
+        current_meter = row_meter_id
+        buffer.append((t, v))
+        processed += 1
+    if buffer:
+        update_rollups(session, current_meter, buffer)
+    return processed
@@ -0,0 +1,20 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import Session, SQLModel
+from app.core.database import engine
+import app.models.property  # noqa: F401 - register tables
+from app.services.latest import rebuild_latest
+
+def backfill():
+    # Creates meter_latest if missing, then fills it from meter_readings
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        print("Rebuilding latest reading per meter...")
+        meters = rebuild_latest(session)
+        session.commit()
+        print(f"Backfill complete: {meters} meters.")
+
+if __name__ == "__main__":
+    backfill()
@@ -0,0 +1,20 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import Session, SQLModel
+from app.core.database import engine
+import app.models.property  # noqa: F401 - register tables
+from app.services.rollups import rebuild_rollups
+
+def backfill():
+    # Creates the rollup tables if missing, then recomputes them from meter_readings
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        print("Rebuilding daily and monthly rollups...")
+        processed = rebuild_rollups(session)
+        session.commit()
+        print(f"Backfill complete: {processed} readings rolled up.")
+
+if __name__ == "__main__":
+    backfill()
@@ -0,0 +1,56 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.models.telemetry import MeterDetectorState
+from app.services.anomalies import detect
+
+# Cost of the anomaly detector on a building's daily batch: one day of readings per meter, detector state carried over
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the streaming anomaly detector")
+    parser.add_argument("--meters", type=int, default=200, help="Meters in the building")
+    parser.add_argument("--interval", type=int, default=15, help="Minutes between readings")
+    parser.add_argument("--days", type=int, default=7, help="Daily batches to run")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    start = datetime(2024, 1, 1)
+    per_day = 24 * 60 // args.interval
+    states = [
+        MeterDetectorState(meter_id=uuid.uuid4(), meter_type=("water_cold", "water_hot", "heat")[i % 3], last_time=start, last_value=100.0)
+        for i in range(args.meters)
+    ]
+
+    timings = []
+    alerts = 0
+    for day in range(args.days):
+        day_start = start + timedelta(days=day)
+        times = [day_start + timedelta(minutes=args.interval * (i + 1)) for i in range(per_day)]
+        batches = []
+        for state in states:
+            # Mostly idle meters with bursts of use
+            steps = np.where(rng.random(per_day) < 0.3, rng.uniform(0.0, 0.05, per_day), 0.0)
+            batches.append(list(zip(times, (state.last_value + np.cumsum(steps)).tolist())))
+
+        started = time.perf_counter()
+        for state, batch in zip(states, batches):
+            alerts += len(detect(state, batch))
+        timings.append(time.perf_counter() - started)
+
+    timings = np.array(timings) * 1000
+    print(f"{args.meters} meters x {per_day} readings/day, {args.days} daily batches, {alerts} alerts")
+    print(f"per batch: mean {timings.mean():.1f} ms, max {timings.max():.1f} ms; "
+          f"{args.meters * per_day / (timings.mean() / 1000) / 1e6:.2f} M readings/s")
+
+
+if __name__ == "__main__":
+    main()
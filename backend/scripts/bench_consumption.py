@@ -0,0 +1,52 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+
+import numpy as np
+
+from app.core.series import ReadingSeries
+from app.services.consumption import meter_consumption
+
+# Throughput of the consumption engine: meters per second for daily series of a given length
+
+
+def synthetic_series(meters: int, days: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    start = int(np.datetime64("2021-01-01", "s").astype(np.int64))
+    times = start + np.arange(days, dtype=np.int64) * 86400
+    series = []
+    for i in range(meters):
+        values = 1000.0 + np.cumsum(rng.uniform(0.0, 0.5, days))
+        if i % 10 == 0:
+            # Meter replacement half way through
+            values[days // 2:] -= values[days // 2 - 1]
+        if i % 7 == 0:
+            # A few corrections downwards
+            values[rng.integers(1, days, 3)] -= 0.2
+        series.append(ReadingSeries(times, values))
+    return series
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the consumption engine")
+    parser.add_argument("--meters", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=3 * 365)
+    parser.add_argument("--period", default="month", choices=["day", "month", "year"])
+    args = parser.parse_args()
+
+    series = synthetic_series(args.meters, args.days)
+    started = time.perf_counter()
+    total = 0.0
+    for s in series:
+        total += meter_consumption(s, args.period).total
+    elapsed = time.perf_counter() - started
+
+    print(f"{args.meters} meters x {args.days} days, period={args.period}")
+    print(f"elapsed: {elapsed * 1000:.1f} ms, {args.meters / elapsed:,.0f} meters/s, {args.meters * args.days / elapsed / 1e6:.1f} M readings/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import datetime
+import time
+import uuid
+from typing import List
+
+from fastapi import Depends
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.pool import StaticPool
+
+from app.main import app
+from app.core.database import get_session
+from app.api.deps import get_current_user
+from app.models.property import Building, Unit, User
+from app.models.telemetry import Meter, MeterReading, MeterReadingRead
+
+# Benchmark for GET /telemetry/meters/{id}/readings:
+# bytes and ms per response for the legacy path (response_model validation + default encoder)
+# versus the orjson/trusted-rows path, with and without compression.
+
+
+def build_database(readings: int):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        building = Building(name="Bench", address="Bench 1")
+        session.add(building)
+        session.commit()
+        unit = Unit(unit_number="1", floor=0, area_m2=50.0, building_id=building.id)
+        session.add(unit)
+        session.commit()
+        meter = Meter(serial_number=f"BENCH-{uuid.uuid4().hex[:8]}", type="water_cold", unit_of_measure="m3", unit_id=unit.id)
+        session.add(meter)
+        session.commit()
+        start = datetime.datetime(2015, 1, 1)
+        session.execute(MeterReading.__table__.insert(), [
+            {"meter_id": meter.id, "value": 100.0 + i * 0.37, "is_manual": False, "time": start + datetime.timedelta(hours=i)}
+            for i in range(readings)
+        ])
+        session.commit()
+        return engine, meter.id
+
+
+def install_legacy_route():
+    # The endpoint as it was: ORM objects, response_model validation, default JSON encoder
+    @app.get("/bench/legacy/{meter_id}", response_model=List[MeterReadingRead])
+    def legacy_readings(meter_id: uuid.UUID, session: Session = Depends(get_session)):
+        return session.exec(select(MeterReading).where(MeterReading.meter_id == meter_id).order_by(MeterReading.time.desc())).all()
+
+
+def measure(client: TestClient, url: str, encoding: str, repeat: int):
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(url, headers={"Accept-Encoding": encoding})
+        timings.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.text
+        size = int(response.headers.get("content-length", len(response.content)))
+    timings.sort()
+    return size, timings[len(timings) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark readings response encoding")
+    parser.add_argument("--readings", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine, meter_id = build_database(args.readings)
+
+    def get_session_override():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = get_session_override
+    app.dependency_overrides[get_current_user] = lambda: User(email="bench@homiq.cz", role="admin")
+    install_legacy_route()
+    client = TestClient(app)
+
+    cases = [
+        ("legacy (pydantic + json)", f"/bench/legacy/{meter_id}"),
+        ("orjson trusted rows", f"/telemetry/meters/{meter_id}/readings"),
+        ("orjson compact", f"/telemetry/meters/{meter_id}/readings?format=compact"),
+    ]
+    print(f"{args.readings} readings, median of {args.repeat} runs")
+    print(f"{'path':<28}{'encoding':<10}{'bytes':>12}{'ms':>10}")
+    for name, url in cases:
+        for encoding in ("identity", "gzip", "br"):
+            size, ms = measure(client, url, encoding, args.repeat)
+            print(f"{name:<28}{encoding:<10}{size:>12}{ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
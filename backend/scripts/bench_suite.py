@@ -0,0 +1,230 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import logging
+import platform
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.pool import StaticPool
+
+from app.main import app
+from app.core import influx_utils
+from app.core.database import get_session
+from app.core.metrics import instrument_engine
+from app.core.query_log import capture_requests
+from app.api.deps import get_current_user
+from app.models.property import Building, Unit, User
+from app.models.telemetry import Meter
+from scripts.fake_influx import MEASUREMENTS, SyntheticBuilding, server_process
+
+# End-to-end benchmarks of the Influx import, sync and listing endpoints at several building sizes,
+# against scripts/fake_influx.py running in a child process.
+# Per case and size: SQL statements and Influx queries of one request, median wall time and peak Python memory (tracemalloc).
+# Compares with a stored baseline and exits with 1 on a regression:
+# more statements or queries than the baseline, or time / memory above it by more than the tolerances.
+#
+#   python scripts/bench_suite.py                     # compare with scripts/bench_baseline.json
+#   python scripts/bench_suite.py --update-baseline   # after an intended change, or on a new machine
+#
+# Wall times depend on the machine, keep the baseline from the machine that runs the comparison.
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+DB_NAME = "bench0"
+
+
+class Env(NamedTuple):
+    engine: object
+    client: TestClient
+    building: Building
+    units: List[Unit]
+
+
+class Case(NamedTuple):
+    name: str
+    populated: bool # Units, meters and owners exist before the request
+    fresh: bool # Each run needs its own database
+    request: Callable[[Env, int], Tuple[str, str]] # (env, run) -> (method, url)
+
+
+CASES = [
+    Case("fetch_units", False, True, lambda env, run: ("POST", f"/buildings/{env.building.id}/fetch_units")),
+    Case("reload_units", True, False, lambda env, run: ("POST", f"/buildings/{env.building.id}/reload_units")),
+    # A unit without synced readings every run
+    Case("sync_readings", True, False, lambda env, run: ("POST", f"/units/{env.units[run].id}/sync_readings")),
+    Case("readings_influx", True, False, lambda env, run: ("GET", f"/units/{env.units[0].id}/readings_influx")),
+    Case("read_users", True, False, lambda env, run: ("GET", f"/users/?limit={len(env.units) + 1}")),
+]
+
+
+def build_env(synthetic: SyntheticBuilding, populated: bool) -> Env:
+    engine = instrument_engine(create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool))
+    SQLModel.metadata.create_all(engine)
+    with Session(engine, expire_on_commit=False) as session:
+        admin = User(email="bench@homiq.cz", full_name="Bench Admin", role="admin")
+        building = Building(name="Bench", address="Bench 1", **synthetic.building_fields())
+        session.add_all([admin, building])
+        session.commit()
+        units = []
+        if populated:
+            # Inserted directly, as fetch_units would create them, with an owner each
+            owners = [User(email=f"owner{i}@bench.cz", full_name=f"Owner {i}", role="owner") for i in range(len(synthetic.unit_names))]
+            session.add_all(owners)
+            session.flush()
+            units = [Unit(unit_number=name, floor=0, area_m2=0.0, building_id=building.id, owner_id=owner.id)
+                     for name, owner in zip(synthetic.unit_names, owners)]
+            session.add_all(units)
+            session.flush()
+            unit_ids = {u.unit_number: u.id for u in units}
+            types = {m: t for m, (t, _) in MEASUREMENTS.items()}
+            session.add_all([
+                Meter(serial_number=serial, type=types.get(measurement, "other"), unit_of_measure=MEASUREMENTS.get(measurement, ("", ""))[1], unit_id=unit_ids[unit])
+                for unit, serial, measurement in synthetic.meters
+            ])
+            session.commit()
+
+    def get_session_override():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = get_session_override
+    app.dependency_overrides[get_current_user] = lambda: admin
+    return Env(engine, TestClient(app), building, units)
+
+
+def run_once(env: Env, case: Case, run: int, trace_memory: bool) -> Tuple[float, int, int, int]:
+    """(seconds, SQL statements, Influx queries, peak bytes) of one request."""
+    method, url = case.request(env, run)
+    if trace_memory:
+        tracemalloc.start()
+    with capture_requests() as requests:
+        started = time.perf_counter()
+        response = env.client.request(method, url, headers={"Accept-Encoding": "identity"})
+        elapsed = time.perf_counter() - started
+    peak = 0
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    assert response.status_code == 200, f"{method} {url}: {response.status_code} {response.text[:500]}"
+    stats = requests[-1][2]
+    return elapsed, stats.sql_queries, stats.influx_queries, peak
+
+
+def bench_case(case: Case, synthetic: SyntheticBuilding, repeat: int) -> Dict:
+    """Times repeat runs, then one run under tracemalloc for the peak memory (it slows everything down)."""
+    env = None
+    timings = []
+    sql = influx = peak = 0
+    for run in range(repeat + 1):
+        if env is None or case.fresh:
+            if env is not None:
+                env.engine.dispose()
+            env = build_env(synthetic, case.populated)
+        trace_memory = run == repeat
+        elapsed, sql, influx, run_peak = run_once(env, case, run, trace_memory)
+        if trace_memory:
+            peak = run_peak
+        else:
+            timings.append(elapsed)
+    env.engine.dispose()
+    timings.sort()
+    return {"sql": sql, "influx": influx, "wall_ms": round(timings[len(timings) // 2] * 1000, 1), "peak_kib": round(peak / 1024)}
+
+
+def compare(results: Dict, baseline: Dict, time_tolerance: float, memory_tolerance: float, time_slack_ms: float = 0.0) -> List[str]:
+    """Regressions of results against baseline; keys missing from the baseline are not compared."""
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        for field in ("sql", "influx"):
+            if result[field] > base[field]:
+                regressions.append(f"{key}: {result[field]} {field} round trips, baseline {base[field]}")
+        if result["wall_ms"] > base["wall_ms"] * (1 + time_tolerance) + time_slack_ms:
+            regressions.append(f"{key}: {result['wall_ms']} ms, baseline {base['wall_ms']} ms (+{time_tolerance:.0%} allowed)")
+        if result["peak_kib"] > base["peak_kib"] * (1 + memory_tolerance):
+            regressions.append(f"{key}: peak {result['peak_kib']} KiB, baseline {base['peak_kib']} KiB (+{memory_tolerance:.0%} allowed)")
+    return regressions
+
+
+def change(value: float, base: Optional[float]) -> str:
+    if not base:
+        return ""
+    return f"{(value - base) / base:+.0%}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Influx import, sync and listing endpoints against a baseline")
+    parser.add_argument("--sizes", default="10,100,1000", help="Units per building, comma separated")
+    parser.add_argument("--cases", default=",".join(c.name for c in CASES), help="Comma separated subset of the cases")
+    parser.add_argument("--days", type=int, default=365, help="Days of history per meter")
+    parser.add_argument("--latency", type=float, default=0.0, help="Added Influx latency per query (ms)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case, the median is reported")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--time-tolerance", type=float, default=0.5, help="Allowed wall time increase (0.5 = 50%%)")
+    parser.add_argument("--time-slack-ms", type=float, default=25.0, help="Wall time increase always allowed, absorbs noise of short cases")
+    parser.add_argument("--memory-tolerance", type=float, default=0.25, help="Allowed peak memory increase")
+    parser.add_argument("--verbose", action="store_true", help="Keep the slow request log on")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    selected = args.cases.split(",")
+    cases = [c for c in CASES if c.name in selected]
+    if not args.verbose:
+        # read_users and the imports are over the query budget by design at the larger sizes
+        logging.getLogger("app.core.query_log").setLevel(logging.ERROR)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    results = {}
+    print(f"{len(MEASUREMENTS)} meters per unit x {args.days} days, Influx latency {args.latency} ms, median of {args.repeat} runs")
+    print(f"{'case':<28}{'sql':>8}{'influx':>8}{'ms':>10}{'':>7}{'peak KiB':>10}{'':>7}")
+    for size in sizes:
+        synthetic = SyntheticBuilding(DB_NAME, size, days=args.days)
+        with server_process(units=size, days=args.days, latency_ms=args.latency, prefix="bench") as url:
+            influx_utils.INFLUX_HOST = url
+            for case in cases:
+                key = f"{case.name}@{size}"
+                result = results[key] = bench_case(case, synthetic, min(args.repeat, size - 1) if case.name == "sync_readings" else args.repeat)
+                base = baseline.get(key, {})
+                print(f"{key:<28}{result['sql']:>8}{result['influx']:>8}{result['wall_ms']:>10.1f}{change(result['wall_ms'], base.get('wall_ms')):>7}"
+                      f"{result['peak_kib']:>10}{change(result['peak_kib'], base.get('peak_kib')):>7}")
+    app.dependency_overrides.clear()
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "machine": f"{platform.machine()} {platform.processor() or platform.system()}, Python {platform.python_version()}",
+                "days": args.days,
+                "latency_ms": args.latency,
+                "results": {**baseline, **results},
+            }, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not baseline:
+        print(f"No baseline at {args.baseline}, run with --update-baseline to create one")
+        return
+    regressions = compare(results, baseline, args.time_tolerance, args.memory_tolerance, args.time_slack_ms)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+    print("No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import re
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.pool import StaticPool
+
+from app.main import app
+from app.core import influx_utils
+from app.core.database import get_session
+from app.api.deps import get_current_user
+from app.models.property import Building, Unit, User
+from app.models.telemetry import Meter
+
+# Benchmark of the unit page: the old call sequence (GET /units/{id}, GET /telemetry/meters/?unit_id=,
+# GET /units/{id}/readings_influx) versus GET /units/{id}/dashboard.
+# Influx is simulated in-process with a fixed latency per request; counts HTTP calls, SQL statements and Influx queries.
+
+MEASUREMENTS = {"sv_l": "water_cold", "tv_l": "water_hot", "teplo_kWh": "heat"}
+
+
+class FakeInflux:
+    def __init__(self, serials, days, latency_ms):
+        self.measurement_of = {sn: list(MEASUREMENTS)[i % len(MEASUREMENTS)] for i, sn in enumerate(serials)}
+        self.values = [[86400 * d, 100.0 + d * 0.3] for d in range(days)]
+        self.latency = latency_ms / 1000
+        self.queries = 0
+
+    def get(self, url, params=None, auth=None, stream=False):
+        self.queries += 1
+        time.sleep(self.latency)
+        q = params["q"]
+        measurements = re.findall(r'"([^"]+)"', q.split(" WHERE ")[0].split(" FROM ")[1])
+        regex = re.search(r"=~ /\^\((.*)\)\$/", q)
+        if regex:
+            serials = [s.replace("\\", "") for s in regex.group(1).split("|")]
+        else:
+            serials = re.findall(r"= '([^']*)'", q)
+        series = [
+            {"name": self.measurement_of[sn], "tags": {"sn": sn}, "columns": ["time", "max"], "values": self.values}
+            for sn in serials if self.measurement_of.get(sn) in measurements
+        ]
+        return FakeResponse(json.dumps({"results": [{"statement_id": 0, "series": series}]}).encode())
+
+
+class FakeResponse:
+    def __init__(self, body):
+        self.body = body
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_lines(self):
+        yield self.body
+
+
+def build_database(meters: int):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        building = Building(name="Bench", address="Bench 1", influx_db_name="bench", influx_device_tag="sn",
+                            influx_measurements=",".join(f"{m}[m3,{t}]" for m, t in MEASUREMENTS.items()))
+        session.add(building)
+        session.commit()
+        unit = Unit(unit_number="1", floor=0, area_m2=50.0, building_id=building.id)
+        session.add(unit)
+        session.commit()
+        serials = [f"BENCH-{i}" for i in range(meters)]
+        session.add_all([
+            Meter(serial_number=sn, type=MEASUREMENTS[list(MEASUREMENTS)[i % len(MEASUREMENTS)]], unit_of_measure="m3", unit_id=unit.id)
+            for i, sn in enumerate(serials)
+        ])
+        session.commit()
+        return engine, unit.id, serials
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the unit dashboard endpoint")
+    parser.add_argument("--meters", type=int, default=6)
+    parser.add_argument("--days", type=int, default=3 * 365)
+    parser.add_argument("--latency", type=float, default=5.0, help="Simulated Influx latency per request (ms)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine, unit_id, serials = build_database(args.meters)
+    statements = [0]
+    event.listen(engine, "before_cursor_execute", lambda *a: statements.__setitem__(0, statements[0] + 1))
+
+    def get_session_override():
+        with Session(engine) as session:
+            yield session
+
+    fake = FakeInflux(serials, args.days, args.latency)
+    influx_utils.requests.get = fake.get
+    app.dependency_overrides[get_session] = get_session_override
+    app.dependency_overrides[get_current_user] = lambda: User(email="bench@homiq.cz", role="admin")
+    client = TestClient(app)
+
+    cases = [
+        ("old sequence", [f"/units/{unit_id}", f"/telemetry/meters/?unit_id={unit_id}", f"/units/{unit_id}/readings_influx"]),
+        ("dashboard", [f"/units/{unit_id}/dashboard"]),
+    ]
+    print(f"{args.meters} meters x {args.days} days, Influx latency {args.latency} ms, median of {args.repeat} runs")
+    print(f"{'path':<16}{'requests':>10}{'sql':>8}{'influx':>8}{'bytes':>12}{'ms':>10}")
+    for name, urls in cases:
+        timings = []
+        for _ in range(args.repeat):
+            statements[0] = fake.queries = 0
+            size = 0
+            started = time.perf_counter()
+            for url in urls:
+                response = client.get(url, headers={"Accept-Encoding": "identity"})
+                assert response.status_code == 200, response.text
+                size += len(response.content)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        print(f"{name:<16}{len(urls):>10}{statements[0]:>8}{fake.queries:>8}{size:>12}{timings[len(timings) // 2]:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,431 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import math
+import random
+import re
+import socket
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+from urllib.request import urlopen
+
+# Stand-in for an InfluxDB 1.x /query endpoint serving synthetic buildings, for tests and benchmarks.
+# Understands the InfluxQL the backend sends: SHOW TAG VALUES (WITH KEY, WHERE tag = '...'),
+# SELECT MAX("value") over one or more measurements with = / =~ tag filters, time bounds,
+# GROUP BY time(...)[, tag] fill(none), chunked responses and epoch timestamps.
+# Also SHOW MEASUREMENTS and SHOW TAG KEYS, enough for debug_influx_schema.py.
+#
+#   python scripts/fake_influx.py --buildings 2 --units 100 --days 1095 --latency 5 --port 8087
+#   INFLUX_HOST=http://localhost:8087 uvicorn app.main:app
+
+MEASUREMENTS = {"sv_l": ("water_cold", "m3"), "tv_l": ("water_hot", "m3"), "teplo_kWh": ("heat", "kWh")}
+# Typical daily consumption per measurement, the synthetic counters grow around it
+DAILY_USE = {"sv_l": 0.12, "tv_l": 0.06, "teplo_kWh": 25.0}
+
+_UNITS_SECONDS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+_EPOCH_DIVISORS = {"s": 1, "ms": 10 ** -3, "u": 10 ** -6, "ns": 10 ** -9}
+
+
+class SyntheticBuilding:
+    """
+    One Influx database: units x meters_per_unit counters (measurements taken in turn), one point per day for days days
+    ending the day before end. Values are deterministic for a given database name and serial number.
+    """
+
+    def __init__(self, db_name: str, units: int, meters_per_unit: int = len(MEASUREMENTS), days: int = 365,
+                 measurements: Tuple[str, ...] = tuple(MEASUREMENTS), unit_tag: str = "unit", device_tag: str = "sn",
+                 end: Optional[date] = None):
+        self.db_name = db_name
+        self.unit_tag = unit_tag
+        self.device_tag = device_tag
+        self.measurements = tuple(measurements)
+        self.days = days
+        end = end or date.today()
+        self.start_epoch = int(datetime(end.year, end.month, end.day, tzinfo=timezone.utc).timestamp()) - days * 86400
+        self.unit_names = [f"u{i + 1:04d}" for i in range(units)]
+        # (unit, serial, measurement)
+        self.meters: List[Tuple[str, str, str]] = [
+            (unit, f"{db_name}-{unit}-{m}", self.measurements[m % len(self.measurements)])
+            for unit in self.unit_names for m in range(meters_per_unit)
+        ]
+        self.meter_by_serial = {serial: (unit, measurement) for unit, serial, measurement in self.meters}
+
+    def influx_measurements_config(self) -> str:
+        """Building.influx_measurements value matching this dataset."""
+        return ",".join(f"{m}[{MEASUREMENTS.get(m, ('other', ''))[1]}]" for m in self.measurements)
+
+    def building_fields(self) -> dict:
+        """Influx columns of a Building row pointing at this dataset."""
+        return {
+            "influx_db_name": self.db_name,
+            "influx_unit_tag": self.unit_tag,
+            "influx_device_tag": self.device_tag,
+            "influx_measurements": self.influx_measurements_config(),
+        }
+
+    def times(self) -> range:
+        return range(self.start_epoch, self.start_epoch + self.days * 86400, 86400)
+
+    def values(self, serial: str) -> List[float]:
+        return _cached_counter_values(self.db_name, serial, self.meter_by_serial[serial][1], self.days)
+
+
+def counter_values(db_name: str, serial: str, measurement: str, days: int) -> List[float]:
+    """Daily counter values of one synthetic meter; generate_data.py stores the same values in SQL."""
+    rng = random.Random(f"{db_name}/{serial}")
+    daily = DAILY_USE.get(measurement, 1.0) * rng.uniform(0.5, 1.5)
+    phase = rng.uniform(0, 2 * math.pi)
+    value = round(rng.uniform(0, 1000 * daily), 3)
+    values = []
+    for day in range(days):
+        values.append(value)
+        seasonal = 1 + 0.3 * math.sin(2 * math.pi * day / 365 + phase)
+        value = round(value + daily * seasonal * rng.uniform(0.6, 1.4), 3)
+    return values
+
+
+_cached_counter_values = lru_cache(maxsize=4096)(counter_values)
+
+
+# --- InfluxQL subset ---
+
+class QueryError(Exception):
+    pass
+
+
+def _name(token: str) -> str:
+    return token.strip().strip('"')
+
+
+def _parse_time(literal: str, now: float) -> float:
+    literal = literal.strip()
+    match = re.fullmatch(r"now\(\)\s*(?:-\s*(\d+)([smhdw]))?", literal)
+    if match:
+        return now - (int(match.group(1)) * _UNITS_SECONDS[match.group(2)] if match.group(1) else 0)
+    if literal.startswith("'") and literal.endswith("'"):
+        parsed = datetime.fromisoformat(literal[1:-1].replace("Z", "+00:00"))
+        return (parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)).timestamp()
+    raise QueryError(f"invalid time literal {literal}")
+
+
+def _parse_where(where: str, now: float):
+    """Returns (tag filters [(tag, predicate)], time bounds (lower, upper) with >= / < semantics)."""
+    filters, lower, upper = [], -math.inf, math.inf
+    if not where:
+        return filters, (lower, upper)
+    for condition in re.split(r"\s+AND\s+", where.strip(), flags=re.IGNORECASE):
+        condition = condition.strip().strip("()")
+        match = re.fullmatch(r'"?(\w+)"?\s*=~\s*/(.*)/', condition)
+        if match:
+            pattern = re.compile(match.group(2).replace(r"\/", "/"))
+            filters.append((match.group(1), lambda v, p=pattern: v is not None and p.search(v) is not None))
+            continue
+        match = re.fullmatch(r'"?(\w+)"?\s*(!?=)\s*\'(.*)\'', condition)
+        if match and match.group(1) != "time":
+            tag, op, expected = match.group(1), match.group(2), match.group(3).replace("\\'", "'")
+            filters.append((tag, (lambda v, e=expected: v == e) if op == "=" else (lambda v, e=expected: v != e)))
+            continue
+        match = re.fullmatch(r"time\s*(>=|>|<=|<)\s*(.+)", condition)
+        if match:
+            t = _parse_time(match.group(2), now)
+            if match.group(1) == ">=":
+                lower = max(lower, t)
+            elif match.group(1) == ">":
+                lower = max(lower, t + 1e-9)
+            elif match.group(1) == "<":
+                upper = min(upper, t)
+            else:
+                upper = min(upper, t + 1e-9)
+            continue
+        raise QueryError(f"unsupported condition: {condition}")
+    return filters, (lower, upper)
+
+
+def _format_time(t: int, epoch: Optional[str]):
+    if epoch:
+        return int(t / _EPOCH_DIVISORS[epoch])
+    return datetime.fromtimestamp(t, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class FakeInflux:
+    """Executes the supported statements against SyntheticBuildings; shared by the HTTP server and in-process callers."""
+
+    def __init__(self, buildings: List[SyntheticBuilding]):
+        self.buildings: Dict[str, SyntheticBuilding] = {b.db_name: b for b in buildings}
+
+    def execute(self, db_name: str, statement: str, epoch: Optional[str] = None) -> List[dict]:
+        """Series of one statement; raises QueryError like Influx would report it."""
+        building = self.buildings.get(db_name)
+        if building is None:
+            raise QueryError(f"database not found: {db_name}")
+        statement = statement.strip().rstrip(";")
+
+        if re.fullmatch(r"SHOW\s+MEASUREMENTS", statement, re.IGNORECASE):
+            return [{"name": "measurements", "columns": ["name"], "values": [[m] for m in building.measurements]}]
+
+        match = re.fullmatch(r'SHOW\s+TAG\s+KEYS\s+FROM\s+("[^"]+"|\w+)', statement, re.IGNORECASE)
+        if match:
+            return [{"name": _name(match.group(1)), "columns": ["tagKey"], "values": [[building.device_tag], [building.unit_tag]]}]
+
+        match = re.fullmatch(r'SHOW\s+TAG\s+VALUES\s+FROM\s+("[^"]+"|\w+)\s+WITH\s+KEY\s*=\s*"?(\w+)"?(?:\s+WHERE\s+(.+))?', statement, re.IGNORECASE | re.DOTALL)
+        if match:
+            return self._tag_values(building, _name(match.group(1)), match.group(2), match.group(3))
+
+        match = re.fullmatch(
+            r'SELECT\s+MAX\("?value"?\)\s+FROM\s+(.+?)(?:\s+WHERE\s+(.+?))?\s+GROUP\s+BY\s+time\((\d+)([smhdw])\)\s*(?:,\s*"?(\w+)"?)?(?:\s+fill\(none\))?',
+            statement, re.IGNORECASE | re.DOTALL,
+        )
+        if match:
+            measurements = [_name(m) for m in match.group(1).split(",")]
+            interval = int(match.group(3)) * _UNITS_SECONDS[match.group(4)]
+            return self._select_max(building, measurements, match.group(2), interval, match.group(5), epoch)
+
+        raise QueryError(f"error parsing query: unsupported statement {statement[:80]}")
+
+    def _tag_values(self, building: SyntheticBuilding, measurement: str, key: str, where: Optional[str]) -> List[dict]:
+        filters, _ = _parse_where(where or "", time.time())
+        values = set()
+        for unit, serial, m in building.meters:
+            if m != measurement:
+                continue
+            tags = {building.unit_tag: unit, building.device_tag: serial}
+            if all(predicate(tags.get(tag)) for tag, predicate in filters) and key in tags:
+                values.add(tags[key])
+        if not values:
+            return []
+        return [{"name": measurement, "columns": ["key", "value"], "values": [[key, v] for v in sorted(values)]}]
+
+    def _select_max(self, building: SyntheticBuilding, measurements: List[str], where: Optional[str], interval: int,
+                    group_tag: Optional[str], epoch: Optional[str]) -> List[dict]:
+        filters, (lower, upper) = _parse_where(where or "", time.time())
+        times = [t for t in building.times() if lower <= t < upper]
+        series = []
+        for measurement in measurements:
+            grouped: Dict[Optional[str], Dict[int, float]] = {}
+            for unit, serial, m in building.meters:
+                if m != measurement:
+                    continue
+                tags = {building.unit_tag: unit, building.device_tag: serial}
+                if not all(predicate(tags.get(tag)) for tag, predicate in filters):
+                    continue
+                buckets = grouped.setdefault(tags.get(group_tag) if group_tag else None, {})
+                all_values = building.values(serial)
+                for t in times:
+                    value = all_values[(t - building.start_epoch) // 86400]
+                    bucket = t - t % interval
+                    if value > buckets.get(bucket, -math.inf):
+                        buckets[bucket] = value
+            for tag_value in sorted(grouped, key=lambda v: v or ""):
+                buckets = grouped[tag_value]
+                if not buckets:
+                    continue
+                entry = {"name": measurement, "columns": ["time", "max"], "values": [[_format_time(t, epoch), buckets[t]] for t in sorted(buckets)]}
+                if group_tag:
+                    entry["tags"] = {group_tag: tag_value}
+                series.append(entry)
+        return series
+
+
+def iter_chunks(series: List[dict], chunk_size: int) -> Iterator[dict]:
+    """Influx chunked response: at most chunk_size rows per document, partial flags on unfinished series and results."""
+    if not series:
+        yield {"results": [{"statement_id": 0}]}
+        return
+    for i, entry in enumerate(series):
+        values = entry["values"]
+        for start in range(0, max(len(values), 1), chunk_size):
+            part = {**entry, "values": values[start:start + chunk_size]}
+            last_of_series = start + chunk_size >= len(values)
+            if not last_of_series:
+                part["partial"] = True
+            result = {"statement_id": 0, "series": [part]}
+            if not (last_of_series and i == len(series) - 1):
+                result["partial"] = True
+            yield {"results": [result]}
+
+
+# --- HTTP server ---
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "FakeInfluxServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json") -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/ping":
+            self.send_response(204)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if url.path != "/query":
+            self._send(404, b'{"error":"not found"}')
+            return
+        self._query({k: v[-1] for k, v in parse_qs(url.query).items()})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        params = {k: v[-1] for k, v in parse_qs(urlparse(self.path).query).items()}
+        params.update({k: v[-1] for k, v in parse_qs(self.rfile.read(length).decode()).items()})
+        self._query(params)
+
+    def _query(self, params: dict) -> None:
+        server = self.server
+        server.record(params.get("db", ""), params.get("q", ""))
+        if server.latency:
+            time.sleep(server.latency)
+        epoch = params.get("epoch")
+        statements = [s for s in params.get("q", "").split(";") if s.strip()]
+        if not statements:
+            self._send(400, b'{"error":"missing required parameter \\"q\\""}')
+            return
+        try:
+            results = [(i, server.influx.execute(params.get("db", ""), s, epoch)) for i, s in enumerate(statements)]
+        except QueryError as e:
+            message = str(e)
+            if message.startswith("database not found"):
+                self._send(200, json.dumps({"results": [{"statement_id": 0, "error": message}]}).encode())
+            else:
+                self._send(400, json.dumps({"error": message}).encode())
+            return
+
+        if params.get("chunked") == "true":
+            chunk_size = int(params.get("chunk_size") or 10000)
+            lines = [json.dumps(chunk).encode() + b"\n" for _, series in results for chunk in iter_chunks(series, chunk_size)]
+            self._send(200, b"".join(lines))
+            return
+        body = {"results": [{"statement_id": i, **({"series": series} if series else {})} for i, series in results]}
+        self._send(200, json.dumps(body).encode())
+
+
+class FakeInfluxServer(ThreadingHTTPServer):
+    """
+    Serves FakeInflux over HTTP on localhost. latency_ms is added to every query.
+    Counts queries per database and keeps the recent ones, so callers can assert round trips.
+    """
+    daemon_threads = True
+
+    def __init__(self, buildings: List[SyntheticBuilding], latency_ms: float = 0.0, port: int = 0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.influx = FakeInflux(buildings)
+        self.latency = latency_ms / 1000
+        self.queries: List[Tuple[str, str]] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def record(self, db_name: str, query: str) -> None:
+        with self._lock:
+            self.queries.append((db_name, query))
+
+    def reset_queries(self) -> None:
+        with self._lock:
+            self.queries = []
+
+    def start(self) -> "FakeInfluxServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-influx", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+def synthetic_buildings(count: int, units: int, meters_per_unit: int = len(MEASUREMENTS), days: int = 365, prefix: str = "synthetic",
+                        end: Optional[date] = None) -> List[SyntheticBuilding]:
+    return [SyntheticBuilding(f"{prefix}{i}", units, meters_per_unit, days, end=end) for i in range(count)]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def server_process(buildings: int = 1, units: int = 20, meters: int = len(MEASUREMENTS), days: int = 365,
+                   latency_ms: float = 0.0, prefix: str = "synthetic") -> Iterator[str]:
+    """
+    Runs the server in a child process and yields its URL; used by benchmarks so the server
+    neither competes for the GIL nor shows up in the measured process' memory.
+    """
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--buildings", str(buildings), "--units", str(units), "--meters", str(meters),
+         "--days", str(days), "--latency", str(latency_ms), "--port", str(port), "--prefix", prefix],
+        stdout=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                urlopen(f"{url}/ping", timeout=1).close()
+                break
+            except OSError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("Fake InfluxDB did not start")
+                time.sleep(0.05)
+        yield url
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve synthetic buildings over a fake InfluxDB 1.x /query API")
+    parser.add_argument("--buildings", type=int, default=1)
+    parser.add_argument("--units", type=int, default=20, help="Units per building")
+    parser.add_argument("--meters", type=int, default=len(MEASUREMENTS), help="Meters per unit")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--latency", type=float, default=0.0, help="Added latency per query (ms)")
+    parser.add_argument("--port", type=int, default=8087)
+    parser.add_argument("--prefix", default="synthetic", help="Database names are <prefix>0, <prefix>1, ...")
+    parser.add_argument("--end", type=date.fromisoformat, help="Day after the last point (YYYY-MM-DD), default today")
+    args = parser.parse_args()
+
+    buildings = synthetic_buildings(args.buildings, args.units, args.meters, args.days, args.prefix, args.end)
+    server = FakeInfluxServer(buildings, args.latency, args.port)
+    print(f"Fake InfluxDB on {server.url}: databases {', '.join(b.db_name for b in buildings)}; "
+          f"{args.units} units x {args.meters} meters x {args.days} days each; unit tag \"unit\", device tag \"sn\"")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
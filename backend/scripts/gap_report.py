@@ -0,0 +1,44 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+from datetime import date
+
+from sqlmodel import Session, select
+from app.core.database import engine
+from app.models.property import Building
+import app.models.telemetry  # noqa: F401 - register tables
+from app.services.quality import building_gap_report, last_days
+
+# Daily job: lists meters of every building that stopped reporting or have gaps (one grouped query per building).
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report meters with missing data")
+    parser.add_argument("--days", type=int, default=30, help="Window length, ending yesterday")
+    parser.add_argument("--from", dest="date_from", type=date.fromisoformat, default=None)
+    parser.add_argument("--to", dest="date_to", type=date.fromisoformat, default=None, help="Exclusive")
+    parser.add_argument("--all", action="store_true", help="Also list meters without problems")
+    args = parser.parse_args()
+
+    default_from, default_to = last_days(args.days)
+    date_from, date_to = args.date_from or default_from, args.date_to or default_to
+
+    started = time.perf_counter()
+    with Session(engine) as session:
+        buildings = session.exec(select(Building.id, Building.name)).all()
+        for building_id, name in buildings:
+            report = building_gap_report(session, building_id, date_from, date_to)
+            problems = [m for m in report.meters if args.all or m.severity != "ok"]
+            print(f"{name}: {len(report.meters)} meters, {len(problems)} with problems ({date_from} - {date_to})")
+            for m in problems:
+                last_seen = m.last_seen.isoformat() if m.last_seen else "never"
+                print(f"  [{m.severity}] {m.unit_number} {m.serial_number} ({m.type}): "
+                      f"{m.reporting_rate:.0%} reporting, {m.missing_days} days missing, longest gap {m.longest_gap_days} d, last seen {last_seen}")
+    print(f"{len(buildings)} buildings in {time.perf_counter() - started:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from typing import List, Tuple
+
+from sqlalchemy import create_engine, insert, select
+from sqlmodel import Session, SQLModel
+
+from app.core.database import engine as app_engine
+from app.core.security import get_password_hash
+from app.models.property import Building, Unit, User
+from app.models.telemetry import Meter, MeterDailyRollup, MeterMonthlyRollup, MeterReading
+from app.services.latest import rebuild_latest
+from app.services.rollups import month_start
+from scripts.fake_influx import MEASUREMENTS, SyntheticBuilding, counter_values, synthetic_buildings
+
+# Production-scale synthetic data: N buildings x M units x K meters x years of daily readings,
+# written with batched multi-row INSERTs (readings, daily and monthly rollups, meter_latest).
+# Values and names are the fake Influx dataset's, so the same buildings can be served with
+#   python scripts/fake_influx.py --buildings N --units M --meters K --days D --end <same day>
+# and syncs, dashboards and the SQL copy all agree.
+#
+#   python scripts/generate_data.py --buildings 20 --units 200 --meters 3 --years 3   # 13M readings
+#   python scripts/generate_data.py --url sqlite:///big.db ...                        # keep database.db as is
+#
+# Every user gets the password "password"; owners are owner<b>-<unit>@<prefix>.homiq.cz, managers lord<b>@...
+
+PASSWORD = "password"
+
+
+def rollup_rows(meter_id: uuid.UUID, points: List[Tuple[datetime, float]]) -> Tuple[List[dict], List[dict]]:
+    """Daily and monthly rollup rows of a meter's time-sorted points, as update_rollups would fold them."""
+    def row(bucket, bucket_points):
+        values = [v for _, v in bucket_points]
+        return {
+            "meter_id": meter_id, "bucket": bucket,
+            "first_time": bucket_points[0][0], "first_value": values[0],
+            "last_time": bucket_points[-1][0], "last_value": values[-1],
+            "min_value": min(values), "max_value": max(values),
+            "delta": values[-1] - values[0], "count": len(values),
+        }
+
+    # One point per day, so every daily bucket holds a single reading
+    daily = [row(t, [(t, v)]) for t, v in points]
+    monthly = []
+    start = 0
+    for i in range(1, len(points) + 1):
+        if i == len(points) or month_start(points[i][0]) != month_start(points[start][0]):
+            monthly.append(row(month_start(points[start][0]), points[start:i]))
+            start = i
+    return daily, monthly
+
+
+class Writer:
+    """Buffers rows per table and writes them with one executemany per batch_size rows."""
+
+    def __init__(self, connection, batch_size: int):
+        self.connection = connection
+        self.batch_size = batch_size
+        self.pending = {}
+        self.written = {}
+
+    def add(self, table, rows: List[dict]) -> None:
+        buffer = self.pending.setdefault(table, [])
+        buffer.extend(rows)
+        if len(buffer) >= self.batch_size:
+            self.flush(table)
+
+    def flush(self, table=None) -> None:
+        for t in [table] if table is not None else list(self.pending):
+            rows = self.pending.get(t)
+            if rows:
+                self.connection.execute(insert(t), rows)
+                self.written[t.name] = self.written.get(t.name, 0) + len(rows)
+                self.pending[t] = []
+
+
+def generate(engine, buildings: List[SyntheticBuilding], domain: str, batch_size: int) -> dict:
+    SQLModel.metadata.create_all(engine)
+    types = {m: t for m, (t, _) in MEASUREMENTS.items()}
+    password_hash = get_password_hash(PASSWORD) # Shared, argon2 is slow on purpose
+    started = time.perf_counter()
+    readings = sum(len(b.meters) * b.days for b in buildings)
+
+    with engine.connect() as connection:
+        if engine.dialect.name == "sqlite":
+            # A crash mid-run leaves a half generated database anyway
+            connection.exec_driver_sql("PRAGMA synchronous = OFF")
+        if connection.execute(select(Building.id).where(Building.influx_db_name == buildings[0].db_name)).first():
+            raise SystemExit(f"Buildings with influx_db_name {buildings[0].db_name}... already exist, use another --prefix")
+
+        writer = Writer(connection, batch_size)
+        done = 0
+        for i, synthetic in enumerate(buildings):
+            lord_id, building_id = uuid.uuid4(), uuid.uuid4()
+            writer.add(User.__table__, [{"id": lord_id, "email": f"lord{i}@{domain}", "full_name": f"Manager {i}", "role": "home_lord",
+                                         "status": "active", "password_hash": password_hash, "created_at": datetime.utcnow()}])
+            writer.add(Building.__table__, [{"id": building_id, "name": f"Synthetic House {i}", "address": f"Synthetic Street {i}",
+                                             "manager_id": lord_id, "units_fetched": True, **synthetic.building_fields()}])
+            unit_ids = {}
+            for unit in synthetic.unit_names:
+                owner_id, unit_ids[unit] = uuid.uuid4(), uuid.uuid4()
+                writer.add(User.__table__, [{"id": owner_id, "email": f"owner{i}-{unit}@{domain}", "full_name": f"Owner {i}-{unit}", "role": "owner",
+                                             "status": "active", "password_hash": password_hash, "created_by_id": lord_id, "created_at": datetime.utcnow()}])
+                writer.add(Unit.__table__, [{"id": unit_ids[unit], "unit_number": unit, "floor": 0, "area_m2": 60.0,
+                                             "building_id": building_id, "owner_id": owner_id}])
+            meter_ids = {serial: uuid.uuid4() for _, serial, _ in synthetic.meters}
+            writer.add(Meter.__table__, [
+                {"id": meter_ids[serial], "serial_number": serial, "type": types.get(measurement, "other"),
+                 "unit_of_measure": MEASUREMENTS.get(measurement, ("", ""))[1], "unit_id": unit_ids[unit]}
+                for unit, serial, measurement in synthetic.meters
+            ])
+            # Parents go in before the rows referencing them
+            writer.flush()
+
+            times = [datetime(1970, 1, 1) + timedelta(seconds=t) for t in synthetic.times()]
+            for unit, serial, measurement in synthetic.meters:
+                meter_id = meter_ids[serial]
+                points = list(zip(times, counter_values(synthetic.db_name, serial, measurement, synthetic.days)))
+                writer.add(MeterReading.__table__, [{"meter_id": meter_id, "time": t, "value": v, "is_manual": False} for t, v in points])
+                daily, monthly = rollup_rows(meter_id, points)
+                writer.add(MeterDailyRollup.__table__, daily)
+                writer.add(MeterMonthlyRollup.__table__, monthly)
+                done += len(points)
+            writer.flush()
+            connection.commit()
+            elapsed = time.perf_counter() - started
+            print(f"building {i + 1}/{len(buildings)}: {done:,}/{readings:,} readings, {done / elapsed:,.0f} readings/s")
+
+    with Session(engine) as session:
+        rebuild_latest(session)
+        session.commit()
+    return writer.written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate buildings, units, meters and years of daily readings with bulk inserts")
+    parser.add_argument("--buildings", type=int, default=10)
+    parser.add_argument("--units", type=int, default=100, help="Units per building")
+    parser.add_argument("--meters", type=int, default=len(MEASUREMENTS), help="Meters per unit")
+    parser.add_argument("--years", type=float, default=3, help="History length; --days overrides it")
+    parser.add_argument("--days", type=int)
+    parser.add_argument("--end", type=date.fromisoformat, default=date.today(), help="Day after the last reading (YYYY-MM-DD)")
+    parser.add_argument("--prefix", default="synthetic", help="Influx database names <prefix>0, <prefix>1, ... (fake_influx.py --prefix)")
+    parser.add_argument("--url", help="Database URL, default the app's database")
+    parser.add_argument("--batch", type=int, default=50000, help="Rows per INSERT batch")
+    args = parser.parse_args()
+
+    days = args.days or round(args.years * 365)
+    engine = create_engine(args.url) if args.url else app_engine
+    engine.echo = False
+    buildings = synthetic_buildings(args.buildings, args.units, args.meters, days, args.prefix, args.end)
+    print(f"{args.buildings} buildings x {args.units} units x {args.meters} meters x {days} days = "
+          f"{args.buildings * args.units * args.meters * days:,} readings into {engine.url}")
+
+    started = time.perf_counter()
+    written = generate(engine, buildings, f"{args.prefix}.homiq.cz", args.batch)
+    print(f"Done in {time.perf_counter() - started:.1f} s: " + ", ".join(f"{count:,} {table}" for table, count in written.items()))
+    print(f"Serve the matching Influx data with: python scripts/fake_influx.py --prefix {args.prefix} --buildings {args.buildings} "
+          f"--units {args.units} --meters {args.meters} --days {days} --end {args.end}")
+
+
+if __name__ == "__main__":
+    main()
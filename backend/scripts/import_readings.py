@@ -0,0 +1,44 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+import uuid
+
+from sqlmodel import Session
+from app.core.database import engine
+import app.models.property  # noqa: F401 - register tables
+import app.models.telemetry  # noqa: F401
+from app.services.imports import ImportFormatError, import_readings
+
+# Bulk import of manual readings from a spreadsheet export: serial_number, time, value (',' or ';' separated).
+# Same validation as POST /telemetry/readings/import.
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import manual meter readings from CSV")
+    parser.add_argument("file", help="CSV file")
+    parser.add_argument("--building", type=uuid.UUID, action="append", help="Only accept meters of this building (repeatable)")
+    parser.add_argument("--dry-run", action="store_true", help="Validate and report, store nothing")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    with open(args.file, encoding="utf-8-sig", newline="") as f, Session(engine) as session:
+        try:
+            report = import_readings(session, f, set(args.building) if args.building else None)
+        except ImportFormatError as e:
+            sys.exit(f"Cannot import {args.file}: {e}")
+        if args.dry_run:
+            session.rollback()
+        else:
+            session.commit()
+
+    print(f"{report.rows} rows: {report.inserted} inserted, {report.duplicates} already stored, {len(report.rejected)} rejected"
+          f"{' (dry run)' if args.dry_run else ''} in {time.perf_counter() - started:.2f} s")
+    for row in report.rejected:
+        print(f"  line {row.line}: {row.serial_number or '-'}: {row.reason}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import random
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from typing import Dict, Iterator, List, Optional
+
+import requests
+from sqlmodel import Session, SQLModel, select
+
+from app.core.database import engine
+from app.core.security import get_password_hash
+from app.models.property import Building, Unit, User
+from app.models.telemetry import Meter
+from scripts.fake_influx import MEASUREMENTS, SyntheticBuilding, free_port, server_process
+
+# Load generator for one backend instance: virtual users of all three roles log in and replay the
+# frontend's flows, results are reported per endpoint (throughput, latency percentiles, errors).
+# Local only: it writes its users into the app's database (backend/database.db, the one the backend under test reads)
+# with emails @load.homiq.cz and the fixed password below, including an admin. It refuses to run without
+# --write-users, so it is never pointed at a database with real accounts by accident.
+#
+#   python scripts/load_test.py --write-users --serve --users 50 --duration 60
+#       starts the fake Influx and uvicorn itself (INFLUX_HOST pointing at the fake)
+#   python scripts/load_test.py --write-users --url http://localhost:8000 --users 50
+#       against a running backend; start the matching fake Influx with
+#       python scripts/fake_influx.py --prefix load --buildings 5 --units 40
+
+EMAIL_DOMAIN = "load.homiq.cz"
+PASSWORD = "loadtest"
+DEFAULT_MIX = "owner:80,home_lord:15,admin:5"
+
+
+# --- Seeding ---
+
+def synthetic_buildings(buildings: int, units: int, days: int) -> List[SyntheticBuilding]:
+    return [SyntheticBuilding(f"load{i}", units, days=days) for i in range(buildings)]
+
+
+def seed(buildings: List[SyntheticBuilding]) -> Dict[str, List[str]]:
+    """
+    Creates an admin, a manager per building and an owner per unit, with units and meters matching
+    the synthetic Influx buildings. Buildings seeded by an earlier run (their manager exists) are kept as they are.
+    Returns the emails of all load test users in the database by role.
+    """
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        existing = set(session.exec(select(User.email).where(User.email.like(f"%@{EMAIL_DOMAIN}"))).all())
+        # argon2 is slow on purpose, every seeded user shares one hash
+        password_hash = get_password_hash(PASSWORD)
+        admin = session.exec(select(User).where(User.email == f"admin@{EMAIL_DOMAIN}")).first()
+        if admin is None:
+            admin = User(email=f"admin@{EMAIL_DOMAIN}", full_name="Load Admin", role="admin", password_hash=password_hash)
+            session.add(admin)
+        types = {m: t for m, (t, _) in MEASUREMENTS.items()}
+        for i, synthetic in enumerate(buildings):
+            if f"lord{i}@{EMAIL_DOMAIN}" in existing:
+                continue
+            lord = User(email=f"lord{i}@{EMAIL_DOMAIN}", full_name=f"Load Manager {i}", role="home_lord", password_hash=password_hash, created_by_id=admin.id)
+            building = Building(name=f"Load House {i}", address=f"Load Street {i}", manager_id=lord.id, units_fetched=True, **synthetic.building_fields())
+            owners = [
+                User(email=f"owner{i}-{unit}@{EMAIL_DOMAIN}", full_name=f"Load Owner {i}-{unit}", role="owner", password_hash=password_hash, created_by_id=lord.id)
+                for unit in synthetic.unit_names
+            ]
+            units = [
+                Unit(unit_number=unit, floor=0, area_m2=60.0, building_id=building.id, owner_id=owner.id)
+                for unit, owner in zip(synthetic.unit_names, owners)
+            ]
+            unit_ids = {u.unit_number: u.id for u in units}
+            meters = [
+                Meter(serial_number=serial, type=types.get(measurement, "other"), unit_of_measure=MEASUREMENTS.get(measurement, ("", ""))[1], unit_id=unit_ids[unit])
+                for unit, serial, measurement in synthetic.meters
+            ]
+            session.add_all([lord, building, *owners, *units, *meters])
+        session.commit()
+
+        emails = {"admin": [], "home_lord": [], "owner": []}
+        for email, role in session.exec(select(User.email, User.role).where(User.email.like(f"%@{EMAIL_DOMAIN}")).order_by(User.email)):
+            emails.setdefault(role, []).append(email)
+    return emails
+
+
+# --- Statistics ---
+
+class Stats:
+    """Latencies and errors per endpoint, shared by all virtual users."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.flows: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float, error: Optional[str]) -> None:
+        with self._lock:
+            self.latencies[name].append(seconds)
+            if error:
+                self.errors[name][error] += 1
+
+    def flow_done(self, role: str) -> None:
+        with self._lock:
+            self.flows[role] += 1
+
+    def report(self, elapsed: float) -> dict:
+        endpoints = {}
+        for name in sorted(self.latencies):
+            latencies = sorted(self.latencies[name])
+            errors = sum(self.errors[name].values())
+            endpoints[name] = {
+                "requests": len(latencies),
+                "rps": round(len(latencies) / elapsed, 2),
+                "errors": errors,
+                "error_rate": round(errors / len(latencies), 4),
+                "error_kinds": dict(self.errors[name]),
+                **{f"p{p}_ms": round(percentile(latencies, p) * 1000, 1) for p in (50, 90, 95, 99)},
+                "max_ms": round(latencies[-1] * 1000, 1),
+            }
+        total = sum(e["requests"] for e in endpoints.values())
+        return {
+            "elapsed_s": round(elapsed, 1),
+            "requests": total,
+            "rps": round(total / elapsed, 2),
+            "errors": sum(e["errors"] for e in endpoints.values()),
+            "flows": dict(self.flows),
+            "endpoints": endpoints,
+        }
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p / 100))]
+
+
+# --- Virtual users ---
+
+class VirtualUser:
+    def __init__(self, base_url: str, stats: Stats, think: float, rng: random.Random, timeout: float):
+        self.base_url = base_url
+        self.stats = stats
+        self.think = think
+        self.rng = rng
+        self.timeout = timeout
+        self.http = requests.Session()
+
+    def call(self, name: str, method: str, path: str, **kwargs) -> Optional[requests.Response]:
+        """One request, recorded under name ("GET /units/{id}/dashboard"); None when it failed."""
+        started = time.perf_counter()
+        error = None
+        response = None
+        try:
+            response = self.http.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+            if response.status_code >= 400:
+                error = str(response.status_code)
+        except requests.RequestException as e:
+            error = type(e).__name__
+        self.stats.record(name, time.perf_counter() - started, error)
+        return None if error else response
+
+    def pause(self) -> None:
+        if self.think:
+            time.sleep(self.think * self.rng.uniform(0.5, 1.5))
+
+    def login(self, email: str) -> bool:
+        self.http.headers.pop("Authorization", None)
+        response = self.call("POST /token", "POST", "/token", data={"username": email, "password": PASSWORD})
+        if response is None:
+            return False
+        self.http.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+        return True
+
+    def open_unit(self, unit_id: str, sync_probability: float) -> None:
+        self.call("GET /units/{id}/dashboard", "GET", f"/units/{unit_id}/dashboard")
+        self.pause()
+        if self.rng.random() < sync_probability:
+            self.call("POST /units/{id}/sync_readings", "POST", f"/units/{unit_id}/sync_readings")
+            self.pause()
+
+    def building_units(self) -> List[dict]:
+        """Building list, then the units of one building, like the frontend's building page."""
+        response = self.call("GET /buildings/", "GET", "/buildings/")
+        self.pause()
+        if response is None or not response.json():
+            return []
+        building = self.rng.choice(response.json())
+        response = self.call("GET /buildings/{id}/units", "GET", f"/buildings/{building['id']}/units")
+        self.pause()
+        return response.json() if response is not None else []
+
+    def owner_flow(self) -> None:
+        units = self.building_units()
+        if units:
+            unit = self.rng.choice(units)
+            # Owners tend to look at their dashboard twice per session
+            self.open_unit(unit["id"], sync_probability=0.1)
+            self.open_unit(unit["id"], sync_probability=0.0)
+
+    def home_lord_flow(self) -> None:
+        units = self.building_units()
+        for unit in self.rng.sample(units, min(3, len(units))):
+            self.open_unit(unit["id"], sync_probability=0.05)
+        self.call("GET /users/", "GET", "/users/")
+        self.pause()
+
+    def admin_flow(self) -> None:
+        self.call("GET /users/", "GET", "/users/")
+        self.pause()
+        units = self.building_units()
+        if units:
+            self.open_unit(self.rng.choice(units)["id"], sync_probability=0.5)
+
+    def run(self, role: str, email: str) -> None:
+        if not self.login(email):
+            self.pause()
+            return
+        self.pause()
+        getattr(self, f"{role}_flow")()
+        self.stats.flow_done(role)
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        role, weight = part.split(":")
+        if role not in ("owner", "home_lord", "admin"):
+            raise ValueError(f"Unknown role {role}")
+        weights[role] = float(weight)
+    return weights
+
+
+def run_load(base_url: str, emails: Dict[str, List[str]], users: int, duration: float, ramp_up: float,
+             think: float, mix: Dict[str, float], timeout: float, seed: int = 0) -> dict:
+    """users virtual users, each repeating a login + flow session of a role drawn from mix until duration is over."""
+    stats = Stats()
+    deadline = time.monotonic() + duration
+    roles = [r for r in mix if emails.get(r)]
+    weights = [mix[r] for r in roles]
+
+    def virtual_user(index: int) -> None:
+        rng = random.Random(seed * 100003 + index)
+        time.sleep(ramp_up * index / max(users, 1))
+        user = VirtualUser(base_url, stats, think, rng, timeout)
+        while time.monotonic() < deadline:
+            role = rng.choices(roles, weights)[0]
+            user.run(role, rng.choice(emails[role]))
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=virtual_user, args=(i,), daemon=True) for i in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return stats.report(time.monotonic() - started)
+
+
+def print_report(report: dict) -> None:
+    print(f"{report['requests']} requests in {report['elapsed_s']} s, {report['rps']} req/s, {report['errors']} errors; "
+          f"flows: {', '.join(f'{role} {count}' for role, count in sorted(report['flows'].items()))}")
+    print(f"{'endpoint':<34}{'requests':>9}{'req/s':>8}{'errors':>8}{'err %':>7}{'p50':>8}{'p90':>8}{'p95':>8}{'p99':>8}{'max':>8}")
+    for name, e in report["endpoints"].items():
+        print(f"{name:<34}{e['requests']:>9}{e['rps']:>8.1f}{e['errors']:>8}{e['error_rate'] * 100:>7.1f}"
+              f"{e['p50_ms']:>8.0f}{e['p90_ms']:>8.0f}{e['p95_ms']:>8.0f}{e['p99_ms']:>8.0f}{e['max_ms']:>8.0f}")
+        if e["error_kinds"]:
+            print(f"{'':<34}errors: {', '.join(f'{kind} x{count}' for kind, count in sorted(e['error_kinds'].items()))}")
+
+
+@contextmanager
+def backend_process(influx_url: str, workers: int, verbose: bool = False) -> Iterator[str]:
+    """uvicorn with the app in a child process, talking to influx_url; its log is dropped unless verbose."""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env={**os.environ, "INFLUX_HOST": influx_url},
+        stdout=subprocess.DEVNULL,
+        stderr=None if verbose else subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                requests.get(f"{url}/health", timeout=1)
+                break
+            except requests.RequestException:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("Backend did not start")
+                time.sleep(0.1)
+        yield url
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay owner, manager and admin sessions against the backend")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="Running backend, e.g. http://localhost:8000")
+    target.add_argument("--serve", action="store_true", help="Start the fake Influx and uvicorn in child processes")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds")
+    parser.add_argument("--ramp-up", type=float, default=5, help="Seconds until all virtual users are running")
+    parser.add_argument("--think", type=float, default=500, help="Mean pause between requests (ms)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Role weights of the sessions")
+    parser.add_argument("--buildings", type=int, default=5, help="Seeded buildings (one manager each)")
+    parser.add_argument("--units", type=int, default=40, help="Units per building (one owner each)")
+    parser.add_argument("--days", type=int, default=365, help="Days of fake Influx history (--serve)")
+    parser.add_argument("--influx-latency", type=float, default=2.0, help="Added fake Influx latency per query (ms, --serve)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers (--serve)")
+    parser.add_argument("--timeout", type=float, default=30, help="Request timeout (s)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the virtual users")
+    parser.add_argument("--verbose", action="store_true", help="Show the backend's log, e.g. slow requests (--serve)")
+    parser.add_argument("--json", help="Also write the report to this file")
+    parser.add_argument("--write-users", action="store_true",
+                        help=f"Confirm writing the load test users (admin included, password '{PASSWORD}') into {engine.url}")
+    args = parser.parse_args()
+    if not args.write_users:
+        parser.error(f"seeds users with a known password, including an admin, into {engine.url}; "
+                     "run it against a local copy only and confirm with --write-users")
+
+    engine.echo = False
+    buildings = synthetic_buildings(args.buildings, args.units, args.days)
+    emails = seed(buildings)
+    print(f"Load test users: {len(emails['owner'])} owners, {len(emails['home_lord'])} managers, {len(emails['admin'])} admin (password '{PASSWORD}')")
+
+    with ExitStack() as stack:
+        url = args.url
+        if args.serve:
+            influx_url = stack.enter_context(server_process(args.buildings, args.units, days=args.days, latency_ms=args.influx_latency, prefix="load"))
+            url = stack.enter_context(backend_process(influx_url, args.workers, args.verbose))
+        print(f"{args.users} virtual users for {args.duration:g} s against {url}, mix {args.mix}")
+        report = run_load(url.rstrip("/"), emails, args.users, args.duration, args.ramp_up, args.think / 1000,
+                          parse_mix(args.mix), args.timeout, args.seed)
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
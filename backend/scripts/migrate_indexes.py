@@ -0,0 +1,45 @@
+import sys
+import os
+from sqlalchemy import inspect, text
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel
+from app.core.database import engine
+import app.models.property  # noqa: F401 - register tables
+import app.models.telemetry  # noqa: F401
+
+def remove_duplicate_readings(connection):
+    # The (meter_id, time) index is unique; keep the oldest row of each duplicate group
+    result = connection.execute(text(
+        "DELETE FROM meter_readings WHERE id NOT IN "
+        "(SELECT MIN(id) FROM meter_readings GROUP BY meter_id, time)"
+    ))
+    if result.rowcount:
+        print(f"Removed {result.rowcount} duplicate readings.")
+
+def migrate():
+    print(f"Connecting to database...")
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    with engine.connect() as connection:
+        for table in SQLModel.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                print(f"Table '{table.name}' does not exist yet, skipping (create_db_and_tables creates it with indexes).")
+                continue
+
+            existing = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in existing:
+                    print(f"Index '{index.name}' already exists.")
+                    continue
+                if table.name == "meter_readings" and index.unique:
+                    remove_duplicate_readings(connection)
+                print(f"Creating index '{index.name}' on '{table.name}'...")
+                index.create(connection)
+        connection.commit()
+    print("Migration successful: indexes are up to date.")
+
+if __name__ == "__main__":
+    migrate()
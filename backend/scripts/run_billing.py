@@ -0,0 +1,47 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import uuid
+from datetime import date
+
+from sqlmodel import Session, select
+from app.core.database import engine
+from app.models.property import Building
+import app.models.telemetry  # noqa: F401 - register tables
+import app.models.billing  # noqa: F401
+from app.services.billing import run_settlements
+
+# Monthly batch: settles every building listed in the costs file in a process pool.
+# Costs file (JSON): {"<building_id>": {"heat": 120000, "water_cold": 40000}, ...}
+# The key "*" applies to all buildings without their own entry.
+
+def main():
+    parser = argparse.ArgumentParser(description="Run building settlements")
+    parser.add_argument("--start", required=True, type=date.fromisoformat, help="Period start, e.g. 2024-01-01")
+    parser.add_argument("--end", required=True, type=date.fromisoformat, help="Period end (exclusive)")
+    parser.add_argument("--costs", required=True, help="Costs JSON file")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    with open(args.costs) as f:
+        costs = json.load(f)
+    default_costs = costs.pop("*", None)
+
+    with Session(engine) as session:
+        building_ids = session.exec(select(Building.id)).all()
+
+    jobs = []
+    for building_id in building_ids:
+        building_costs = costs.get(str(building_id), default_costs)
+        if building_costs:
+            jobs.append((building_id, args.start, args.end, building_costs, None))
+
+    print(f"Settling {len(jobs)} buildings for {args.start} - {args.end}...")
+    report = run_settlements(jobs, workers=args.workers)
+    print(report.format())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import json
+from contextlib import contextmanager
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.pool import StaticPool
+
+from app.main import app
+from app.core.database import get_session
+from app.core.metrics import instrument_engine
+from app.core.query_log import capture_requests, format_statements
+from app.core import influx_utils
+from app.core.tracing import trace_engine
+from app.api.deps import get_current_user
+from app.models.property import Building, Unit, User
+from app.models.telemetry import Meter
+from scripts.fake_influx import FakeInfluxServer, SyntheticBuilding
+
+
+class FakeStreamResponse:
+    """Stands in for a streamed requests response of a chunked Influx query; lines as from iter_lines()."""
+
+    def __init__(self, lines):
+        self.lines = lines
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_lines(self):
+        yield from self.lines
+
+
+def make_chunk(values, partial=True):
+    result = {"statement_id": 0, "series": [{"name": "sv_l", "columns": ["time", "max"], "values": values}]}
+    if partial:
+        result["partial"] = True
+    return json.dumps({"results": [result]}).encode()
+
+
+@pytest.fixture
+def engine():
+    engine = trace_engine(instrument_engine(create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)))
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session(engine):
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def admin(session):
+    user = User(email="admin@homiq.cz", full_name="Admin", role="admin")
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+    return user
+
+
+@pytest.fixture
+def client(engine, admin):
+    """TestClient on an in-memory DB, authenticated as admin (override current_user via app.dependency_overrides)."""
+    def get_session_override():
+        with Session(engine) as session:
+            yield session
+
+    previous = dict(app.dependency_overrides)
+    app.dependency_overrides[get_session] = get_session_override
+    app.dependency_overrides[get_current_user] = lambda: admin
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+    app.dependency_overrides.update(previous)
+
+
+@pytest.fixture
+def make_meter(session):
+    """
+    meter = make_meter("WAT-A1", building={"influx_db_name": "db"}, unit={"area_m2": 80.0})
+    other = make_meter("WAT-A2", type="water_hot", unit_id=meter.unit_id)
+    Adds a meter to the given unit, to a new unit of the given building, or to a new unit of a new building.
+    """
+    def make(serial_number="WAT-A1", type="water_cold", unit_of_measure="m3", unit_id=None, building_id=None, building=None, unit=None):
+        if unit_id is None:
+            if building_id is None:
+                new_building = Building(**{"name": "Sunny Side", "address": "Sunshine 1", **(building or {})})
+                session.add(new_building)
+                session.commit()
+                building_id = new_building.id
+            new_unit = Unit(**{"unit_number": "A1", "floor": 1, "area_m2": 50.0, **(unit or {})}, building_id=building_id)
+            session.add(new_unit)
+            session.commit()
+            unit_id = new_unit.id
+        meter = Meter(serial_number=serial_number, type=type, unit_of_measure=unit_of_measure, unit_id=unit_id)
+        session.add(meter)
+        session.commit()
+        return meter
+    return make
+
+
+@pytest.fixture
+def max_queries():
+    """
+    with max_queries(sql=3, influx=1): client.get(...)
+    Fails if a request made inside the block ran more SQL or InfluxQL statements, listing what it ran.
+    """
+    @contextmanager
+    def check(sql=None, influx=None):
+        with capture_requests() as requests:
+            yield requests
+        assert requests, "No request was made inside max_queries"
+        for method, route, stats in requests:
+            assert sql is None or stats.sql_queries <= sql, (
+                f"{method} {route} ran {stats.sql_queries} SQL statements, expected at most {sql}:\n{format_statements(stats)}"
+            )
+            assert influx is None or stats.influx_queries <= influx, (
+                f"{method} {route} ran {stats.influx_queries} Influx queries, expected at most {influx}:\n{format_statements(stats)}"
+            )
+    return check
+
+
+@pytest.fixture
+def fake_influx(monkeypatch):
+    """
+    server = fake_influx(SyntheticBuilding("db", units=3, days=30), latency_ms=0)
+    Starts scripts/fake_influx.py on a free port and points influx_utils at it; stopped after the test.
+    """
+    servers = []
+
+    def start(*buildings: SyntheticBuilding, latency_ms: float = 0.0) -> FakeInfluxServer:
+        server = FakeInfluxServer(list(buildings), latency_ms).start()
+        servers.append(server)
+        monkeypatch.setattr(influx_utils, "INFLUX_HOST", server.url)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
@@ -0,0 +1,74 @@
+import uuid
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.core.cache import BuildingCache, building_cache
+from app.models.property import Building
+from app.services.analytics import normalized_stats
+from app.services.rollups import update_rollups
+
+
+def test_normalized_stats():
+    consumption = np.array([[10.0], [20.0], [30.0], [5.0]])
+    areas = np.array([10.0, 10.0, 10.0, 0.0])
+    per_m2, percentiles, z_scores = normalized_stats(consumption, areas)
+
+    assert per_m2[:3, 0].tolist() == [1.0, 2.0, 3.0]
+    assert percentiles[:3, 0].tolist() == [0.0, 50.0, 100.0]
+    assert np.allclose(z_scores[:3, 0], [-1.2247, 0.0, 1.2247], atol=1e-4)
+    # Unit without area is left out
+    assert np.isnan(per_m2[3, 0]) and np.isnan(percentiles[3, 0]) and np.isnan(z_scores[3, 0])
+
+
+def test_result_computed_across_an_invalidation_is_not_cached():
+    cache = BuildingCache()
+    building_id = uuid.uuid4()
+    generation = cache.generation(building_id)
+    # A write commits while the result is being computed
+    cache.invalidate([building_id])
+    assert not cache.set(building_id, "key", "stale", generation)
+    assert cache.get(building_id, "key") is None
+
+    assert cache.set(building_id, "key", "fresh", cache.generation(building_id))
+    assert cache.get(building_id, "key") == "fresh"
+
+
+def test_ranking_endpoint_is_cached_until_readings_change(client, session, make_meter):
+    building = Building(name="Riverside", address="River 3")
+    session.add(building)
+    session.commit()
+    start = datetime(2023, 12, 31)
+    meters = []
+    for number, area, daily in (("C1", 50.0, 1.0), ("C2", 100.0, 1.0), ("C3", 50.0, 4.0)):
+        meter = make_meter(f"HEAT-{number}", type="heat", unit_of_measure="kWh", building_id=building.id, unit={"unit_number": number, "area_m2": area})
+        update_rollups(session, meter.id, [(start + timedelta(days=i), 100.0 + daily * i) for i in range(40)])
+        meters.append(meter)
+    session.commit()
+
+    params = {"from": "2024-01-01", "to": "2024-02-01"}
+    response = client.get(f"/buildings/{building.id}/consumption/ranking", params=params)
+    assert response.status_code == 200
+    heat = response.json()["types"][0]
+    assert heat["type"] == "heat"
+    assert [u["unit_number"] for u in heat["units"]] == ["C3", "C1", "C2"]
+    assert heat["units"][0]["per_m2"] == 124.0 / 50.0
+    assert heat["units"][0]["percentile"] == 100.0
+    assert heat["median_per_m2"] == 31.0 / 50.0
+
+    misses = building_cache.misses
+    assert client.get(f"/buildings/{building.id}/consumption/ranking", params=params).json() == response.json()
+    assert building_cache.misses == misses
+
+    # A new reading of the building drops the cached ranking
+    reading = {"meter_id": str(meters[1].id), "value": 10000.0, "time": "2024-01-31T12:00:00"}
+    assert client.post("/telemetry/readings/", json=reading).status_code == 200
+    heat = client.get(f"/buildings/{building.id}/consumption/ranking", params=params).json()["types"][0]
+    assert heat["units"][0]["unit_number"] == "C2"
+
+    # So does a new meter in one of its units
+    misses = building_cache.misses
+    new_meter = {"serial_number": "HEAT-C4", "type": "heat", "unit_of_measure": "kWh", "unit_id": str(meters[0].unit_id)}
+    assert client.post("/telemetry/meters/", json=new_meter).status_code == 200
+    client.get(f"/buildings/{building.id}/consumption/ranking", params=params)
+    assert building_cache.misses == misses + 1
@@ -0,0 +1,120 @@
+import uuid
+from datetime import datetime, timedelta
+
+from sqlmodel import select
+
+from app.models.telemetry import Meter, MeterAlert, MeterDetectorState
+from app.services.anomalies import detect, process_readings
+
+
+def make_state(meter_type="water_cold", start=datetime(2024, 1, 1), value=100.0):
+    return MeterDetectorState(meter_id=uuid.uuid4(), meter_type=meter_type, last_time=start, last_value=value)
+
+
+def hourly(start, values):
+    return [(start + timedelta(hours=i + 1), v) for i, v in enumerate(values)]
+
+
+def kinds(alerts):
+    return [a["kind"] for a in alerts]
+
+
+def test_continuous_flow_is_flagged_once():
+    state = make_state()
+    # Night with a dripping tap: never a zero hour for two days
+    values = [100.0 + 0.01 * (i + 1) for i in range(48)]
+    alerts = detect(state, hourly(datetime(2024, 1, 1), values))
+    assert kinds(alerts) == ["continuous_flow"]
+    assert alerts[0]["time"] == datetime(2024, 1, 2)
+
+    # A pause ends the run, the next one is flagged again
+    more = hourly(state.last_time, [state.last_value] + [state.last_value + 0.01 * (i + 1) for i in range(24)])
+    assert kinds(detect(state, more)) == ["continuous_flow"]
+
+
+def test_heat_meters_are_not_checked_for_continuous_flow():
+    state = make_state("heat")
+    assert detect(state, hourly(datetime(2024, 1, 1), [100.0 + i + 1 for i in range(48)])) == []
+
+
+def daily(start, increments, value=100.0):
+    points = []
+    for i, increment in enumerate(increments):
+        value += increment
+        points.append((start + timedelta(days=i + 1), value))
+    return points
+
+
+def test_daily_readings_flag_consumption_that_never_drops():
+    # Synced data: one value a day. Normal use has low days, a leak keeps every day high.
+    assert "continuous_flow" not in kinds(detect(make_state(), daily(datetime(2024, 1, 1), [0.5, 0.1] * 15)))
+
+    alerts = detect(make_state(), daily(datetime(2024, 1, 1), [0.5] * 30))
+    assert kinds(alerts) == ["continuous_flow"]
+    assert alerts[0]["time"] == datetime(2024, 1, 15)
+    assert alerts[0]["detail"].startswith("At least")
+
+
+def test_spike_threshold_has_a_floor_for_idle_meters():
+    # Vacant flat: weeks of zero consumption give a zero mean and variance
+    state = make_state()
+    values = [100.0] * 30
+    assert detect(state, hourly(datetime(2024, 1, 1), values)) == []
+    assert detect(state, [(state.last_time + timedelta(hours=1), 100.01)]) == []
+    assert kinds(detect(state, [(state.last_time + timedelta(hours=1), 101.0)])) == ["spike"]
+
+
+def test_spike_and_negative_delta():
+    state = make_state()
+    start = datetime(2024, 1, 1)
+    # Normal usage with daily pauses, then a burst, then a counter going back
+    values, v = [], 100.0
+    for i in range(30):
+        v += 0.0 if i % 6 == 0 else 0.1
+        values.append(v)
+    values += [v + 5.0, v + 4.0]
+    alerts = detect(state, hourly(start, values))
+    assert kinds(alerts) == ["spike", "negative_delta"]
+    assert state.last_value == v + 4.0
+
+
+def test_stuck_meter_and_out_of_order_readings():
+    state = make_state("electricity")
+    start = datetime(2024, 1, 1)
+    days = [(start + timedelta(days=i + 1), 100.0 + i + 1) for i in range(5)]
+    days += [(start + timedelta(days=6 + i), 105.0) for i in range(9)]
+    assert kinds(detect(state, days)) == ["stuck"]
+    # Older readings don't rewind the detector
+    assert detect(state, [(start, 0.0)]) == []
+    assert state.last_time == start + timedelta(days=14)
+
+
+def test_alerts_endpoint(client, session, make_meter):
+    meter = make_meter("WAT-D1", unit={"unit_number": "D1"})
+    building = meter.unit.building
+
+    start = datetime.utcnow().replace(microsecond=0) - timedelta(hours=3)
+    for t, v in [(start, 10.0), (start + timedelta(hours=1), 10.5), (start + timedelta(hours=2), 9.0)]:
+        response = client.post("/telemetry/readings/", json={"meter_id": str(meter.id), "value": v, "time": t.isoformat()})
+        assert response.status_code == 200
+
+    alerts = client.get(f"/buildings/{building.id}/alerts").json()
+    assert len(alerts) == 1
+    assert alerts[0]["kind"] == "negative_delta"
+    assert alerts[0]["serial_number"] == "WAT-D1"
+    assert alerts[0]["unit_number"] == "D1"
+    assert client.get(f"/buildings/{building.id}/alerts", params={"kind": "spike"}).json() == []
+
+
+def test_backfill_trains_the_detector_without_storing_old_alerts(session):
+    meter = Meter(serial_number="WAT-E1", type="water_cold", unit_of_measure="m3", unit_id=uuid.uuid4())
+    session.add(meter)
+    session.commit()
+    # A year old history with a counter drop, then a fresh drop
+    old = datetime.utcnow().replace(microsecond=0) - timedelta(days=365)
+    assert process_readings(session, meter.id, [(old, 10.0), (old + timedelta(hours=1), 9.0)]) == []
+    assert session.get(MeterDetectorState, meter.id).last_value == 9.0
+
+    now = datetime.utcnow().replace(microsecond=0)
+    assert kinds(process_readings(session, meter.id, [(now, 8.0)])) == ["negative_delta"]
+    assert len(session.exec(select(MeterAlert).where(MeterAlert.meter_id == meter.id)).all()) == 1
@@ -0,0 +1,79 @@
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.models.property import Building, Unit
+from app.models.telemetry import Meter
+from app.models.billing import Settlement, SettlementItem
+from app.services.billing import allocate, run_settlements
+from app.services.rollups import update_rollups
+
+
+def test_allocate_splits_basic_and_consumption_components():
+    costs = np.array([1000.0, 300.0])  # heat, water_cold
+    shares = np.array([0.5, 0.0])
+    areas = np.array([60.0, 40.0])
+    consumption = np.array([[10.0, 1.0], [30.0, 2.0]])
+
+    basic, consumption_part = allocate(costs, shares, areas, consumption)
+
+    assert np.allclose(basic, [[300.0, 0.0], [200.0, 0.0]])
+    assert np.allclose(consumption_part, [[125.0, 100.0], [375.0, 200.0]])
+    # Everything is allocated
+    assert np.allclose((basic + consumption_part).sum(axis=0), costs)
+
+
+def test_allocate_without_consumption_falls_back_to_area():
+    basic, consumption_part = allocate(np.array([100.0]), np.array([0.0]), np.array([1.0, 3.0]), np.zeros((2, 1)))
+    assert np.allclose(consumption_part[:, 0], [25.0, 75.0])
+    assert np.allclose(basic, 0.0)
+
+
+def make_building(session, name="Sunny Side"):
+    building = Building(name=name, address="Sunshine 1")
+    session.add(building)
+    session.commit()
+    start = datetime(2023, 12, 31)
+    for number, area, daily in (("A1", 60.0, 1.0), ("A2", 40.0, 3.0)):
+        unit = Unit(unit_number=number, floor=1, area_m2=area, building_id=building.id)
+        session.add(unit)
+        session.commit()
+        meter = Meter(serial_number=f"HEAT-{name}-{number}", type="heat", unit_of_measure="kWh", unit_id=unit.id)
+        session.add(meter)
+        session.commit()
+        update_rollups(session, meter.id, [(start + timedelta(days=i), 500.0 + daily * i) for i in range(40)])
+    session.commit()
+    return building
+
+
+def test_settlement_endpoint(client, session):
+    building = make_building(session)
+    response = client.post(f"/buildings/{building.id}/settlements", json={
+        "period_start": "2024-01-01", "period_end": "2024-02-01", "costs": {"heat": 1000.0},
+    })
+    assert response.status_code == 200, response.text
+    items = {item["area_m2"]: item for item in response.json()["items"]}
+
+    assert items[60.0]["consumption"] == 31.0 and items[40.0]["consumption"] == 93.0
+    assert items[60.0]["basic_amount"] == 300.0  # 50 % heat by area
+    assert round(items[60.0]["amount"] + items[40.0]["amount"], 6) == 1000.0
+    assert len(client.get(f"/buildings/{building.id}/settlements").json()) == 1
+
+
+def test_run_settlements_in_process_pool(tmp_path):
+    url = f"sqlite:///{tmp_path / 'billing.db'}"
+    engine = create_engine(url)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        building_ids = [make_building(session, name=f"B{i}").id for i in range(3)]
+
+    jobs = [(building_id, date(2024, 1, 1), date(2024, 2, 1), {"heat": 1000.0}, None) for building_id in building_ids]
+    report = run_settlements(jobs, workers=2, database_url=url)
+
+    assert not report.errors
+    assert set(report.durations) == set(building_ids)
+    assert "Settled 3 buildings" in report.format()
+    with Session(engine) as session:
+        assert len(session.exec(select(Settlement)).all()) == 3
+        assert len(session.exec(select(SettlementItem)).all()) == 6
@@ -0,0 +1,55 @@
+import gzip
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+from app.core.compression import CompressionMiddleware, choose_encoding
+
+BODY = "meter reading " * 500
+
+
+def big(request):
+    return PlainTextResponse(BODY)
+
+
+def small(request):
+    return PlainTextResponse("ok")
+
+
+def stream(request):
+    return StreamingResponse(iter([BODY, BODY]), media_type="text/csv")
+
+
+def events(request):
+    return StreamingResponse(iter(["data: 1\n\n" * 200]), media_type="text/event-stream")
+
+
+app = Starlette(routes=[Route("/big", big), Route("/small", small), Route("/stream", stream), Route("/events", events)])
+app.add_middleware(CompressionMiddleware)
+client = TestClient(app)
+
+
+def test_choose_encoding_respects_q_values():
+    assert choose_encoding("gzip") == "gzip"
+    assert choose_encoding("gzip;q=0.5, br;q=0") == "gzip"
+    assert choose_encoding("identity") is None
+    assert choose_encoding("*;q=0") is None
+
+
+def test_gzip_response_and_vary_header():
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.text == BODY
+
+
+def test_small_and_excluded_responses_are_not_compressed():
+    assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/events", headers={"Accept-Encoding": "gzip"}).headers
+
+
+def test_streaming_response_is_compressed_incrementally():
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+        raw = b"".join(response.iter_raw())
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(raw).decode() == BODY * 2
@@ -0,0 +1,77 @@
+from datetime import datetime
+from array import array
+
+from app.api import units as units_api
+from app.models.telemetry import MeterReading
+
+
+def test_meter_readings_etag(client, session, make_meter):
+    meter = make_meter()
+    session.add(MeterReading(meter_id=meter.id, value=1.0, time=datetime(2024, 1, 1)))
+    session.commit()
+    url = f"/telemetry/meters/{meter.id}/readings"
+
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    # The newest reading time is not a modification time, so there is no date validator
+    assert "last-modified" not in first.headers
+    assert client.get(url, headers={"If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"}).status_code == 200
+
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    # Different representation, different tag
+    assert client.get(url + "?format=compact", headers={"If-None-Match": etag}).status_code == 200
+
+    # A backfilled reading older than the newest one still changes the tag
+    session.add(MeterReading(meter_id=meter.id, value=0.5, time=datetime(2023, 12, 1)))
+    session.commit()
+    changed = client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+def test_readings_influx_304_does_not_query_influx(client, session, monkeypatch, make_meter):
+    meter = make_meter(building={"influx_db_name": "db", "influx_device_tag": "sn", "influx_measurements": "sv_l[m3]"})
+    unit = meter.unit
+    calls = []
+
+    def fake_columns(*args):
+        calls.append(args)
+        return array('q', [86400]), array('d', [5.0])
+
+    monkeypatch.setattr(units_api, "get_meter_columns", fake_columns)
+    url = f"/units/{unit.id}/readings_influx"
+
+    first = client.get(url)
+    assert first.status_code == 200
+    assert len(calls) == 1
+    # Influx data is not part of the tag
+    assert first.headers["etag"].startswith('W/"')
+    max_age = int(first.headers["cache-control"].split("max-age=")[1])
+    assert 0 < max_age <= units_api.READINGS_INFLUX_MAX_AGE
+
+    cached = client.get(url, headers={"If-None-Match": first.headers["etag"]})
+    assert cached.status_code == 304
+    assert len(calls) == 1
+
+    # A synced reading invalidates the tag
+    session.add(MeterReading(meter_id=meter.id, value=5.0, time=datetime(1970, 1, 2)))
+    session.commit()
+    assert client.get(url, headers={"If-None-Match": first.headers["etag"]}).status_code == 200
+    assert len(calls) == 2
+
+
+def test_building_lists_use_content_etags(client, session, make_meter):
+    unit = make_meter().unit
+    building = unit.building
+
+    for url in ("/buildings/", f"/buildings/{building.id}/units"):
+        first = client.get(url)
+        assert first.status_code == 200
+        assert client.get(url, headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+
+    before = client.get(f"/buildings/{building.id}/units").headers["etag"]
+    unit.area_m2 = 61.5
+    session.add(unit)
+    session.commit()
+    assert client.get(f"/buildings/{building.id}/units", headers={"If-None-Match": before}).status_code == 200
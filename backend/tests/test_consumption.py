@@ -0,0 +1,110 @@
+from datetime import datetime, date, timedelta
+
+import numpy as np
+
+from app.core.series import ReadingSeries
+from app.models.property import Building
+from app.services.consumption import step_consumption, meter_consumption, period_starts
+from app.services.rollups import update_rollups
+
+
+def test_plain_counter():
+    deltas, resets, negatives = step_consumption(np.array([10.0, 12.0, 15.5]))
+    assert deltas.tolist() == [2.0, 3.5]
+    assert not resets.any() and not negatives.any()
+
+
+def test_counter_reset_counts_new_value_from_zero():
+    # Meter replaced after 950, the new one starts at 0 and reads 4
+    deltas, resets, negatives = step_consumption(np.array([900.0, 950.0, 4.0, 10.0]))
+    assert deltas.tolist() == [50.0, 4.0, 6.0]
+    assert resets.tolist() == [False, True, False]
+    assert not negatives.any()
+
+
+def test_negative_step_is_not_counted_twice():
+    deltas, resets, negatives = step_consumption(np.array([100.0, 99.5, 100.2, 101.0]))
+    assert np.allclose(deltas, [0.0, 0.2, 0.8])
+    assert negatives.tolist() == [True, False, False]
+    assert not resets.any()
+
+
+def test_short_series():
+    assert len(step_consumption(np.array([5.0]))[0]) == 0
+    assert meter_consumption(ReadingSeries.empty()).total == 0.0
+
+
+def test_monthly_aggregation_attributes_steps_to_later_reading():
+    days = [datetime(2024, 1, 30), datetime(2024, 1, 31), datetime(2024, 2, 1), datetime(2024, 2, 29), datetime(2024, 3, 1)]
+    series = ReadingSeries.from_rows(zip(days, [1.0, 2.0, 4.0, 7.0, 7.5]))
+    result = meter_consumption(series, "month")
+
+    assert period_starts(result) == [date(2024, 1, 1), date(2024, 2, 1), date(2024, 3, 1)]
+    assert result.consumption.tolist() == [1.0, 5.0, 0.5]
+    assert result.total == 6.5
+
+
+def test_unit_consumption_endpoint(client, session, make_meter):
+    meter = make_meter()
+    start = datetime(2023, 12, 31)
+    update_rollups(session, meter.id, [(start + timedelta(days=i), 100.0 + i) for i in range(61)])
+    session.commit()
+
+    data = client.get(f"/units/{meter.unit_id}/consumption?period=month&from=2024-01-01").json()
+    (meter_data,) = data["meters"]
+    assert [(p["start"], p["consumption"]) for p in meter_data["periods"]] == [("2024-01-01", 31.0), ("2024-02-01", 29.0)]
+    assert meter_data["total"] == 60.0
+
+
+def test_unit_consumption_counts_resets_only_in_requested_periods(client, session, make_meter):
+    meter = make_meter("WAT-C1", unit={"unit_number": "C1"})
+    unit = meter.unit
+    # Meter replaced on 2023-12-10, a small negative step on 2024-01-15
+    points = [(datetime(2023, 12, 1) + timedelta(days=i), 500.0 + i) for i in range(9)]
+    points += [(datetime(2023, 12, 10) + timedelta(days=i), 1.0 + i) for i in range(40)]
+    points = [(t, v - 1.5 if t == datetime(2024, 1, 15) else v) for t, v in points]
+    update_rollups(session, meter.id, points)
+    session.commit()
+
+    (meter_data,) = client.get(f"/units/{unit.id}/consumption?period=month&from=2024-01-05").json()["meters"]
+    assert meter_data["resets"] == 0
+    assert meter_data["negative_steps"] == 1
+    # The last December reading is the baseline of January
+    assert [(p["start"], p["consumption"]) for p in meter_data["periods"]] == [("2024-01-01", 18.0)]
+
+    (meter_data,) = client.get(f"/units/{unit.id}/consumption?period=month").json()["meters"]
+    assert meter_data["resets"] == 1
+
+
+def test_building_consumption_endpoint(client, session, make_meter):
+    building = Building(name="Hillside", address="Hill 2")
+    session.add(building)
+    session.commit()
+    b1 = make_meter("WAT-B1", building_id=building.id, unit={"unit_number": "B1", "area_m2": 40.0})
+    b2 = make_meter("WAT-B2", building_id=building.id, unit={"unit_number": "B2", "area_m2": 40.0})
+    meters = [b1, b2, make_meter("HEAT-B1", type="heat", unit_of_measure="GJ", unit_id=b1.unit_id)]
+    start = datetime(2023, 12, 31)
+    for meter, per_day in zip(meters, (1.0, 2.0, 0.5)):
+        update_rollups(session, meter.id, [(start + timedelta(days=i), 10.0 + i * per_day) for i in range(61)])
+    session.commit()
+
+    # Whole month, served from the monthly rollups
+    response = client.get(f"/buildings/{building.id}/consumption", params={"from": "2024-01-01", "to": "2024-02-01"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["source"] == "monthly"
+    totals = {t["type"]: t for t in data["totals"]}
+    assert totals["water_cold"]["consumption"] == 93.0
+    assert totals["water_cold"]["meters"] == 2
+    assert totals["heat"]["consumption"] == 15.5
+    assert totals["heat"]["unit_of_measure"] == "GJ"
+    assert [u["unit_number"] for u in data["units"]] == ["B1", "B2"]
+    assert data["units"][0]["consumption"] == {"water_cold": 31.0, "heat": 15.5}
+
+    # Arbitrary range falls back to the daily rollups
+    response = client.get(f"/buildings/{building.id}/consumption", params={"from": "2024-01-10", "to": "2024-01-20"})
+    data = response.json()
+    assert data["source"] == "daily"
+    assert {t["type"]: t["consumption"] for t in data["totals"]} == {"heat": 5.0, "water_cold": 30.0}
+
+    assert client.get(f"/buildings/{building.id}/consumption", params={"from": "2024-02-01", "to": "2024-01-01"}).status_code == 400
@@ -0,0 +1,59 @@
+import json
+from datetime import datetime
+
+from app.core import influx_utils
+from app.models.property import User
+from app.services.ingestion import ingest_readings
+from tests.conftest import FakeStreamResponse
+
+
+def series(name, sn, values):
+    return {"name": name, "tags": {"sn": sn}, "columns": ["time", "max"], "values": values}
+
+
+def test_influx_regex_escapes_serials():
+    assert influx_utils.influx_regex_any(["A-1", "B/2"]) == r"/^(A\-1|B\/2)$/"
+
+
+def test_unit_dashboard_uses_one_influx_query(client, session, monkeypatch, max_queries, make_meter):
+    owner = User(email="dash@example.com", full_name="Dash Owner", role="owner")
+    session.add(owner)
+    session.commit()
+    cold = make_meter(
+        "SV-1",
+        building={"name": "Dash House", "address": "Board 9", "influx_db_name": "dash", "influx_device_tag": "sn", "influx_measurements": "sv_l[m3],tv_l[m3]"},
+        unit={"unit_number": "I1", "floor": 2, "area_m2": 55.0, "owner_id": owner.id},
+    )
+    hot = make_meter("TV-1", type="water_hot", unit_id=cold.unit_id)
+    unit = cold.unit
+    ingest_readings(session, cold.id, [(datetime(2024, 1, 2), 2.0)])
+    session.commit()
+
+    calls = []
+
+    def fake_get(url, params=None, auth=None, stream=False):
+        calls.append(params)
+        # The serial comes back split over two chunks
+        return FakeStreamResponse([
+            json.dumps({"results": [{"statement_id": 0, "series": [series("sv_l", "SV-1", [[86400, 1.0]])], "partial": True}]}).encode(),
+            json.dumps({"results": [{"statement_id": 0, "series": [series("sv_l", "SV-1", [[172800, 2.0]]), series("tv_l", "TV-1", [[86400, 5.0]])]}]}).encode(),
+        ])
+
+    monkeypatch.setattr(influx_utils.requests, "get", fake_get)
+
+    # The joined dashboard query plus loading the current user
+    with max_queries(sql=2, influx=1):
+        response = client.get(f"/units/{unit.id}/dashboard")
+    assert response.status_code == 200
+    data = response.json()
+
+    assert len(calls) == 1
+    assert calls[0]["q"] == 'SELECT MAX("value") FROM "sv_l","tv_l" WHERE "sn" =~ /^(SV\\-1|TV\\-1)$/ GROUP BY time(1d),"sn" fill(none)'
+    assert data["unit"]["unit_number"] == "I1"
+    assert data["building"]["name"] == "Dash House"
+    assert data["owner"] == {"id": str(owner.id), "email": "dash@example.com", "full_name": "Dash Owner"}
+    meters = {m["serial_number"]: m for m in data["meters"]}
+    assert meters["SV-1"]["series"] == {"t": [86400, 172800], "v": [1.0, 2.0]}
+    assert meters["SV-1"]["latest"]["value"] == 2.0
+    assert meters["TV-1"]["series"] == {"t": [86400], "v": [5.0]}
+    assert meters["TV-1"]["latest"] is None
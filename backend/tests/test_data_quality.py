@@ -0,0 +1,50 @@
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy.dialects import postgresql
+
+from app.services.quality import gap_statement
+from app.services.rollups import update_rollups
+
+
+def test_data_quality_report(client, session, make_meter):
+    healthy = make_meter("E1-healthy", unit={"unit_number": "E1"})
+    gappy, stopped, silent = [make_meter(f"E1-{name}", unit_id=healthy.unit_id) for name in ("gappy", "stopped", "silent")]
+    building = healthy.unit.building
+
+    start = datetime(2024, 1, 1)
+    update_rollups(session, healthy.id, [(start + timedelta(days=i, hours=6), float(i)) for i in range(10)])
+    # Days 3-5 missing
+    update_rollups(session, gappy.id, [(start + timedelta(days=i, hours=6), float(i)) for i in range(10) if i not in (3, 4, 5)])
+    # Nothing since day 5
+    update_rollups(session, stopped.id, [(start + timedelta(days=i, hours=6), float(i)) for i in range(6)])
+    session.commit()
+
+    params = {"from": "2024-01-01", "to": "2024-01-11"}
+    response = client.get(f"/buildings/{building.id}/data_quality", params=params)
+    assert response.status_code == 200
+    report = response.json()
+    assert report["days"] == 10
+    meters = {m["serial_number"]: m for m in report["meters"]}
+
+    assert meters["E1-healthy"]["missing_days"] == 0
+    assert meters["E1-healthy"]["severity"] == "ok"
+    assert meters["E1-gappy"]["reporting_days"] == 7
+    assert meters["E1-gappy"]["longest_gap_days"] == 3
+    assert meters["E1-gappy"]["severity"] == "gaps"
+    assert meters["E1-stopped"]["severity"] == "stopped"
+    assert meters["E1-stopped"]["last_seen"] == "2024-01-06T06:00:00"
+    assert meters["E1-silent"]["reporting_days"] == 0
+    assert meters["E1-silent"]["last_seen"] is None
+    # Worst first
+    assert [m["severity"] for m in report["meters"]][:2] == ["stopped", "stopped"]
+
+    by_unit = client.get(f"/buildings/{building.id}/data_quality", params={**params, "sort": "unit"}).json()
+    assert [m["serial_number"] for m in by_unit["meters"]] == ["E1-gappy", "E1-healthy", "E1-silent", "E1-stopped"]
+
+
+def test_gap_statement_compiles_for_postgresql():
+    statement = gap_statement(uuid.uuid4(), datetime(2024, 1, 1), datetime(2024, 2, 1), "postgresql")
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert "julianday" not in sql
+    assert "CAST(meter_readings_daily.bucket AS DATE) - CAST(lag(meter_readings_daily.bucket)" in sql
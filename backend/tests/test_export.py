@@ -0,0 +1,43 @@
+import csv
+import io
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.telemetry import MeterReading
+from app.services import export
+
+
+@pytest.fixture
+def building(session, make_meter):
+    meter = make_meter("WAT-F1", building={"name": "Export House", "address": "Archive 6"}, unit={"unit_number": "F1"})
+    start = datetime(2024, 1, 1)
+    session.add_all([MeterReading(meter_id=meter.id, time=start + timedelta(hours=i), value=float(i)) for i in range(25)])
+    session.commit()
+    return meter.unit.building
+
+
+def test_csv_export_streams_in_batches(client, session, building):
+    chunks = list(export.iter_csv(session.get_bind(), export.export_statement(building.id), batch_size=10))
+    # Header + 3 batches
+    assert len(chunks) == 4
+
+    response = client.get(f"/buildings/{building.id}/export", params={"from": "2024-01-01", "to": "2024-01-02"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "attachment" in response.headers["content-disposition"]
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == list(export.EXPORT_COLUMNS)
+    assert len(rows) == 25  # header + 24 readings of Jan 1
+    assert rows[1] == ["2024-01-01T00:00:00", "F1", "WAT-F1", "water_cold", "m3", "0.0", "False"]
+
+
+def test_parquet_export(client, session, building):
+    pq = pytest.importorskip("pyarrow.parquet")
+    response = client.get(f"/buildings/{building.id}/export", params={"format": "parquet"})
+    assert response.status_code == 200
+    table = pq.read_table(io.BytesIO(response.content))
+    assert table.num_rows == 25
+    assert table.column_names == list(export.EXPORT_COLUMNS)
+    assert table.column("serial_number").to_pylist() == ["WAT-F1"] * 25
+    assert table.column("value").to_pylist() == [float(i) for i in range(25)]
@@ -0,0 +1,85 @@
+from datetime import date
+
+from sqlmodel import select
+
+from app.core import influx_utils
+from app.models.property import Building, Unit
+from app.models.telemetry import Meter, MeterReading
+from scripts.fake_influx import FakeInflux, SyntheticBuilding, iter_chunks
+
+
+def make_building(units=3, days=10):
+    return SyntheticBuilding("fake", units=units, days=days, end=date(2024, 1, 11))
+
+
+def test_synthetic_values_are_deterministic_and_increasing():
+    first, second = make_building(), make_building()
+    serial = first.meters[0][1]
+    assert first.values(serial) == second.values(serial)
+    assert all(a < b for a, b in zip(first.values(serial), first.values(serial)[1:]))
+
+
+def test_tag_values_filtered_by_unit():
+    influx = FakeInflux([make_building()])
+    series = influx.execute("fake", 'SHOW TAG VALUES FROM "sv_l" WITH KEY = "sn" WHERE "unit" = \'u0002\'')
+    assert series == [{"name": "sv_l", "columns": ["key", "value"], "values": [["sn", "fake-u0002-0"]]}]
+    units = influx.execute("fake", 'SHOW TAG VALUES FROM sv_l WITH KEY = "unit"')
+    assert [v[1] for v in units[0]["values"]] == ["u0001", "u0002", "u0003"]
+
+
+def test_select_max_grouped_by_tag_with_regex_and_time_bound():
+    building = make_building()
+    influx = FakeInflux([building])
+    q = ('SELECT MAX("value") FROM "sv_l","tv_l" WHERE "sn" =~ /^(fake\\-u0001\\-0|fake\\-u0001\\-1)$/ '
+         'AND time >= \'2024-01-09T00:00:00Z\' GROUP BY time(1d),"sn" fill(none)')
+    series = influx.execute("fake", q, epoch="s")
+    assert [(s["name"], s["tags"]["sn"]) for s in series] == [("sv_l", "fake-u0001-0"), ("tv_l", "fake-u0001-1")]
+    assert [t for t, _ in series[0]["values"]] == [1704758400, 1704844800]
+    assert series[0]["values"][-1][1] == building.values("fake-u0001-0")[-1]
+
+
+def test_chunks_mark_partial_series():
+    series = [{"name": "sv_l", "columns": ["time", "max"], "values": [[i, float(i)] for i in range(5)]}]
+    chunks = list(iter_chunks(series, 2))
+    assert len(chunks) == 3
+    assert chunks[0]["results"][0]["partial"] and chunks[0]["results"][0]["series"][0]["partial"]
+    assert "partial" not in chunks[-1]["results"][0]
+
+
+def test_unknown_database_is_a_result_error(fake_influx):
+    fake_influx(make_building())
+    assert list(influx_utils.iter_influx_chunks("missing", 'SHOW TAG VALUES FROM sv_l WITH KEY = "unit"')) == []
+    assert "error" in influx_utils.query_influx("missing", 'SHOW TAG VALUES FROM sv_l WITH KEY = "unit"')["results"][0]
+
+
+def test_fetch_and_sync_against_fake_influx(client, session, fake_influx, max_queries):
+    synthetic = make_building()
+    server = fake_influx(synthetic)
+    building = Building(name="Fake House", address="Localhost 1", **synthetic.building_fields())
+    session.add(building)
+    session.commit()
+
+    response = client.post(f"/buildings/{building.id}/fetch_units")
+    assert response.status_code == 200
+    assert response.json()["units_found"] == 3
+    assert response.json()["meters_connected"] == 9
+    # One unit listing, then one serial lookup per unit and measurement
+    assert len(server.queries) == 1 + 3 * 3
+
+    unit = session.exec(select(Unit).where(Unit.building_id == building.id, Unit.unit_number == "u0001")).one()
+    server.reset_queries()
+    # Readings and both rollup tables are written with one statement per meter each, whatever the history length
+    with max_queries(sql=38, influx=9):
+        response = client.post(f"/units/{unit.id}/sync_readings")
+    assert response.json()["readings_synced"] == 3 * 10
+    # Syncing again stores nothing, with one INSERT per meter rather than a lookup per reading
+    with max_queries(sql=11, influx=9):
+        assert client.post(f"/units/{unit.id}/sync_readings").json()["readings_synced"] == 0
+    meter = session.exec(select(Meter).where(Meter.serial_number == "fake-u0001-2")).one()
+    readings = session.exec(select(MeterReading).where(MeterReading.meter_id == meter.id).order_by(MeterReading.time)).all()
+    assert [r.value for r in readings] == synthetic.values("fake-u0001-2")
+
+    with max_queries(influx=1):
+        response = client.get(f"/units/{unit.id}/dashboard")
+    meters = {m["serial_number"]: m for m in response.json()["meters"]}
+    assert meters["fake-u0001-0"]["series"]["v"] == synthetic.values("fake-u0001-0")
@@ -0,0 +1,81 @@
+from datetime import datetime
+
+import pytest
+from sqlmodel import select
+
+from app.models.telemetry import MeterReading, MeterDailyRollup
+from app.services.ingestion import ingest_readings
+
+
+@pytest.fixture
+def meters(session, make_meter):
+    cold = make_meter("IMP-COLD", building={"name": "Import House", "address": "Paper 7"}, unit={"unit_number": "G1"})
+    hot = make_meter("IMP-HOT", type="water_hot", unit_id=cold.unit_id)
+    session.add(MeterReading(meter_id=cold.id, time=datetime(2024, 1, 31), value=100.0, is_manual=True))
+    ingest_readings(session, cold.id, [(datetime(2024, 1, 31), 100.0)], source="manual")
+    session.commit()
+    return cold, hot
+
+
+def test_bulk_import(client, session, meters):
+    cold, hot = meters
+    csv_text = "\n".join([
+        "serial_number;time;value",
+        "IMP-COLD;2024-02-29;112,5",       # ok (decimal comma)
+        "IMP-HOT;2024-01-31;40",            # ok, first reading of the meter
+        "IMP-HOT;2024-02-29;38",            # lower than previous
+        "IMP-COLD;2024-01-15;90",           # older than the stored reading
+        "IMP-NONE;2024-02-29;1",            # unknown meter
+        "IMP-HOT;yesterday;1",              # bad time
+        "IMP-COLD;2024-01-31;100",          # already stored
+        "IMP-COLD;2024-03-31;120",          # ok
+        "IMP-COLD;2024-03-31;120",          # repeated row
+    ])
+    response = client.post("/telemetry/readings/import", files={"file": ("readings.csv", csv_text.encode(), "text/csv")})
+    assert response.status_code == 200
+    report = response.json()
+
+    assert report["rows"] == 9
+    assert report["inserted"] == 3
+    assert report["duplicates"] == 1
+    assert [(r["line"], r["reason"]) for r in report["rejected"]] == [
+        (4, "Lower than the previous reading"),
+        (5, "Older than the last stored reading"),
+        (6, "Unknown meter"),
+        (7, "Invalid time or value"),
+        (10, "Duplicate row in the file"),
+    ]
+
+    values = session.exec(select(MeterReading.value).where(MeterReading.meter_id == cold.id).order_by(MeterReading.time)).all()
+    assert values == [100.0, 112.5, 120.0]
+    # Imported readings went through ingestion
+    assert session.exec(select(MeterDailyRollup).where(MeterDailyRollup.meter_id == hot.id)).first() is not None
+
+
+def test_import_requires_columns(client, session):
+    response = client.post("/telemetry/readings/import", files={"file": ("readings.csv", b"serial,value\nA,1", "text/csv")})
+    assert response.status_code == 400
+    assert "time" in response.json()["detail"]
+
+
+def test_rows_are_checked_against_the_last_accepted_reading(client, session, meters):
+    cold, _ = meters
+    csv_text = "\n".join([
+        "serial_number,time,value",
+        "IMP-COLD,2024-01-10,90",   # older than the stored reading
+        "IMP-COLD,2024-01-20,95",   # older as well, not just the first row of the meter
+        "IMP-COLD,2024-02-29,80",   # lower than the stored 100
+        "IMP-COLD,2024-03-31,90",   # higher than the rejected 80, still lower than 100
+        "IMP-COLD,2024-04-30,105",  # ok
+    ])
+    report = client.post("/telemetry/readings/import", files={"file": ("readings.csv", csv_text.encode(), "text/csv")}).json()
+
+    assert report["inserted"] == 1
+    assert [(r["line"], r["reason"]) for r in report["rejected"]] == [
+        (2, "Older than the last stored reading"),
+        (3, "Older than the last stored reading"),
+        (4, "Lower than the previous reading"),
+        (5, "Lower than the previous reading"),
+    ]
+    values = session.exec(select(MeterReading.value).where(MeterReading.meter_id == cold.id).order_by(MeterReading.time)).all()
+    assert values == [100.0, 105.0]
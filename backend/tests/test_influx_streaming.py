@@ -0,0 +1,46 @@
+import json
+
+from app.core import influx_utils
+from tests.conftest import FakeStreamResponse, make_chunk
+
+
+def test_iter_meter_readings_streams_chunks(monkeypatch):
+    calls = []
+
+    def fake_get(url, params=None, auth=None, stream=False):
+        calls.append(params)
+        return FakeStreamResponse([
+            make_chunk([[86400, 1.5], [172800, 2.0]]),
+            b"",
+            make_chunk([[259200, 3]], partial=False),
+        ])
+
+    monkeypatch.setattr(influx_utils.requests, "get", fake_get)
+
+    readings = influx_utils.iter_meter_readings("db", "SN1", "sv_l", "sn", epoch="s", chunk_size=2)
+    assert next(readings) == (86400, 1.5)
+    assert list(readings) == [(172800, 2.0), (259200, 3)]
+    assert calls[0]["chunked"] == "true"
+    assert calls[0]["chunk_size"] == 2
+    assert calls[0]["epoch"] == "s"
+
+
+def test_get_meter_columns_fills_compact_arrays(monkeypatch):
+    monkeypatch.setattr(influx_utils.requests, "get", lambda *a, **kw: FakeStreamResponse([
+        make_chunk([[86400, 1.5], [172800, 2.0]], partial=False),
+    ]))
+
+    times, values = influx_utils.get_meter_columns("db", "SN1", "sv_l", "sn")
+    assert times.typecode == "q" and values.typecode == "d"
+    assert list(times) == [86400, 172800]
+    assert list(values) == [1.5, 2.0]
+
+
+def test_iter_influx_chunks_stops_on_error(monkeypatch):
+    monkeypatch.setattr(influx_utils.requests, "get", lambda *a, **kw: FakeStreamResponse([
+        make_chunk([[86400, 1.5]]),
+        json.dumps({"results": [{"statement_id": 0, "error": "boom"}]}).encode(),
+    ]))
+
+    chunks = list(influx_utils.iter_influx_chunks("db", "SELECT 1"))
+    assert len(chunks) == 1
@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from sqlmodel import select
+
+from app.models.telemetry import MeterLatest
+from app.services.latest import rebuild_latest
+
+
+def test_latest_values(client, session, make_meter):
+    meter = make_meter("LAT-1", unit={"unit_number": "H1"})
+    idle = make_meter("LAT-2", type="water_hot", unit_id=meter.unit_id)
+    unit = meter.unit
+    building = unit.building
+
+    for t, v in [("2024-01-02T00:00:00", 12.0), ("2024-01-01T00:00:00", 10.0)]:
+        reading = {"meter_id": str(meter.id), "value": v, "time": t, "is_manual": True}
+        assert client.post("/telemetry/readings/", json=reading).status_code == 200
+
+    latest = client.get(f"/units/{unit.id}/latest").json()
+    assert [(m["serial_number"], m["value"], m["source"]) for m in latest] == [("LAT-1", 12.0, "manual"), ("LAT-2", None, None)]
+    assert latest[0]["time"] == "2024-01-02T00:00:00"
+
+    building_latest = client.get(f"/buildings/{building.id}/latest").json()
+    assert building_latest == latest
+
+    # Rebuilding from meter_readings gives the same state
+    rebuild_latest(session)
+    session.commit()
+    row = session.exec(select(MeterLatest).where(MeterLatest.meter_id == meter.id)).one()
+    assert (row.time, row.value, row.source) == (datetime(2024, 1, 2), 12.0, "manual")
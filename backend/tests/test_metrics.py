@@ -0,0 +1,91 @@
+import asyncio
+import json
+
+from app import main
+from app.core import influx_utils, metrics
+from app.core.metrics import Histogram, MetricsMiddleware, Registry
+from app.models.property import Building
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, "/a")
+    text = registry.render()
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="/a",le="1"} 3' in text
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 4' in text
+    assert 'latency_seconds_count{route="/a"} 4' in text
+    assert 'latency_seconds_sum{route="/a"} 4.05' in text
+
+
+def test_requests_are_labelled_by_route_template_with_sql_counts(client, session, monkeypatch):
+    monkeypatch.setattr(main, "METRICS_TOKEN", "scrape-me")
+    building = Building(name="Metered House", address="Counter 1")
+    session.add(building)
+    session.commit()
+
+    route = "/buildings/{building_id}"
+    before = metrics.HTTP_SQL_QUERIES.count("GET", route)
+    queries_before = metrics.HTTP_SQL_QUERIES.sum("GET", route)
+    assert client.get(f"/buildings/{building.id}").status_code == 200
+    assert client.get("/no/such/path").status_code == 404
+
+    assert metrics.HTTP_SQL_QUERIES.count("GET", route) == before + 1
+    # Statements run in the endpoint's worker thread still land on the request's counters
+    assert metrics.HTTP_SQL_QUERIES.sum("GET", route) > queries_before
+    assert metrics.HTTP_REQUESTS.value("GET", metrics.UNMATCHED_ROUTE, "404") >= 1
+
+    text = client.get("/metrics", headers={"Authorization": "Bearer scrape-me"}).text
+    assert f'http_request_duration_seconds_count{{method="GET",route="{route}"}}' in text
+    assert 'sql_queries_total{operation="SELECT"}' in text
+    assert "building_cache_hit_ratio" in text
+    # One sample per route template, not per building id
+    assert str(building.id) not in text
+
+
+def test_influx_queries_counted_per_database(monkeypatch):
+    class FakeResponse:
+        content = json.dumps({"results": [{"error": "measurement not found"}]}).encode()
+
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return json.loads(self.content)
+
+    monkeypatch.setattr(influx_utils.requests, "get", lambda *a, **kw: FakeResponse())
+    queries = metrics.INFLUX_QUERIES.value("metrics_db")
+    errors = metrics.INFLUX_ERRORS.value("metrics_db")
+    received = metrics.INFLUX_BYTES.value("metrics_db")
+
+    influx_utils.query_influx("metrics_db", "SELECT 1")
+
+    assert metrics.INFLUX_QUERIES.value("metrics_db") == queries + 1
+    assert metrics.INFLUX_ERRORS.value("metrics_db") == errors + 1
+    assert metrics.INFLUX_BYTES.value("metrics_db") == received + len(FakeResponse.content)
+
+
+def test_metrics_endpoint_requires_the_token(client, monkeypatch):
+    monkeypatch.setattr(main, "METRICS_TOKEN", None)
+    assert client.get("/metrics").status_code == 404
+    monkeypatch.setattr(main, "METRICS_TOKEN", "scrape-me")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+
+
+def test_event_streams_are_left_out_of_the_latency_histogram():
+    async def stream(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/event-stream; charset=utf-8")]})
+        await send({"type": "http.response.body", "body": b"data: 1\n\n"})
+
+    async def sent(message):
+        pass
+
+    scope = {"type": "http", "method": "GET", "path": "/sse-test", "headers": []}
+    requests = metrics.HTTP_REQUESTS.value("GET", metrics.UNMATCHED_ROUTE, "200")
+    durations = metrics.HTTP_DURATION.count("GET", metrics.UNMATCHED_ROUTE)
+    asyncio.run(MetricsMiddleware(stream)(scope, None, sent))
+    assert metrics.HTTP_REQUESTS.value("GET", metrics.UNMATCHED_ROUTE, "200") == requests + 1
+    assert metrics.HTTP_DURATION.count("GET", metrics.UNMATCHED_ROUTE) == durations
@@ -0,0 +1,76 @@
+import threading
+import time
+
+from app.core import profiling
+from app.core.security import create_access_token
+from app.models.property import User
+
+
+def token_for(user):
+    return create_access_token(data={"sub": str(user.id), "role": user.role})
+
+
+def test_categorize_by_innermost_library_frame():
+    endpoint = ("/srv/backend/app/api/units.py", 10, "unit_dashboard")
+    execute = ("/venv/site-packages/sqlalchemy/engine/base.py", 1, "execute")
+    recv = ("/usr/lib/python3.11/socket.py", 1, "readinto")
+    requests_get = ("/venv/site-packages/requests/api.py", 1, "get")
+    assert profiling.categorize((endpoint, execute)) == "orm"
+    assert profiling.categorize((endpoint, requests_get, recv)) == "influx_http"
+    assert profiling.categorize((endpoint,)) == "app"
+
+
+def test_sampler_sees_busy_threads_only():
+    done = threading.Event()
+
+    def busy_loop():
+        while not done.is_set():
+            sum(range(1000))
+
+    worker = threading.Thread(target=busy_loop)
+    worker.start()
+    profiler = profiling.SamplingProfiler(0.001)
+    profiler.start()
+    time.sleep(0.05)
+    profiler.stop()
+    done.set()
+    worker.join()
+
+    assert any(stack[-1][2] == "busy_loop" for stack in profiler.stacks)
+    report, collapsed = profiling.build_report(profiler, "GET", "/x", 200, 0.05)
+    assert report["samples"] == sum(profiler.stacks.values())
+    assert "busy_loop (tests/test_profiling.py:" in collapsed
+
+
+def test_admin_request_profiled_and_stored(client, admin, session, monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path)
+    owner = User(email="profiled@example.com", full_name="Not Admin", role="owner")
+    session.add(owner)
+    session.commit()
+
+    response = client.get("/buildings/", headers={"Authorization": f"Bearer {token_for(admin)}", "X-Profile": "1"})
+    assert response.status_code == 200
+    profile_id = response.headers["X-Profile-Id"]
+    assert "total;dur=" in response.headers["Server-Timing"]
+
+    report = client.get(f"/profiles/{profile_id}").json()
+    assert report["path"] == "/buildings/" and report["status"] == 200
+    assert client.get(f"/profiles/{profile_id}/collapsed").status_code == 200
+    assert [p["id"] for p in client.get("/profiles/").json()] == [profile_id]
+
+    # Only admins can turn it on, and ids can't leave the profile directory
+    response = client.get("/buildings/?profile=1", headers={"Authorization": f"Bearer {token_for(owner)}"})
+    assert "X-Profile-Id" not in response.headers
+    assert client.get("/profiles/..%2Fsecret").status_code == 404
+
+
+def test_demoted_admin_token_is_not_profiled(client, admin, session, monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path)
+    token = token_for(admin)
+    admin.role = "home_lord"
+    session.add(admin)
+    session.commit()
+
+    response = client.get("/buildings/", headers={"Authorization": f"Bearer {token}", "X-Profile": "1"})
+    assert "X-Profile-Id" not in response.headers
+    assert profiling.list_reports(tmp_path) == []
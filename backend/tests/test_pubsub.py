@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import uuid
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.main import app
+from app.api.deps import get_stream_user
+from app.core.security import STREAM_TOKEN_EXPIRE_SECONDS, create_access_token, decode_token
+from app.core import sse
+from app.core.pubsub import Broker, broker
+from app.services.ingestion import ingest_readings
+
+
+def test_publish_from_another_thread_and_bounded_queue():
+    async def scenario():
+        local = Broker(queue_size=2)
+        subscription = local.subscribe(["a"])
+        publisher = threading.Thread(target=lambda: [local.publish("a", i) for i in range(5)])
+        publisher.start()
+        publisher.join()
+        await asyncio.sleep(0)  # let the loop run the handed over callbacks
+        received = [await subscription.get(), await subscription.get()]
+        dropped = subscription.take_dropped()
+        subscription.close()
+        return received, dropped, local.publish("a", 99)
+
+    received, dropped, delivered_after_close = asyncio.run(scenario())
+    assert received == [3, 4]  # oldest dropped
+    assert dropped == 3
+    assert delivered_after_close == 0
+
+
+def test_ingest_publishes_after_commit_only(session, make_meter):
+    meter = make_meter("LIVE-1", unit={"unit_number": "J1"})
+    unit = meter.unit
+    building = unit.building
+
+    async def scenario():
+        subscription = broker.subscribe([("unit", unit.id), ("building", building.id)])
+        ingest_readings(session, meter.id, [(datetime(2024, 1, 1), 1.0)])
+        session.rollback()
+        ingest_readings(session, meter.id, [(datetime(2024, 1, 2), 2.0), (datetime(2024, 1, 3), 3.0)], source="push")
+        await asyncio.sleep(0)
+        assert subscription.queue.empty()  # nothing before commit
+        session.commit()
+        await asyncio.sleep(0)
+        events = [subscription.queue.get_nowait() for _ in range(subscription.queue.qsize())]
+        subscription.close()
+        return events
+
+    events = asyncio.run(scenario())
+    # One event per topic (unit and building), both for the committed batch only
+    assert len(events) == 2
+    name, data = events[0]
+    assert name == "reading"
+    assert (data["meter_id"], data["time"], data["value"], data["count"], data["source"]) == (meter.id, datetime(2024, 1, 3), 3.0, 2, "push")
+
+
+def test_event_stream_formats_events():
+    class FakeRequest:
+        async def is_disconnected(self):
+            return False
+
+    async def scenario():
+        stream = sse._event_stream(FakeRequest(), [("unit", "u1")])
+        first = await stream.__anext__()
+        pending = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        broker.publish(("unit", "u1"), ("reading", {"value": 1.5}))
+        second = await pending
+        await stream.aclose()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first.startswith("retry:")
+    assert second == 'event: reading\ndata: {"value":1.5}\n\n'
+    assert broker.subscriber_count() == 0
+
+
+def test_stream_endpoint_checks_access(client, admin):
+    # EventSource can't send headers: without a bearer header or ?access_token= the stream is refused
+    assert client.get(f"/units/{uuid.uuid4()}/stream").status_code == 401
+
+    app.dependency_overrides[get_stream_user] = lambda: admin
+    assert client.get(f"/units/{uuid.uuid4()}/stream").status_code == 404
+    assert client.get(f"/buildings/{uuid.uuid4()}/stream").status_code == 404
+
+
+def test_only_stream_tokens_are_accepted_in_the_url(client, admin):
+    login_token = create_access_token({"sub": str(admin.id), "role": admin.role})
+    url = f"/units/{uuid.uuid4()}/stream"
+    # The login token must not end up in URLs (access logs, browser history)
+    assert client.get(url, params={"access_token": login_token}).status_code == 401
+
+    response = client.post("/stream-token")
+    assert response.status_code == 200
+    assert response.json()["expires_in"] == STREAM_TOKEN_EXPIRE_SECONDS
+    stream_token = response.json()["access_token"]
+    # Past authentication: the unit doesn't exist
+    assert client.get(url, params={"access_token": stream_token}).status_code == 404
+    assert client.get(url, headers={"Authorization": f"Bearer {login_token}"}).status_code == 404
+
+    # ...and a stream token is no API token
+    with pytest.raises(HTTPException):
+        decode_token(stream_token)
@@ -0,0 +1,46 @@
+import logging
+
+from app.core import query_log
+from app.core.metrics import RequestStats
+from app.models.property import User
+
+
+def test_statements_aggregated_by_text():
+    stats = RequestStats()
+    for _ in range(3):
+        stats.record("sql", "SELECT * FROM units WHERE owner_id = ?", 0.01)
+    stats.record("influx", "[db] SELECT MAX(value) FROM sv_l", 0.5)
+
+    top = query_log.top_statements(stats)
+    assert top[0] == ("influx", "[db] SELECT MAX(value) FROM sv_l", 1, 0.5, 0.5)
+    assert top[1][2] == 3 and abs(top[1][3] - 0.03) < 1e-9
+
+
+def test_over_budget_request_logged_with_its_statements(client, session, monkeypatch, caplog, max_queries):
+    session.add_all([User(email=f"owner{i}@example.com", full_name=f"Owner {i}", role="owner") for i in range(5)])
+    session.commit()
+    monkeypatch.setattr(query_log, "QUERY_BUDGET_COUNT", 5)
+
+    with caplog.at_level(logging.WARNING, logger=query_log.logger.name), max_queries() as requests:
+        assert client.get("/users/").status_code == 200
+
+    (_, route, stats), = requests
+    assert route == "/users/"
+    assert stats.sql_queries > 5
+    # The per user lookups are one entry counted once per user, not one entry per statement
+    assert max(count for count, _, _ in stats.statements.values()) == 6
+
+    (record,) = [r for r in caplog.records if r.name == query_log.logger.name]
+    message = record.getMessage()
+    assert "GET /users/ 200" in message and "over budget" in message
+    assert "6x" in message and "FROM buildings" in message
+
+
+def test_max_queries_fails_with_the_statements(client, max_queries):
+    try:
+        with max_queries(sql=0):
+            client.get("/users/")
+    except AssertionError as e:
+        assert "expected at most 0" in str(e) and "FROM users" in str(e)
+    else:
+        raise AssertionError("max_queries did not fail")
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+from array import array
+
+import pytest
+from sqlalchemy import event
+
+from app.main import app
+from app.api import units as units_api
+from app.api.deps import get_current_user
+from app.models.property import Building, Unit, User
+from app.models.telemetry import Meter, MeterReading
+
+# Tables whose lookups must never fall back to a full scan on the hot endpoints
+HOT_TABLES = ("meter_readings", "meters", "units", "buildings", "users")
+
+
+@pytest.fixture
+def query_plans(engine):
+    """Collects EXPLAIN QUERY PLAN of every SELECT the app runs on the test engine."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+
+    def plans():
+        collected = list(statements)
+        statements.clear()
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            with engine.connect() as conn:
+                return [
+                    (statement, [row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)])
+                    for statement, parameters in collected
+                ]
+        finally:
+            event.listen(engine, "before_cursor_execute", before_cursor_execute)
+
+    yield plans
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def assert_no_full_scans(plans):
+    for statement, plan in plans:
+        for step in plan:
+            # "SCAN t" is a full table scan, "SCAN t USING INDEX" / "SEARCH t ..." are index accesses
+            for table in HOT_TABLES:
+                assert step != f"SCAN {table}", f"Full scan of {table}:\n{statement}\n{plan}"
+
+
+@pytest.fixture
+def building_data(session, admin):
+    lord = User(email="lord@homiq.cz", role="home_lord", created_by_id=admin.id, invite_token="invite-token", invite_expires_at=datetime.utcnow() + timedelta(days=1))
+    owner = User(email="owner@homiq.cz", role="owner", created_by_id=admin.id)
+    session.add(lord)
+    session.add(owner)
+    session.commit()
+    building = Building(name="Sunny Side", address="Sunshine 1", manager_id=lord.id, influx_db_name="db", influx_device_tag="sn", influx_measurements="sv_l[m3]")
+    session.add(building)
+    session.commit()
+    unit = Unit(unit_number="A1", floor=1, area_m2=50.0, building_id=building.id, owner_id=owner.id)
+    session.add(unit)
+    session.commit()
+    meter = Meter(serial_number="WAT-A1", type="water_cold", unit_of_measure="m3", unit_id=unit.id)
+    session.add(meter)
+    session.commit()
+    for day in range(5):
+        session.add(MeterReading(meter_id=meter.id, value=float(day), time=datetime(2024, 1, 1) + timedelta(days=day)))
+    session.commit()
+    return lord, building, unit, meter
+
+
+def test_readings_endpoints_use_meter_time_index(client, building_data, query_plans, monkeypatch):
+    _, _, unit, meter = building_data
+    monkeypatch.setattr(units_api, "get_meter_columns", lambda *args: (array('q'), array('d')))
+    monkeypatch.setattr(units_api, "iter_meter_readings", lambda *args: iter([("2024-01-03T00:00:00Z", 2.0), ("2024-01-09T00:00:00Z", 9.0)]))
+    query_plans()
+
+    assert client.get(f"/telemetry/meters/{meter.id}/readings").status_code == 200
+    assert client.get(f"/telemetry/meters/?unit_id={unit.id}").status_code == 200
+    assert client.get(f"/units/{unit.id}/readings_influx").status_code == 200
+    assert client.post(f"/units/{unit.id}/sync_readings").json()["readings_synced"] == 1
+
+    plans = query_plans()
+    assert any("ix_meter_readings_meter_id_time" in step for _, plan in plans for step in plan)
+    assert_no_full_scans(plans)
+
+
+def test_building_and_user_lookups_use_indexes(client, building_data, query_plans):
+    lord, building, _, _ = building_data
+    query_plans()
+
+    assert client.get(f"/buildings/{building.id}/units").status_code == 200
+    assert client.get("/validate-invite/invite-token").status_code == 200
+    app.dependency_overrides[get_current_user] = lambda: lord
+    assert client.get("/buildings/").status_code == 200
+    assert client.get("/users/").status_code == 200
+
+    plans = query_plans()
+    used = {step for _, plan in plans for step in plan}
+    for index in ("ix_units_building_id", "ix_users_invite_token", "ix_buildings_manager_id", "ix_users_created_by_id"):
+        assert any(index in step for step in used), index
+    assert_no_full_scans(plans)
@@ -0,0 +1,57 @@
+from datetime import datetime, timezone
+
+from sqlmodel import select
+
+from app.models.telemetry import MeterDailyRollup, MeterMonthlyRollup
+from app.services.rollups import update_rollups, rebuild_rollups
+
+
+def test_update_rollups_is_incremental(session, make_meter):
+    meter = make_meter()
+    update_rollups(session, meter.id, [(datetime(2024, 1, 1, 12), 10.0), (datetime(2024, 1, 1, 6), 8.0)])
+    session.commit()
+    # Later batch, one reading tz-aware (sync) and one before the current first reading
+    update_rollups(session, meter.id, [(datetime(2024, 1, 1, 20, tzinfo=timezone.utc), 11.5), (datetime(2024, 1, 1, 1), 7.0), (datetime(2024, 1, 2, 8), 12.0)])
+    session.commit()
+
+    day = session.exec(select(MeterDailyRollup).where(MeterDailyRollup.bucket == datetime(2024, 1, 1))).one()
+    assert (day.first_value, day.last_value, day.min_value, day.max_value, day.count) == (7.0, 11.5, 7.0, 11.5, 4)
+    assert day.delta == 4.5
+    assert day.last_time == datetime(2024, 1, 1, 20)
+
+    month = session.exec(select(MeterMonthlyRollup)).one()
+    assert (month.bucket, month.first_value, month.last_value, month.count, month.delta) == (datetime(2024, 1, 1), 7.0, 12.0, 5, 5.0)
+
+
+def test_manual_readings_feed_rollups_and_month_resolution(client, session, make_meter):
+    meter = make_meter()
+    for day, value in [(1, 1.0), (15, 3.0), (31, 4.0)]:
+        response = client.post("/telemetry/readings/", json={"meter_id": str(meter.id), "value": value, "time": f"2024-01-{day:02d}T10:00:00"})
+        assert response.status_code == 200
+    client.post("/telemetry/readings/", json={"meter_id": str(meter.id), "value": 6.0, "time": "2024-02-10T10:00:00"})
+
+    monthly = client.get(f"/telemetry/meters/{meter.id}/readings?resolution=month").json()
+    assert [(r["time"], r["value"], r["is_manual"]) for r in monthly] == [
+        ("2024-02-01T00:00:00", 6.0, False),
+        ("2024-01-01T00:00:00", 4.0, False),
+    ]
+    daily = client.get(f"/telemetry/meters/{meter.id}/readings?resolution=day&format=compact").json()
+    assert daily["v"] == [6.0, 4.0, 3.0, 1.0]
+
+    # Rebuilding from raw readings gives the same rollups
+    before = [(r.bucket, r.first_value, r.last_value, r.count) for r in session.exec(select(MeterDailyRollup).order_by(MeterDailyRollup.bucket))]
+    rebuild_rollups(session)
+    session.commit()
+    after = [(r.bucket, r.first_value, r.last_value, r.count) for r in session.exec(select(MeterDailyRollup).order_by(MeterDailyRollup.bucket))]
+    assert before == after
+
+
+def test_duplicate_reading_is_a_conflict_and_leaves_rollups_alone(client, session, make_meter):
+    meter = make_meter()
+    reading = {"meter_id": str(meter.id), "value": 2.0, "time": "2024-01-05T10:00:00"}
+    assert client.post("/telemetry/readings/", json=reading).status_code == 200
+    response = client.post("/telemetry/readings/", json={**reading, "value": 3.0})
+    assert response.status_code == 409
+
+    day = session.exec(select(MeterDailyRollup)).one()
+    assert (day.count, day.last_value) == (1, 2.0)
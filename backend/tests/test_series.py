@@ -0,0 +1,31 @@
+from array import array
+from datetime import datetime, timezone
+from app.core.series import ReadingSeries, format_epoch, to_epoch
+
+
+def test_from_columns_is_zero_copy_and_compact():
+    times = array('q', [0, 86400])
+    values = array('d', [1.0, 2.5])
+    series = ReadingSeries.from_columns(times, values)
+
+    assert len(series) == 2
+    assert series.times.base is not None  # view over the array buffer
+    assert series.to_compact() == {"t": [0, 86400], "v": [1.0, 2.5]}
+
+
+def test_points_keep_legacy_influx_shape():
+    series = ReadingSeries.from_columns(array('q', [86400]), array('d', [3.0]))
+    assert series.to_points() == [{"id": 0, "value": 3.0, "time": "1970-01-02T00:00:00Z", "is_manual": False}]
+
+
+def test_from_rows_treats_naive_times_as_utc():
+    naive = datetime(2024, 1, 1)
+    aware = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    series = ReadingSeries.from_rows([(naive, 1.0), (aware, 2.0)])
+
+    assert series.times.tolist() == [to_epoch(aware)] * 2
+    assert format_epoch(series.times[0]) == "2024-01-01T00:00:00Z"
+
+
+def test_empty_series():
+    assert ReadingSeries.from_columns(array('q'), array('d')).to_compact() == {"t": [], "v": []}
@@ -0,0 +1,65 @@
+import io
+import json
+
+import pytest
+from opentelemetry import trace
+
+from app.core import influx_utils, tracing
+from tests.conftest import FakeStreamResponse, make_chunk
+
+
+@pytest.fixture
+def exporter():
+    provider = trace.get_tracer_provider()
+    if isinstance(provider, trace.ProxyTracerProvider):
+        provider = tracing.LocalTracerProvider()
+        trace.set_tracer_provider(provider)  # Once per process; later tests run with no exporter
+    if not isinstance(provider, tracing.LocalTracerProvider):
+        pytest.skip("Another tracer provider is installed")
+    exporter = tracing.MemoryExporter()
+    provider.exporter = exporter
+    yield exporter
+    provider.exporter = None
+
+
+def test_influx_measurements_parsed_from_query():
+    assert tracing.influx_measurements('SELECT MAX("value") FROM "sv_l","tv_l" WHERE "sn" =~ /^(a)$/') == ("sv_l", "tv_l")
+    assert tracing.influx_measurements("SHOW TAG VALUES FROM sv_l WITH KEY = \"unit\"") == ("sv_l",)
+
+
+def test_sync_decomposes_into_sql_and_influx_spans(client, session, monkeypatch, exporter, make_meter):
+    influx = {"influx_db_name": "traced", "influx_device_tag": "sn", "influx_measurements": "sv_l[m3]"}
+    unit = make_meter("TR-1", building=influx, unit={"unit_number": "T1", "area_m2": 40.0}).unit
+
+    monkeypatch.setattr(influx_utils.requests, "get", lambda *a, **kw: FakeStreamResponse([
+        make_chunk([["2024-01-01T00:00:00Z", 1.0], ["2024-01-02T00:00:00Z", 2.0]], partial=False),
+    ]))
+    assert client.post(f"/units/{unit.id}/sync_readings").json()["readings_synced"] == 2
+
+    (spans,) = [t for t in exporter.traces if any(s.name == "sync_meter" for s in t)]
+    by_id = {s.context.span_id: s for s in spans}
+    root = spans[-1]
+    assert root.parent is None and root.name == "POST /units/{unit_id}/sync_readings"
+
+    (meter_span,) = [s for s in spans if s.name == "sync_meter"]
+    (influx_span,) = [s for s in spans if s.name == "InfluxQL"]
+    assert influx_span.parent.span_id == meter_span.context.span_id
+    assert influx_span.attributes["db.name"] == "traced"
+    assert influx_span.attributes["influx.measurements"] == ("sv_l",)
+    assert influx_span.attributes["influx.rows"] == 2
+
+    sql = [s for s in spans if s.name.startswith("SQL ")]
+    assert any(s.parent.span_id == meter_span.context.span_id for s in sql)  # the batched reading insert and rollup upserts
+    assert all(s.context.trace_id == root.context.trace_id and s.parent.span_id in by_id for s in spans[:-1])
+
+
+def test_console_exporter_prints_tree(exporter):
+    out = io.StringIO()
+    with tracing.span("outer", building="B"):
+        with tracing.span("inner"):
+            pass
+    tracing.ConsoleExporter(out).export(exporter.traces[-1])
+    lines = out.getvalue().splitlines()
+    assert lines[1].startswith("  outer ") and "building=B" in lines[1]
+    assert lines[2].startswith("    inner ")
+    json.dumps(exporter.traces[-1][0].to_dict())  # file exporter format is serializable
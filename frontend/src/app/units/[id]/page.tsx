@@ -3,7 +3,7 @@ import React, { useEffect, useState, use } from 'react';
 import Link from 'next/link';
 import { useRouter } from 'next/navigation';
 import UserSelect from '@/components/UserSelect';
-import { authFetch } from '@/lib/api';
+import { authFetch, authEventSource } from '@/lib/api';
 import { useAuth } from '@/context/AuthContext';
 import { useLanguage } from '@/context/LanguageContext';
 
@@ -55,48 +55,46 @@ export default function UnitDetail({ params }: { params: Promise<{ id: string }>
             router.push('/login');
             return;
         }
-        // 1. Fetch unit info
-        authFetch(`/units/${id}`)
-            .then(res => res.json())
-            .then(data => {
-                setUnit(data);
-                setOwnerId(data.owner_id || "");
-            })
-            .catch(err => console.error(err));
-
-        // 2. Sync and Fetch
-        // 2. Fetch Meters and Readings (Optimized)
-        const fetchMeters = async () => {
-            // 1. Get Meters List (Fast, SQL)
+        // Unit, owner, meters and their daily series in one call
+        const fetchDashboard = async () => {
             try {
-                const res = await authFetch(`/telemetry/meters/?unit_id=${id}`);
-                const unitMeters: any[] = await res.json();
-
-                // Set meters immediately with empty readings to show structure
-                setMeters(unitMeters.map(m => ({ ...m, recent_readings: [] })));
-
-                // 2. Fetch Readings from Influx (Direct, One Call)
-                try {
-                    const readingsRes = await authFetch(`/units/${id}/readings_influx`);
-                    const readingsMap = await readingsRes.json();
-
-                    // Merge measurements
-                    const metersWithReadings = unitMeters.map(meter => ({
-                        ...meter,
-                        recent_readings: readingsMap[meter.id] || []
-                    }));
-
-                    setMeters(metersWithReadings);
-                } catch (readErr) {
-                    console.error("Failed to load readings", readErr);
-                }
-
+                const res = await authFetch(`/units/${id}/dashboard`);
+                const data = await res.json();
+                setUnit({ ...data.unit, owner: data.owner });
+                setOwnerId(data.unit.owner_id || "");
+
+                // Series come as columns: t = epoch seconds, v = values
+                setMeters(data.meters.map((meter: any) => ({
+                    ...meter,
+                    recent_readings: meter.series.t.map((ts: number, i: number) => ({
+                        id: i,
+                        value: meter.series.v[i],
+                        time: new Date(ts * 1000).toISOString(),
+                        is_manual: false,
+                    })),
+                })));
             } catch (err) {
                 console.error(err);
             }
         };
 
-        fetchMeters();
+        fetchDashboard();
+
+        // Live updates: append new readings as the backend ingests them
+        const events = authEventSource(`/units/${id}/stream`);
+        events.addEventListener('reading', (e) => {
+            const reading = JSON.parse((e as MessageEvent).data);
+            setMeters(prev => prev.map(meter => meter.id !== reading.meter_id ? meter : {
+                ...meter,
+                recent_readings: [
+                    ...meter.recent_readings,
+                    { id: meter.recent_readings.length, value: reading.value, time: reading.time, is_manual: reading.source === 'manual' },
+                ],
+            }));
+        });
+        // Fell behind, the stream skipped events: reload everything
+        events.addEventListener('dropped', () => fetchDashboard());
+        return () => events.close();
     }, [id, token, authLoading]);
 
 
@@ -22,3 +22,43 @@ export async function authFetch(url: string, options: RequestInit = {}) {
 
     return res;
 }
+
+// Server-Sent Events. EventSource can't send headers, so the URL carries a short-lived stream token
+// (POST /stream-token), never the login token; a fresh one is fetched whenever the stream has to reconnect.
+export function authEventSource(url: string) {
+    const fullUrl = url.startsWith('http') ? url : `${API_URL}${url}`;
+    const separator = fullUrl.includes('?') ? '&' : '?';
+    const listeners: [string, EventListener][] = [];
+    let source: EventSource | null = null;
+    let closed = false;
+    let retry: ReturnType<typeof setTimeout> | undefined;
+
+    const open = async () => {
+        try {
+            const res = await authFetch('/stream-token', { method: 'POST' });
+            const { access_token } = await res.json();
+            if (closed) return;
+            source = new EventSource(`${fullUrl}${separator}access_token=${encodeURIComponent(access_token)}`);
+            listeners.forEach(([type, listener]) => source!.addEventListener(type, listener));
+            source.onerror = () => {
+                // The browser retries with the same URL; once the expired token gets it refused, start over
+                if (source?.readyState === EventSource.CLOSED && !closed) retry = setTimeout(open, 3000);
+            };
+        } catch {
+            if (!closed) retry = setTimeout(open, 3000);
+        }
+    };
+    open();
+
+    return {
+        addEventListener(type: string, listener: EventListener) {
+            listeners.push([type, listener]);
+            source?.addEventListener(type, listener);
+        },
+        close() {
+            closed = true;
+            clearTimeout(retry);
+            source?.close();
+        },
+    };
+}